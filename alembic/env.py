@@ -25,6 +25,16 @@ if config.config_file_name is not None:
 # target_metadata = None
 target_metadata = SQLModel.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    # The full-text index is an FTS5 virtual table with shadow tables, created
+    # by raw SQL and unknown to the models, see todoapp.database.search
+    if type_ == "table" and name.startswith("task_fts"):
+        return False
+
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -47,6 +57,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -69,7 +80,11 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
@@ -0,0 +1,72 @@
+"""Add user change version
+
+Revision ID: 06585f9f8cf7
+Revises: 5e67551c7364
+Create Date: 2026-10-18 18:05:37.512948
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "06585f9f8cf7"
+down_revision: Union[str, None] = "5e67551c7364"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The triggers as of this revision, later ones redefine them
+TRIGGERS = [
+    """CREATE TRIGGER task_version_insert AFTER INSERT ON "task" BEGIN
+UPDATE "user" SET change_version = change_version + 1 WHERE id IN (NEW.user_id);
+END""",
+    """CREATE TRIGGER task_version_update AFTER UPDATE ON "task" BEGIN
+UPDATE "user" SET change_version = change_version + 1 WHERE id IN (OLD.user_id, NEW.user_id);
+END""",
+    """CREATE TRIGGER task_version_delete AFTER DELETE ON "task" BEGIN
+UPDATE "user" SET change_version = change_version + 1 WHERE id IN (OLD.user_id);
+END""",
+    """CREATE TRIGGER list_version_insert AFTER INSERT ON "list" BEGIN
+UPDATE "user" SET change_version = change_version + 1 WHERE id IN (NEW.user_id);
+END""",
+    """CREATE TRIGGER list_version_update AFTER UPDATE OF user_id, group_id, title, created_at, updated_at ON "list" BEGIN
+UPDATE "user" SET change_version = change_version + 1 WHERE id IN (OLD.user_id, NEW.user_id);
+END""",
+    """CREATE TRIGGER list_version_delete AFTER DELETE ON "list" BEGIN
+UPDATE "user" SET change_version = change_version + 1 WHERE id IN (OLD.user_id);
+END""",
+    """CREATE TRIGGER group_version_insert AFTER INSERT ON "group" BEGIN
+UPDATE "user" SET change_version = change_version + 1 WHERE id IN (NEW.user_id);
+END""",
+    """CREATE TRIGGER group_version_update AFTER UPDATE ON "group" BEGIN
+UPDATE "user" SET change_version = change_version + 1 WHERE id IN (OLD.user_id, NEW.user_id);
+END""",
+    """CREATE TRIGGER group_version_delete AFTER DELETE ON "group" BEGIN
+UPDATE "user" SET change_version = change_version + 1 WHERE id IN (OLD.user_id);
+END""",
+]
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("user", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "change_version", sa.Integer(), nullable=False, server_default="0"
+            )
+        )
+
+    for trigger in TRIGGERS:
+        op.execute(trigger)
+
+
+def downgrade() -> None:
+    for table in ("group", "list", "task"):
+        for event in ("delete", "update", "insert"):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_version_{event}")
+
+    # Recreating the table in batch mode would break the task counter
+    # triggers, which reference it
+    op.execute('ALTER TABLE "user" DROP COLUMN change_version')
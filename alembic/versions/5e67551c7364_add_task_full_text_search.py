@@ -0,0 +1,52 @@
+"""Add task full-text search
+
+Revision ID: 5e67551c7364
+Revises: 7eb7a29bfeb4
+Create Date: 2026-10-18 17:08:31.472915
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5e67551c7364"
+down_revision: Union[str, None] = "7eb7a29bfeb4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The SQL as of this revision, todoapp.database.search may change later
+STATEMENTS = [
+    "CREATE VIRTUAL TABLE task_fts USING fts5(title, note, content='task', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "INSERT INTO task_fts(task_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+    """CREATE TRIGGER task_fts_insert AFTER INSERT ON task BEGIN
+INSERT INTO task_fts(rowid, title, note) VALUES (NEW.id, NEW.title, NEW.note);
+END""",
+    """CREATE TRIGGER task_fts_update AFTER UPDATE OF title, note ON task BEGIN
+INSERT INTO task_fts(task_fts, rowid, title, note)
+VALUES ('delete', OLD.id, OLD.title, OLD.note);
+INSERT INTO task_fts(rowid, title, note) VALUES (NEW.id, NEW.title, NEW.note);
+END""",
+    """CREATE TRIGGER task_fts_delete AFTER DELETE ON task BEGIN
+INSERT INTO task_fts(task_fts, rowid, title, note)
+VALUES ('delete', OLD.id, OLD.title, OLD.note);
+END""",
+]
+
+REBUILD = "INSERT INTO task_fts(task_fts) VALUES ('rebuild')"
+
+
+def upgrade() -> None:
+    # The FTS5 table and the triggers keeping it in sync with task
+    for statement in STATEMENTS:
+        op.execute(statement)
+
+    op.execute(REBUILD)
+
+
+def downgrade() -> None:
+    for name in ("task_fts_delete", "task_fts_update", "task_fts_insert"):
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+    op.execute("DROP TABLE IF EXISTS task_fts")
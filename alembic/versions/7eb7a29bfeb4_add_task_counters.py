@@ -0,0 +1,130 @@
+"""Add task counters
+
+Revision ID: 7eb7a29bfeb4
+Revises: a5a079055e7a
+Create Date: 2026-10-18 15:42:10.183204
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7eb7a29bfeb4"
+down_revision: Union[str, None] = "a5a079055e7a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The SQL as of this revision, todoapp.database.counters may change later
+TRIGGERS = [
+    """CREATE TRIGGER task_counters_insert AFTER INSERT ON task BEGIN
+UPDATE "user" SET task_count = task_count + 1, completed_count = completed_count + NEW.completed WHERE id = NEW.user_id;
+UPDATE list SET task_count = task_count + 1, completed_count = completed_count + NEW.completed WHERE id = NEW.list_id;
+INSERT INTO user_due_count (user_id, due_date, open_tasks) SELECT NEW.user_id, NEW.due_date, 1 WHERE NEW.user_id IS NOT NULL AND NEW.due_date IS NOT NULL AND NOT NEW.completed ON CONFLICT (user_id, due_date) DO UPDATE SET open_tasks = open_tasks + 1;
+INSERT INTO list_due_count (list_id, due_date, open_tasks) SELECT NEW.list_id, NEW.due_date, 1 WHERE NEW.list_id IS NOT NULL AND NEW.due_date IS NOT NULL AND NOT NEW.completed ON CONFLICT (list_id, due_date) DO UPDATE SET open_tasks = open_tasks + 1;
+END""",
+    """CREATE TRIGGER task_counters_update
+AFTER UPDATE OF user_id, list_id, completed, due_date ON task BEGIN
+UPDATE "user" SET task_count = task_count - 1, completed_count = completed_count - OLD.completed WHERE id = OLD.user_id;
+UPDATE list SET task_count = task_count - 1, completed_count = completed_count - OLD.completed WHERE id = OLD.list_id;
+UPDATE user_due_count SET open_tasks = open_tasks - 1 WHERE user_id = OLD.user_id AND due_date = OLD.due_date AND OLD.user_id IS NOT NULL AND OLD.due_date IS NOT NULL AND NOT OLD.completed;
+DELETE FROM user_due_count WHERE user_id = OLD.user_id AND due_date = OLD.due_date AND open_tasks <= 0;
+UPDATE list_due_count SET open_tasks = open_tasks - 1 WHERE list_id = OLD.list_id AND due_date = OLD.due_date AND OLD.list_id IS NOT NULL AND OLD.due_date IS NOT NULL AND NOT OLD.completed;
+DELETE FROM list_due_count WHERE list_id = OLD.list_id AND due_date = OLD.due_date AND open_tasks <= 0;
+UPDATE "user" SET task_count = task_count + 1, completed_count = completed_count + NEW.completed WHERE id = NEW.user_id;
+UPDATE list SET task_count = task_count + 1, completed_count = completed_count + NEW.completed WHERE id = NEW.list_id;
+INSERT INTO user_due_count (user_id, due_date, open_tasks) SELECT NEW.user_id, NEW.due_date, 1 WHERE NEW.user_id IS NOT NULL AND NEW.due_date IS NOT NULL AND NOT NEW.completed ON CONFLICT (user_id, due_date) DO UPDATE SET open_tasks = open_tasks + 1;
+INSERT INTO list_due_count (list_id, due_date, open_tasks) SELECT NEW.list_id, NEW.due_date, 1 WHERE NEW.list_id IS NOT NULL AND NEW.due_date IS NOT NULL AND NOT NEW.completed ON CONFLICT (list_id, due_date) DO UPDATE SET open_tasks = open_tasks + 1;
+END""",
+    """CREATE TRIGGER task_counters_delete AFTER DELETE ON task BEGIN
+UPDATE "user" SET task_count = task_count - 1, completed_count = completed_count - OLD.completed WHERE id = OLD.user_id;
+UPDATE list SET task_count = task_count - 1, completed_count = completed_count - OLD.completed WHERE id = OLD.list_id;
+UPDATE user_due_count SET open_tasks = open_tasks - 1 WHERE user_id = OLD.user_id AND due_date = OLD.due_date AND OLD.user_id IS NOT NULL AND OLD.due_date IS NOT NULL AND NOT OLD.completed;
+DELETE FROM user_due_count WHERE user_id = OLD.user_id AND due_date = OLD.due_date AND open_tasks <= 0;
+UPDATE list_due_count SET open_tasks = open_tasks - 1 WHERE list_id = OLD.list_id AND due_date = OLD.due_date AND OLD.list_id IS NOT NULL AND OLD.due_date IS NOT NULL AND NOT OLD.completed;
+DELETE FROM list_due_count WHERE list_id = OLD.list_id AND due_date = OLD.due_date AND open_tasks <= 0;
+END""",
+]
+
+REPAIR_STATEMENTS = [
+    """UPDATE list SET
+        task_count = (SELECT count(*) FROM task WHERE list_id = list.id),
+        completed_count = (
+            SELECT count(*) FROM task WHERE list_id = list.id AND completed
+        )""",
+    """UPDATE "user" SET
+        task_count = (SELECT count(*) FROM task WHERE user_id = "user".id),
+        completed_count = (
+            SELECT count(*) FROM task WHERE user_id = "user".id AND completed
+        )""",
+    "DELETE FROM list_due_count",
+    """INSERT INTO list_due_count (list_id, due_date, open_tasks)
+        SELECT list_id, due_date, count(*) FROM task
+        WHERE list_id IS NOT NULL AND due_date IS NOT NULL AND NOT completed
+        GROUP BY list_id, due_date""",
+    "DELETE FROM user_due_count",
+    """INSERT INTO user_due_count (user_id, due_date, open_tasks)
+        SELECT user_id, due_date, count(*) FROM task
+        WHERE due_date IS NOT NULL AND NOT completed
+        GROUP BY user_id, due_date""",
+]
+
+
+def upgrade() -> None:
+    for table in ("list", "user"):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(
+                sa.Column(
+                    "task_count", sa.Integer(), nullable=False, server_default="0"
+                )
+            )
+            batch_op.add_column(
+                sa.Column(
+                    "completed_count", sa.Integer(), nullable=False, server_default="0"
+                )
+            )
+
+    op.create_table(
+        "list_due_count",
+        sa.Column("list_id", sa.Integer(), nullable=False),
+        sa.Column("due_date", sa.Date(), nullable=False),
+        sa.Column("open_tasks", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["list_id"], ["list.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("list_id", "due_date"),
+    )
+    op.create_table(
+        "user_due_count",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("due_date", sa.Date(), nullable=False),
+        sa.Column("open_tasks", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "due_date"),
+    )
+
+    for trigger in TRIGGERS:
+        op.execute(trigger)
+
+    # Count the tasks that already exist
+    for statement in REPAIR_STATEMENTS:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    for name in (
+        "task_counters_delete",
+        "task_counters_update",
+        "task_counters_insert",
+    ):
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+    op.drop_table("user_due_count")
+    op.drop_table("list_due_count")
+
+    for table in ("user", "list"):
+        # Recreating the tables in batch mode would drop their expression
+        # indexes and break the triggers that reference them
+        for column in ("completed_count", "task_count"):
+            op.execute(f'ALTER TABLE "{table}" DROP COLUMN {column}')
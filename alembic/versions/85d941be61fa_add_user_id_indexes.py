@@ -0,0 +1,33 @@
+"""Add user_id indexes
+
+Revision ID: 85d941be61fa
+Revises: 04b19c7c673c
+Create Date: 2026-10-18 09:12:31.482113
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "85d941be61fa"
+down_revision: Union[str, None] = "04b19c7c673c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # SQLite appends the rowid to every index entry, so these also serve
+    # keyset pagination on (user_id, id)
+    op.create_index(op.f("ix_task_user_id"), "task", ["user_id"], unique=False)
+    op.create_index(op.f("ix_list_user_id"), "list", ["user_id"], unique=False)
+    op.create_index(op.f("ix_group_user_id"), "group", ["user_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_group_user_id"), table_name="group")
+    op.drop_index(op.f("ix_list_user_id"), table_name="list")
+    op.drop_index(op.f("ix_task_user_id"), table_name="task")
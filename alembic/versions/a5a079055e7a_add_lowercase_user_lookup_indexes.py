@@ -0,0 +1,30 @@
+"""Add lowercase user lookup indexes
+
+Revision ID: a5a079055e7a
+Revises: c78d0142e1ae
+Create Date: 2026-10-18 13:05:52.617290
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a5a079055e7a"
+down_revision: Union[str, None] = "c78d0142e1ae"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Building the indexes covers the rows that already exist
+    op.create_index("ix_user_lower_email", "user", [sa.text("lower(email)")])
+    op.create_index("ix_user_lower_username", "user", [sa.text("lower(username)")])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_lower_username", table_name="user")
+    op.drop_index("ix_user_lower_email", table_name="user")
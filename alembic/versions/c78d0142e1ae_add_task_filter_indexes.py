@@ -0,0 +1,46 @@
+"""Add task filter indexes
+
+Revision ID: c78d0142e1ae
+Revises: 85d941be61fa
+Create Date: 2026-10-18 11:40:07.905318
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c78d0142e1ae"
+down_revision: Union[str, None] = "85d941be61fa"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_task_user_id_completed_due_date",
+        "task",
+        ["user_id", "completed", "due_date"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_task_user_id_due_date", "task", ["user_id", "due_date"], unique=False
+    )
+    op.create_index(
+        "ix_task_user_id_created_at", "task", ["user_id", "created_at"], unique=False
+    )
+    op.create_index(
+        "ix_task_user_id_updated_at", "task", ["user_id", "updated_at"], unique=False
+    )
+    op.create_index(op.f("ix_task_list_id"), "task", ["list_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_task_list_id"), table_name="task")
+    op.drop_index("ix_task_user_id_updated_at", table_name="task")
+    op.drop_index("ix_task_user_id_created_at", table_name="task")
+    op.drop_index("ix_task_user_id_due_date", table_name="task")
+    op.drop_index("ix_task_user_id_completed_due_date", table_name="task")
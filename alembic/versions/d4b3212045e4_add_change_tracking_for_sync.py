@@ -0,0 +1,124 @@
+"""Add change tracking for sync
+
+Revision ID: d4b3212045e4
+Revises: 06585f9f8cf7
+Create Date: 2026-10-18 19:12:48.301771
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d4b3212045e4"
+down_revision: Union[str, None] = "06585f9f8cf7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("task", "list", "group")
+
+# The SQL as of this revision, todoapp.database.versions may change later
+TRIGGERS = [
+    """CREATE TRIGGER task_version_insert AFTER INSERT ON "task" BEGIN
+UPDATE "user" SET change_version = change_version + 1 WHERE id IN (NEW.user_id);
+UPDATE "task" SET version = (SELECT change_version FROM "user" WHERE id = NEW.user_id) WHERE id = NEW.id;
+END""",
+    """CREATE TRIGGER task_version_update
+AFTER UPDATE OF user_id, list_id, title, note, completed, due_date, created_at, updated_at ON "task" BEGIN
+UPDATE "user" SET change_version = change_version + 1 WHERE id IN (OLD.user_id, NEW.user_id);
+UPDATE "task" SET version = (SELECT change_version FROM "user" WHERE id = NEW.user_id) WHERE id = NEW.id;
+END""",
+    """CREATE TRIGGER task_version_delete AFTER DELETE ON "task" BEGIN
+UPDATE "user" SET change_version = change_version + 1 WHERE id IN (OLD.user_id);
+INSERT INTO tombstone (user_id, version, entity, entity_id) SELECT id, change_version, 'task', OLD.id FROM "user" WHERE id = OLD.user_id;
+END""",
+    """CREATE TRIGGER list_version_insert AFTER INSERT ON "list" BEGIN
+UPDATE "user" SET change_version = change_version + 1 WHERE id IN (NEW.user_id);
+UPDATE "list" SET version = (SELECT change_version FROM "user" WHERE id = NEW.user_id) WHERE id = NEW.id;
+END""",
+    """CREATE TRIGGER list_version_update
+AFTER UPDATE OF user_id, group_id, title, created_at, updated_at ON "list" BEGIN
+UPDATE "user" SET change_version = change_version + 1 WHERE id IN (OLD.user_id, NEW.user_id);
+UPDATE "list" SET version = (SELECT change_version FROM "user" WHERE id = NEW.user_id) WHERE id = NEW.id;
+END""",
+    """CREATE TRIGGER list_version_delete AFTER DELETE ON "list" BEGIN
+UPDATE "user" SET change_version = change_version + 1 WHERE id IN (OLD.user_id);
+INSERT INTO tombstone (user_id, version, entity, entity_id) SELECT id, change_version, 'list', OLD.id FROM "user" WHERE id = OLD.user_id;
+END""",
+    """CREATE TRIGGER group_version_insert AFTER INSERT ON "group" BEGIN
+UPDATE "user" SET change_version = change_version + 1 WHERE id IN (NEW.user_id);
+UPDATE "group" SET version = (SELECT change_version FROM "user" WHERE id = NEW.user_id) WHERE id = NEW.id;
+END""",
+    """CREATE TRIGGER group_version_update
+AFTER UPDATE OF user_id, title, created_at, updated_at ON "group" BEGIN
+UPDATE "user" SET change_version = change_version + 1 WHERE id IN (OLD.user_id, NEW.user_id);
+UPDATE "group" SET version = (SELECT change_version FROM "user" WHERE id = NEW.user_id) WHERE id = NEW.id;
+END""",
+    """CREATE TRIGGER group_version_delete AFTER DELETE ON "group" BEGIN
+UPDATE "user" SET change_version = change_version + 1 WHERE id IN (OLD.user_id);
+INSERT INTO tombstone (user_id, version, entity, entity_id) SELECT id, change_version, 'group', OLD.id FROM "user" WHERE id = OLD.user_id;
+END""",
+]
+
+
+def drop_triggers() -> None:
+    for table in TABLES:
+        for event in ("insert", "update", "delete"):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_version_{event}")
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(
+                sa.Column("version", sa.Integer(), nullable=False, server_default="0")
+            )
+            batch_op.create_index(
+                f"ix_{table}_user_id_version", ["user_id", "version"], unique=False
+            )
+
+    op.create_table(
+        "tombstone",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("entity", sa.String(), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "version"),
+    )
+
+    # The triggers now also stamp rows and record deletions
+    drop_triggers()
+    for trigger in TRIGGERS:
+        op.execute(trigger)
+
+
+def downgrade() -> None:
+    drop_triggers()
+    for table, update in (
+        ("task", "UPDATE"),
+        ("list", "UPDATE OF user_id, group_id, title, created_at, updated_at"),
+        ("group", "UPDATE"),
+    ):
+        for event, trigger_event, users in (
+            ("insert", "INSERT", "NEW.user_id"),
+            ("update", update, "OLD.user_id, NEW.user_id"),
+            ("delete", "DELETE", "OLD.user_id"),
+        ):
+            op.execute(
+                f"CREATE TRIGGER {table}_version_{event} "
+                f'AFTER {trigger_event} ON "{table}" '
+                f'BEGIN UPDATE "user" SET change_version = change_version + 1 '
+                f"WHERE id IN ({users}); END"
+            )
+
+    op.drop_table("tombstone")
+
+    for table in TABLES:
+        op.drop_index(f"ix_{table}_user_id_version", table_name=table)
+        # Recreating the tables in batch mode would break the triggers that
+        # reference them
+        op.execute(f'ALTER TABLE "{table}" DROP COLUMN version')
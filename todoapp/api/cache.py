@@ -0,0 +1,216 @@
+"""Per-user cache of rendered GET responses
+
+Entries are keyed by the user, a generation token of the user and the
+request path and query. A commit that wrote data of a user replaces the
+user's generation, which leaves all of the user's entries unreachable until
+they expire or are evicted, so a write never has to find the entries it
+invalidates.
+
+The backend is pluggable: the in-memory one is private to a worker process,
+so deployments running several workers should share a Redis-protocol server
+through TODOAPP_CACHE_URL, or leave the variable empty to disable caching.
+"""
+
+import secrets
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Protocol
+
+from fastapi import Request, Response, status
+from fastapi.routing import APIRoute
+from fastapi.security.utils import get_authorization_scheme_param
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from todoapp.api.etag import matches
+from todoapp.api.routers.auth import revoked_users
+from todoapp.database.session import pop_changed, pop_deleted
+from todoapp.security.token import decode_token
+
+CACHE_TTL = 60.0  # seconds, also bounds how stale overdue counts get at midnight
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> Optional[bytes]: ...
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+
+class MemoryBackend:
+    """LRU cache of the worker process, bounded by the size of its entries"""
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        # Least recently used first
+        self.entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+
+        self.entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        if key in self.entries:
+            self._remove(key)
+
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self.size += size
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+
+    def _remove(self, key: str) -> None:
+        _, value = self.entries.pop(key)
+        self.size -= len(key) + len(value)
+
+
+class RedisBackend:
+    """Cache shared by all workers, on any server speaking the Redis protocol
+
+    Its memory bound and eviction are the server's, e.g. maxmemory with the
+    allkeys-lru policy.
+    """
+
+    def __init__(self, url: str):
+        # Optional dependency, installed with the "redis" extra
+        from redis.asyncio import Redis
+
+        self.client = Redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(key, value, px=int(ttl * 1000))
+
+
+def create_backend(url: str) -> Optional[CacheBackend]:
+    """Backend for a cache URL, memory:// or redis://, None when it is empty"""
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        return MemoryBackend()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+
+    raise ValueError(f"Unsupported cache URL: {url}")
+
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+
+class ResponseCache:
+    """Caches successful JSON responses per user, disabled without a backend"""
+
+    def __init__(self, backend: Optional[CacheBackend] = None, ttl: float = CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+
+    async def generation(self, user_id: int) -> bytes:
+        # A lost generation, expired or evicted, is replaced by a new one
+        # rather than restarting a counter, so old entries never come back
+        key = f"generation:{user_id}"
+        generation = await self.backend.get(key)
+        if generation is None:
+            generation = await self.invalidate(user_id)
+
+        return generation
+
+    async def invalidate(self, user_id: int) -> bytes:
+        """Drops all cached responses of the user"""
+        generation = secrets.token_hex(8).encode()
+        await self.backend.set(f"generation:{user_id}", generation, self.ttl)
+
+        return generation
+
+    async def respond(self, request: Request, handler: Handler) -> Response:
+        user_id = user_id_of(request) if self.backend is not None else None
+        if user_id is None:
+            return await handler(request)
+
+        generation = (await self.generation(user_id)).decode()
+        url = request.url
+        key = f"response:{user_id}:{generation}:{url.path}?{url.query}"
+
+        entry = await self.backend.get(key)
+        if entry is not None:
+            etag, body = entry.split(b"\n", 1)
+            return cached_response(request, etag.decode(), body)
+
+        response = await handler(request)
+        body = getattr(response, "body", None)
+        if response.status_code == status.HTTP_200_OK and body is not None:
+            etag = response.headers.get("ETag", "")
+            await self.backend.set(key, etag.encode() + b"\n" + body, self.ttl)
+            response.headers["X-Cache"] = "MISS"
+
+        return response
+
+
+def user_id_of(request: Request) -> Optional[int]:
+    """The user of a valid bearer token, the endpoint still authenticates"""
+    scheme, token = get_authorization_scheme_param(request.headers.get("Authorization"))
+    if scheme.lower() != "bearer" or not token:
+        return None
+
+    user_id = decode_token(token).get("user_id")
+    if user_id is None or revoked_users.get(user_id):
+        return None
+
+    return user_id
+
+
+def cached_response(request: Request, etag: str, body: bytes) -> Response:
+    headers = {"X-Cache": "HIT"}
+    if etag:
+        headers["ETag"] = etag
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None and matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(body, media_type="application/json", headers=headers)
+
+
+response_cache = ResponseCache()
+
+
+class CachedRoute(APIRoute):
+    """Serves the GET endpoints of a router from the response cache"""
+
+    def get_route_handler(self) -> Handler:
+        handler = super().get_route_handler()
+        if "GET" not in self.methods:
+            return handler
+
+        async def cached_handler(request: Request) -> Response:
+            return await response_cache.respond(request, handler)
+
+        return cached_handler
+
+
+async def commit(session: AsyncSession) -> None:
+    """Commits the session, then drops the cached responses of the users it
+    changed and revokes the tokens of the users it deleted
+
+    Invalidating only after the commit means a response rendered from the
+    old data can only ever be stored under the old generation.
+    """
+    await session.commit()
+    for user_id in pop_deleted(session):
+        revoked_users.set(user_id, True)
+    changed = pop_changed(session)
+    if response_cache.backend is not None:
+        for user_id in changed:
+            await response_cache.invalidate(user_id)
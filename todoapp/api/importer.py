@@ -0,0 +1,221 @@
+"""Bulk import of groups, lists and tasks from NDJSON and CSV files
+
+Rows are read one at a time, validated with the request models of the single
+create endpoints and inserted in batches, each committed on its own, so an
+import of any size never holds the file or a long transaction.
+"""
+
+import csv
+import io
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple, Type
+
+from fastapi import HTTPException, UploadFile, status
+from pydantic import ValidationError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from todoapp.api.cache import commit
+from todoapp.api.models.group import GroupRequest
+from todoapp.api.models.list import CreateListRequest
+from todoapp.api.models.task import CreateTaskRequest
+from todoapp.api.models.transfer import (
+    ImportCounts,
+    ImportRecord,
+    ImportReport,
+    RowError,
+)
+from todoapp.database.stats import batched_queries
+from todoapp.models import Group, Task, TaskList
+from todoapp.models.base_model import BaseModel
+
+IMPORT_BATCH_SIZE = 1_000
+# Further invalid rows are counted but not reported
+MAX_REPORTED_ERRORS = 1_000
+
+REQUESTS = {
+    "group": GroupRequest,
+    "list": CreateListRequest,
+    "task": CreateTaskRequest,
+}
+
+
+class InvalidRow(Exception):
+    def __init__(self, errors: List[Dict[str, Any]]):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def read_ndjson(text: TextIO) -> Iterator[Tuple[int, Any]]:
+    """Yields (line number, line) for each non-blank line"""
+    for number, line in enumerate(text, start=1):
+        if line.strip():
+            yield number, line
+
+
+def read_csv(text: TextIO) -> Iterator[Tuple[int, Any]]:
+    """Yields (row number, cells) for each row after the header
+
+    Rows are numbered as in a spreadsheet, the header being row 1. Empty
+    cells are left out, so that optional fields keep their defaults.
+    """
+    for number, cells in enumerate(csv.DictReader(text), start=2):
+        yield number, {
+            name: value
+            for name, value in cells.items()
+            if name is not None and value not in (None, "")
+        }
+
+
+def read_rows(file: UploadFile) -> Iterator[Tuple[int, Any]]:
+    """Picks the reader by file extension, or else by content type"""
+    suffix = Path(file.filename or "").suffix.lower()
+    if suffix == ".csv" or (not suffix and file.content_type == "text/csv"):
+        reader = read_csv
+    elif suffix in (".ndjson", ".jsonl") or (
+        not suffix and file.content_type == "application/x-ndjson"
+    ):
+        reader = read_ndjson
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload an NDJSON or CSV file",
+        )
+
+    # Spreadsheet applications often start UTF-8 files with a byte order mark
+    return reader(io.TextIOWrapper(file.file, encoding="utf-8-sig", newline=""))
+
+
+def validate_row(data: Any) -> Tuple[ImportRecord, Dict[str, Any]]:
+    """Returns the kind of the row and the attributes of the record to create"""
+    if isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except ValueError as exc:
+            raise InvalidRow(
+                [{"type": "json_invalid", "loc": [], "msg": f"Invalid JSON: {exc}"}]
+            ) from exc
+
+    try:
+        record = ImportRecord.model_validate(data)
+        request = REQUESTS[record.type].model_validate(data)
+    except ValidationError as exc:
+        raise InvalidRow(
+            exc.errors(include_url=False, include_context=False, include_input=False)
+        ) from exc
+
+    return record, request.model_dump(exclude_none=True)
+
+
+class Importer:
+    """Creates the records of a user in batches, committing each batch
+
+    Groups and lists remember the ID they had in the file, so that later
+    rows can reference them by it.
+    """
+
+    def __init__(
+        self, session: AsyncSession, user_id: int, batch_size: Optional[int] = None
+    ):
+        self.session = session
+        self.user_id = user_id
+        self.batch_size = batch_size or IMPORT_BATCH_SIZE
+        self.created = ImportCounts()
+        self.pending: List[Tuple[ImportRecord, Dict[str, Any]]] = []
+        self.group_ids: Dict[int, int] = {}
+        self.list_ids: Dict[int, int] = {}
+
+    async def add(self, record: ImportRecord, attrs: Dict[str, Any]) -> None:
+        self.pending.append((record, attrs))
+        if len(self.pending) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Inserts the pending rows, parents first, and commits them"""
+        rows = {kind: [] for kind in REQUESTS}
+        for record, attrs in self.pending:
+            rows[record.type].append((record, attrs))
+
+        self.created.groups += await self._create(Group, rows["group"], self.group_ids)
+        await self._resolve(rows["list"], "group_id", Group, self.group_ids)
+        self.created.lists += await self._create(TaskList, rows["list"], self.list_ids)
+        await self._resolve(rows["task"], "list_id", TaskList, self.list_ids)
+        self.created.tasks += await self._create(Task, rows["task"])
+
+        await commit(self.session)
+        self.pending = []
+
+    async def _resolve(
+        self,
+        rows: List[Tuple[ImportRecord, Dict[str, Any]]],
+        key: str,
+        model: Type[BaseModel],
+        imported: Dict[int, int],
+    ) -> None:
+        """Points references at the records created for the file
+
+        Other references must be records of the user, otherwise they are
+        ignored as they are by the single create endpoints.
+        """
+        owned = await model.owned_ids(
+            self.session,
+            self.user_id,
+            (
+                attrs[key]
+                for _, attrs in rows
+                if attrs.get(key) and attrs[key] not in imported
+            ),
+        )
+        for _, attrs in rows:
+            ref = attrs.get(key)
+            if ref in imported:
+                attrs[key] = imported[ref]
+            elif ref not in owned:
+                attrs[key] = None
+
+    async def _create(
+        self,
+        model: Type[BaseModel],
+        rows: List[Tuple[ImportRecord, Dict[str, Any]]],
+        imported: Optional[Dict[int, int]] = None,
+    ) -> int:
+        ids = await model.bulk_create(
+            self.session, [{**attrs, "user_id": self.user_id} for _, attrs in rows]
+        )
+        if imported is not None:
+            for (record, _), new_id in zip(rows, ids):
+                if record.id is not None:
+                    imported[record.id] = new_id
+
+        return len(ids)
+
+
+async def import_rows(
+    session: AsyncSession, user_id: int, rows: Iterator[Tuple[int, Any]]
+) -> ImportReport:
+    """Imports the valid rows and reports the invalid ones by row number"""
+    importer = Importer(session, user_id)
+    report = ImportReport(created=importer.created, failed=0, errors=[])
+
+    def fail(number: int, errors: List[Dict[str, Any]]) -> None:
+        report.failed += 1
+        if len(report.errors) < MAX_REPORTED_ERRORS:
+            report.errors.append(RowError(row=number, errors=errors))
+
+    number = 0
+    with batched_queries():
+        try:
+            for number, data in rows:
+                try:
+                    record, attrs = validate_row(data)
+                except InvalidRow as exc:
+                    fail(number, exc.errors)
+                else:
+                    await importer.add(record, attrs)
+        except UnicodeDecodeError as exc:
+            # The rest of the file cannot be read
+            fail(number + 1, [{"type": "unicode_decode", "loc": [], "msg": str(exc)}])
+
+        await importer.flush()
+
+    return report
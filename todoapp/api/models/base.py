@@ -0,0 +1,17 @@
+from datetime import datetime
+from typing import Annotated
+
+from pydantic import BaseModel, ConfigDict, PlainSerializer
+
+# Rendered like str(datetime), the format the API has always returned
+Timestamp = Annotated[datetime, PlainSerializer(str, return_type=str)]
+
+
+class ReadModel(BaseModel):
+    """Base of response schemas, read straight from ORM objects
+
+    Declared as the response_model of an endpoint, the schema validates the
+    returned records and renders them to JSON in a single pass.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
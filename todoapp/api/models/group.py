@@ -2,6 +2,40 @@ from typing import Optional
 
 from pydantic import BaseModel, Field
 
+from todoapp.api.models.base import ReadModel
+from todoapp.api.models.task import MAX_BULK_SIZE, TaskCounts, TaskListRef
+
 
 class GroupRequest(BaseModel):
     title: Optional[str] = Field(min_length=3, max_length=50)
+
+
+class GroupSelection(BaseModel):
+    """Groups targeted by a bulk operation"""
+
+    ids: list[int] = Field(min_length=1, max_length=MAX_BULK_SIZE)
+
+
+class GroupRef(ReadModel):
+    id: int
+    title: str
+
+
+class GroupRead(GroupRef):
+    task_lists: list[TaskListRef]
+
+
+class GroupSummary(GroupRef, TaskCounts):
+    pass
+
+
+class GroupPage(ReadModel):
+    groups: list[GroupRead]
+    limit: int
+    next_cursor: Optional[str]
+
+
+class GroupSummaryPage(ReadModel):
+    groups: list[GroupSummary]
+    limit: int
+    next_cursor: Optional[str]
@@ -1,6 +1,15 @@
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+from todoapp.api.models.base import ReadModel
+from todoapp.api.models.group import GroupRef
+from todoapp.api.models.task import (
+    MAX_BULK_SIZE,
+    ListTaskRead,
+    TaskCounts,
+    TaskListRef,
+)
 
 
 class CreateListRequest(BaseModel):
@@ -11,3 +20,41 @@ class CreateListRequest(BaseModel):
 class UpdateListRequest(BaseModel):
     title: Optional[str] = Field(default=None, min_length=3, max_length=50)
     group_id: Optional[int] = None
+
+
+class ListSelection(BaseModel):
+    """Lists targeted by a bulk operation, by IDs and/or filters"""
+
+    ids: Optional[list[int]] = Field(
+        default=None, min_length=1, max_length=MAX_BULK_SIZE
+    )
+    group_id: Optional[int] = None
+
+    @model_validator(mode="after")
+    def validate_not_empty(self):
+        """Refuses to target every list of the user by accident"""
+        if self.ids is None and self.group_id is None:
+            raise ValueError("Select lists by ids or at least one filter.")
+
+        return self
+
+
+class TaskListRead(TaskListRef):
+    tasks: list[ListTaskRead]
+    group: Optional[GroupRef]
+
+
+class TaskListSummary(TaskListRef, TaskCounts):
+    group: Optional[GroupRef]
+
+
+class TaskListPage(ReadModel):
+    lists: list[TaskListRead]
+    limit: int
+    next_cursor: Optional[str]
+
+
+class TaskListSummaryPage(ReadModel):
+    lists: list[TaskListSummary]
+    limit: int
+    next_cursor: Optional[str]
@@ -1,7 +1,11 @@
-from datetime import datetime
-from typing import Any, Optional
+from datetime import date, datetime
+from typing import Any, Literal, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from todoapp.api.models.base import ReadModel, Timestamp
+from todoapp.api.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 
 class DueDateValidatorMixin:
@@ -27,9 +31,150 @@ class CreateTaskRequest(BaseModel, DueDateValidatorMixin):
     list_id: Optional[int] = None
 
 
+MAX_BULK_SIZE = 5_000
+
+
+class BulkCreateTaskRequest(BaseModel):
+    tasks: list[CreateTaskRequest] = Field(min_length=1, max_length=MAX_BULK_SIZE)
+
+
+class TaskSelection(BaseModel):
+    """Tasks targeted by a bulk operation, by IDs and/or filters"""
+
+    ids: Optional[list[int]] = Field(
+        default=None, min_length=1, max_length=MAX_BULK_SIZE
+    )
+    completed: Optional[bool] = None
+    list_id: Optional[int] = None
+    due_before: Optional[date] = None
+
+    @model_validator(mode="after")
+    def validate_not_empty(self):
+        """Refuses to target every task of the user by accident"""
+        if all(value is None for value in self.model_dump().values()):
+            raise ValueError("Select tasks by ids or at least one filter.")
+
+        return self
+
+
+class BulkTaskChanges(BaseModel, DueDateValidatorMixin):
+    due_date: Optional[str] = None
+    completed: Optional[bool] = None
+    list_id: Optional[int] = None
+
+    @field_validator("completed")
+    @classmethod
+    def validate_completed(cls, value: Optional[bool]):
+        """Refuses an explicit null, completed cannot be cleared"""
+        if value is None:
+            raise ValueError("completed cannot be null.")
+
+        return value
+
+    @model_validator(mode="after")
+    def validate_not_empty(self):
+        """Ensures that there is something to change"""
+        if not self.model_fields_set:
+            raise ValueError("Provide at least one change.")
+
+        return self
+
+
+class BulkUpdateTaskRequest(BaseModel):
+    where: TaskSelection
+    changes: BulkTaskChanges
+
+
 class UpdateTaskRequest(BaseModel, DueDateValidatorMixin):
     title: Optional[str] = Field(default=None, min_length=3, max_length=255)
     note: Optional[str] = Field(default="", max_length=1_000)
     due_date: Optional[str] = None
     completed: Optional[bool] = None
     list_id: Optional[int] = None
+
+
+TaskSort = Literal[
+    "id",
+    "-id",
+    "due_date",
+    "-due_date",
+    "created_at",
+    "-created_at",
+    "updated_at",
+    "-updated_at",
+]
+
+
+class TaskFilters(BaseModel):
+    """Query parameters narrowing down and ordering the task list"""
+
+    completed: Optional[bool] = None
+    list_id: Optional[int] = None
+    due_from: Optional[date] = None
+    due_to: Optional[date] = None
+    sort: TaskSort = "id"
+
+
+class AgendaParams(BaseModel):
+    """Query parameters of the agenda"""
+
+    tz: str = "UTC"
+    days: int = Field(default=7, ge=1, le=90)
+    limit: int = Field(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+
+    @field_validator("tz")
+    @classmethod
+    def validate_tz(cls, value: str) -> str:
+        """Ensures that tz is a known IANA timezone"""
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError) as exc:
+            raise ValueError("Unknown timezone.") from exc
+
+        return value
+
+
+class TaskListRef(ReadModel):
+    id: int
+    title: str
+
+
+class ListTaskRead(ReadModel):
+    """Task as shown within its list"""
+
+    id: int
+    title: str
+    note: str
+    completed: bool
+    created_at: Timestamp
+    updated_at: Timestamp
+
+
+class TaskRead(ListTaskRead):
+    task_list: Optional[TaskListRef]
+
+
+class TaskPage(ReadModel):
+    tasks: list[TaskRead]
+    limit: int
+    next_cursor: Optional[str]
+
+
+class TaskCounts(ReadModel):
+    total_tasks: int
+    completed_tasks: int
+    overdue_tasks: int
+
+
+class AgendaDay(ReadModel):
+    date: date
+    tasks: list[TaskRead]
+
+
+class Agenda(ReadModel):
+    date: date
+    tz: str
+    limit: int
+    overdue: list[AgendaDay]
+    today: list[AgendaDay]
+    upcoming: list[AgendaDay]
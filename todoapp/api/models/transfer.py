@@ -0,0 +1,81 @@
+from datetime import date
+from typing import Any, Literal, Optional
+
+from pydantic import BaseModel
+
+from todoapp.api.models.base import ReadModel, Timestamp
+
+
+class ExportRecord(ReadModel):
+    """One line of an export, read from a row of the record's table"""
+
+    id: int
+    title: str
+    created_at: Timestamp
+    updated_at: Timestamp
+
+    @classmethod
+    def columns(cls) -> list[str]:
+        """Columns selected to build the record"""
+        return [name for name in cls.model_fields if name != "type"]
+
+
+class GroupExport(ExportRecord):
+    type: Literal["group"] = "group"
+
+
+class TaskListExport(ExportRecord):
+    type: Literal["list"] = "list"
+    group_id: Optional[int]
+
+
+class TaskExport(ExportRecord):
+    type: Literal["task"] = "task"
+    list_id: Optional[int]
+    note: str
+    completed: bool
+    due_date: Optional[date]
+
+
+class ImportRecord(BaseModel):
+    """Kind of an imported row, validated before the row itself
+
+    `id` is only used to reference the group or list from later rows of the
+    same file, the record gets a new ID.
+    """
+
+    type: Literal["group", "list", "task"] = "task"
+    id: Optional[int] = None
+
+
+class RowError(BaseModel):
+    row: int
+    errors: list[dict[str, Any]]
+
+
+class ImportCounts(BaseModel):
+    groups: int = 0
+    lists: int = 0
+    tasks: int = 0
+
+
+class ImportReport(BaseModel):
+    created: ImportCounts
+    failed: int
+    errors: list[RowError]
+
+
+class Deleted(BaseModel):
+    groups: list[int] = []
+    lists: list[int] = []
+    tasks: list[int] = []
+
+
+class SyncChanges(BaseModel):
+    """Records changed and deleted after the cursor a client last got"""
+
+    cursor: int
+    groups: list[GroupExport]
+    lists: list[TaskListExport]
+    tasks: list[TaskExport]
+    deleted: Deleted
@@ -0,0 +1,135 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Annotated, Any, Optional, Tuple, Type, get_args
+
+from fastapi import Depends, HTTPException, Query, status
+from sqlmodel import SQLModel
+
+from todoapp.database.base import SQLITE_MAX_INTEGER
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def invalid_cursor() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+    )
+
+
+def fits_integer(value: Any) -> bool:
+    """Whether a value can be bound, ints must fit a 64-bit SQLite INTEGER"""
+    return not isinstance(value, int) or abs(value) <= SQLITE_MAX_INTEGER
+
+
+@dataclass
+class Page:
+    """Keyset pagination parameters of a request"""
+
+    limit: int
+    cursor: Optional[dict] = None
+
+    def after(self, model: Type[SQLModel], sort: str = "id") -> Optional[Tuple]:
+        """Returns the (sort key, ID) position the cursor points at"""
+        if self.cursor is None:
+            return None
+
+        obj_id = self.cursor.get("id")
+        if (
+            not isinstance(obj_id, int)
+            or not fits_integer(obj_id)
+            or self.cursor.get("sort", "id") != sort
+        ):
+            raise invalid_cursor()
+
+        field = sort.lstrip("-")
+        if field == "id":
+            return obj_id, obj_id
+
+        key = self.cursor.get("key")
+        if not fits_integer(key):
+            raise invalid_cursor()
+
+        if field not in model.model_fields:
+            # Computed sort keys, like search ranks, are numbers
+            if not isinstance(key, (int, float)):
+                raise invalid_cursor()
+            return key, obj_id
+
+        annotation = model.model_fields[field].annotation
+        python_type = next(
+            (
+                t
+                for t in (datetime, date)
+                if t in (get_args(annotation) or [annotation])
+            ),
+            None,
+        )
+        if key is not None and python_type is not None:
+            try:
+                key = python_type.fromisoformat(key)
+            except (TypeError, ValueError) as exc:
+                raise invalid_cursor() from exc
+
+        return key, obj_id
+
+    def response(
+        self,
+        key: str,
+        items: list,
+        last: Optional[SQLModel],
+        sort: str = "id",
+        last_key: Any = None,
+    ) -> dict:
+        """Builds a paginated response body
+
+        `last_key` is the sort key of `last` when it is computed by the query
+        rather than stored on the record.
+        """
+        return {
+            key: items,
+            "limit": self.limit,
+            "next_cursor": (
+                encode_cursor(last, sort, last_key) if last is not None else None
+            ),
+        }
+
+
+def encode_cursor(obj: SQLModel, sort: str = "id", key: Any = None) -> str:
+    """Encodes the position of the last returned record into an opaque cursor"""
+    payload: dict[str, Any] = {"id": obj.id}
+    if sort != "id":
+        if key is None:
+            key = getattr(obj, sort.lstrip("-"))
+        payload["sort"] = sort
+        payload["key"] = key.isoformat() if isinstance(key, date) else key
+
+    data = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Decodes a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError) as exc:
+        raise invalid_cursor() from exc
+
+    if not isinstance(payload, dict):
+        raise invalid_cursor()
+
+    return payload
+
+
+def get_page(
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> Page:
+    return Page(limit=limit, cursor=decode_cursor(cursor) if cursor else None)
+
+
+PageDependency = Annotated[Page, Depends(get_page)]
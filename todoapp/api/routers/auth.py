@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -6,45 +7,71 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from todoapp.api.models.auth import RegisterRequest
 from todoapp.database.session import SessionDep
 from todoapp.models.user import User
+from todoapp.security.cache import TTLCache
 from todoapp.security.password import verify_password
-from todoapp.security.token import decode_token, encode_token
+from todoapp.security.token import TOKEN_LIFETIME, decode_token, encode_token
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 
-async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)], session: SessionDep
-):
+REVOKED_USERS_SIZE = 100_000
+
+# Users deleted by this process, whose tokens stay valid until they expire
+revoked_users: TTLCache[int, bool] = TTLCache(
+    REVOKED_USERS_SIZE, TOKEN_LIFETIME.total_seconds()
+)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user, as described by the verified token claims"""
+
+    id: int
+    email: str
+
+
+def invalid_credentials() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+    )
+
+
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> Principal:
+    """Authenticates the request from the token alone, without a query
+
+    Tokens of users deleted by this process are refused. A user deleted by
+    another process is noticed by the first query that reads the user row.
+    """
     payload = decode_token(token)
-    if payload == {}:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-        )
-    return session.get(User, payload.get("user_id"))
+    user_id = payload.get("user_id")
+    if user_id is None or revoked_users.get(user_id):
+        raise invalid_credentials()
+
+    return Principal(id=user_id, email=payload.get("sub"))
 
 
-UserDependency = Annotated[User, Depends(get_current_user)]
+UserDependency = Annotated[Principal, Depends(get_current_user)]
 
 
 @router.post("/register", status_code=status.HTTP_201_CREATED)
 async def register_user(request: RegisterRequest, session: SessionDep):
     """Creates and new user with provided credentials"""
-    if User.find_by_email(session, request.email) is not None:
+    if await User.find_by_email(session, request.email) is not None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="A user with this email already exists.",
         )
 
-    if User.find_by_username(session, request.username) is not None:
+    if await User.find_by_username(session, request.username) is not None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="A user with this username already exists.",
         )
 
-    user = User.create_by(
+    user = await User.create_by(
         session,
         email=request.email,
         username=request.username,
@@ -61,7 +88,7 @@ async def create_token(
 ):
     email_or_username = form_data.username
     password = form_data.password
-    user = User.find_by_email_or_username(session, email_or_username)
+    user = await User.find_by_email_or_username(session, email_or_username)
 
     if user is None or not verify_password(password, user.hashed_password):
         raise HTTPException(
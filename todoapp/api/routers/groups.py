@@ -1,23 +1,60 @@
-from fastapi import APIRouter, HTTPException, status
-
-from todoapp.api.models.group import GroupRequest
+from typing import Union
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from todoapp.api.cache import CachedRoute
+from todoapp.api.etag import check_etag
+from todoapp.api.models.group import (
+    GroupPage,
+    GroupRead,
+    GroupRequest,
+    GroupSelection,
+    GroupSummaryPage,
+)
+from todoapp.api.pagination import PageDependency
 from todoapp.api.routers.auth import UserDependency
 from todoapp.database.session import SessionDep
-from todoapp.models import Group
-
-router = APIRouter(prefix="/groups", tags=["groups"])
-
-
-@router.get("/", status_code=status.HTTP_200_OK)
-async def read_groups(current_user: UserDependency, session: SessionDep):
-    groups = Group.all(session, user_id=current_user.id)
+from todoapp.models import Group, TaskList
 
-    return {"groups": groups}
+router = APIRouter(prefix="/groups", tags=["groups"], route_class=CachedRoute)
 
 
-@router.get("/{group_id}", status_code=status.HTTP_200_OK)
+@router.get(
+    "/",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(check_etag)],
+    # The handler returns the page schema of its mode, which is taken as is
+    response_model=Union[GroupPage, GroupSummaryPage],
+)
+async def read_groups(
+    current_user: UserDependency,
+    session: SessionDep,
+    page: PageDependency,
+    summary: bool = False,
+):
+    """Groups with their lists, or with task counts only in summary mode"""
+    if not summary:
+        groups, last = await Group.page(
+            session, page.limit, page.after(Group), user_id=current_user.id
+        )
+        return GroupPage.model_validate(page.response("groups", groups, last))
+
+    groups, last = await Group.page(
+        session, page.limit, page.after(Group), load=(), user_id=current_user.id
+    )
+    counts = await TaskList.counts_per_group(
+        session, current_user.id, [group.id for group in groups]
+    )
+    summaries = [
+        {"id": group.id, "title": group.title, **counts[group.id]} for group in groups
+    ]
+
+    return GroupSummaryPage.model_validate(page.response("groups", summaries, last))
+
+
+@router.get("/{group_id}", status_code=status.HTTP_200_OK, response_model=GroupRead)
 async def read_group(current_user: UserDependency, session: SessionDep, group_id: int):
-    group = Group.find_by(session, user_id=current_user.id, obj_id=group_id)
+    group = await Group.find_by(session, user_id=current_user.id, obj_id=group_id)
 
     if group is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
@@ -25,29 +62,40 @@ async def read_group(current_user: UserDependency, session: SessionDep, group_id
     return group
 
 
-@router.post("/", status_code=status.HTTP_201_CREATED)
+@router.post("/", status_code=status.HTTP_201_CREATED, response_model=GroupRead)
 async def create_group(
     current_user: UserDependency, session: SessionDep, request: GroupRequest
 ):
-    group = Group.create_by(session, title=request.title, user_id=current_user.id)
+    group = await Group.create_by(session, title=request.title, user_id=current_user.id)
 
     return group
 
 
-@router.patch("/{group_id}", status_code=status.HTTP_200_OK)
+@router.delete("/bulk", status_code=status.HTTP_200_OK)
+async def bulk_delete_groups(
+    current_user: UserDependency, session: SessionDep, request: GroupSelection
+):
+    deleted = await Group.delete_where(
+        session, current_user.id, [Group.id.in_(request.ids)]
+    )
+
+    return {"deleted": deleted}
+
+
+@router.patch("/{group_id}", status_code=status.HTTP_200_OK, response_model=GroupRead)
 async def update_group(
     current_user: UserDependency,
     session: SessionDep,
     request: GroupRequest,
     group_id: int,
 ):
-    group = Group.find_by(session, user_id=current_user.id, obj_id=group_id)
+    attrs = request.model_dump(exclude_unset=True)
+    group = await Group.update_by(
+        session, obj_id=group_id, user_id=current_user.id, **attrs
+    )
     if group is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
 
-    attrs = request.model_dump(exclude_unset=True)
-    group = group.update(session, **attrs)
-
     return group
 
 
@@ -55,9 +103,11 @@ async def update_group(
 async def delete_group(
     current_user: UserDependency, session: SessionDep, group_id: int
 ):
-    group = Group.find_by(session, user_id=current_user.id, obj_id=group_id)
+    group = await Group.find_by(
+        session, user_id=current_user.id, obj_id=group_id, load=()
+    )
 
     if group is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
 
-    group.destroy(session)
+    await group.destroy(session)
@@ -1,23 +1,71 @@
-from fastapi import APIRouter, HTTPException, status
-
-from todoapp.api.models.list import CreateListRequest, UpdateListRequest
+from typing import Union
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from todoapp.api.cache import CachedRoute
+from todoapp.api.etag import check_etag
+from todoapp.api.models.list import (
+    CreateListRequest,
+    ListSelection,
+    TaskListPage,
+    TaskListRead,
+    TaskListSummaryPage,
+    UpdateListRequest,
+)
+from todoapp.api.pagination import PageDependency
 from todoapp.api.routers.auth import UserDependency
 from todoapp.database.session import SessionDep
-from todoapp.models import TaskList, Group
-
-router = APIRouter(prefix="/lists", tags=["lists"])
-
+from todoapp.models import Group, ListDueCount, TaskList
 
-@router.get("/", status_code=status.HTTP_200_OK)
-async def read_lists(current_user: UserDependency, session: SessionDep):
-    lists = TaskList.all(session, user_id=current_user.id)
+router = APIRouter(prefix="/lists", tags=["lists"], route_class=CachedRoute)
 
-    return {"lists": lists}
 
-
-@router.get("/{list_id}", status_code=status.HTTP_200_OK)
+@router.get(
+    "/",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(check_etag)],
+    # The handler returns the page schema of its mode, which is taken as is
+    response_model=Union[TaskListPage, TaskListSummaryPage],
+)
+async def read_lists(
+    current_user: UserDependency,
+    session: SessionDep,
+    page: PageDependency,
+    summary: bool = False,
+):
+    """Lists with their tasks, or with task counts only in summary mode"""
+    if not summary:
+        lists, last = await TaskList.page(
+            session, page.limit, page.after(TaskList), user_id=current_user.id
+        )
+        return TaskListPage.model_validate(page.response("lists", lists, last))
+
+    lists, last = await TaskList.page(
+        session,
+        page.limit,
+        page.after(TaskList),
+        load=("group",),
+        user_id=current_user.id,
+    )
+    overdue = await ListDueCount.overdue(session, [lst.id for lst in lists])
+    summaries = [
+        {
+            "id": lst.id,
+            "title": lst.title,
+            "group": lst.group,
+            "total_tasks": lst.task_count,
+            "completed_tasks": lst.completed_count,
+            "overdue_tasks": overdue.get(lst.id, 0),
+        }
+        for lst in lists
+    ]
+
+    return TaskListSummaryPage.model_validate(page.response("lists", summaries, last))
+
+
+@router.get("/{list_id}", status_code=status.HTTP_200_OK, response_model=TaskListRead)
 async def read_list(current_user: UserDependency, session: SessionDep, list_id: int):
-    lst = TaskList.find_by(session, user_id=current_user.id, obj_id=list_id)
+    lst = await TaskList.find_by(session, user_id=current_user.id, obj_id=list_id)
 
     if lst is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
@@ -25,41 +73,61 @@ async def read_list(current_user: UserDependency, session: SessionDep, list_id:
     return lst
 
 
-@router.post("/", status_code=status.HTTP_201_CREATED)
+@router.post("/", status_code=status.HTTP_201_CREATED, response_model=TaskListRead)
 async def create_list(
     current_user: UserDependency, session: SessionDep, request: CreateListRequest
 ):
     attrs = request.model_dump(exclude_unset=True)
     group = None
     if group_id := attrs.pop("group_id", None):
-        group = Group.find_by(session, user_id=current_user.id, obj_id=group_id)
+        group = await Group.find_by(
+            session, user_id=current_user.id, obj_id=group_id, load=()
+        )
 
-    return TaskList.create_by(session, user_id=current_user.id, group=group, **attrs)
+    return await TaskList.create_by(
+        session, user_id=current_user.id, group=group, **attrs
+    )
 
 
-@router.patch("/{list_id}", status_code=status.HTTP_200_OK)
+@router.delete("/bulk", status_code=status.HTTP_200_OK)
+async def bulk_delete_lists(
+    current_user: UserDependency, session: SessionDep, request: ListSelection
+):
+    deleted = await TaskList.delete_where(
+        session, current_user.id, TaskList.conditions(**request.model_dump())
+    )
+
+    return {"deleted": deleted}
+
+
+@router.patch("/{list_id}", status_code=status.HTTP_200_OK, response_model=TaskListRead)
 async def update_list(
     current_user: UserDependency,
     session: SessionDep,
     request: UpdateListRequest,
     list_id: int,
 ):
-    lst = TaskList.find_by(session, user_id=current_user.id, obj_id=list_id)
+    attrs = request.model_dump(exclude_unset=True)
+    group_id = None
+    if requested_group_id := attrs.pop("group_id", None):
+        # Groups of other users are ignored, resolved within the UPDATE
+        group_id = Group.owned_id(current_user.id, requested_group_id)
+
+    lst = await TaskList.update_by(
+        session, obj_id=list_id, user_id=current_user.id, group_id=group_id, **attrs
+    )
     if lst is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
 
-    attrs = request.model_dump(exclude_unset=True)
-    group = None
-    if group_id := attrs.pop("group_id", None):
-        group = Group.find_by(session, obj_id=group_id, user_id=current_user.id)
-
-    return lst.update(session, group=group, **attrs)
+    return lst
 
 
 @router.delete("/{list_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_list(current_user: UserDependency, session: SessionDep, list_id: int):
-    lst = TaskList.find_by(session, user_id=current_user.id, obj_id=list_id)
+    lst = await TaskList.find_by(
+        session, user_id=current_user.id, obj_id=list_id, load=()
+    )
     if lst is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
 
-    lst.destroy(session)
+    await lst.destroy(session)
@@ -0,0 +1,54 @@
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Query, status
+
+from todoapp.api.models.transfer import (
+    GroupExport,
+    SyncChanges,
+    TaskExport,
+    TaskListExport,
+)
+from todoapp.api.routers.auth import UserDependency, invalid_credentials
+from todoapp.database.base import SQLITE_MAX_INTEGER
+from todoapp.database.session import SessionDep
+from todoapp.models import Group, Task, TaskList, Tombstone, User
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+
+@router.get("/", status_code=status.HTTP_200_OK, response_model=SyncChanges)
+async def sync(
+    current_user: UserDependency,
+    session: SessionDep,
+    since: Annotated[Optional[int], Query(ge=0, le=SQLITE_MAX_INTEGER)] = None,
+):
+    """Groups, lists and tasks changed or deleted after the `since` cursor
+
+    Without a cursor, all records are returned. The returned cursor is
+    passed as `since` on the next call. All reads run in one transaction of
+    the read-only pool, which begins explicitly and so sees a single
+    snapshot: a change is either in this response or after the cursor.
+    """
+    cursor = await User.change_version_of(session, current_user.id)
+    if cursor is None:
+        raise invalid_credentials()
+
+    changes = {"cursor": cursor, "deleted": {}}
+    for key, model, schema in (
+        ("groups", Group, GroupExport),
+        ("lists", TaskList, TaskListExport),
+        ("tasks", Task, TaskExport),
+    ):
+        changes[key] = await model.changed_since(
+            session, current_user.id, since, schema.columns()
+        )
+
+    if since is not None:
+        deleted = await Tombstone.deleted_since(session, current_user.id, since)
+        changes["deleted"] = {
+            "groups": deleted.get("group", []),
+            "lists": deleted.get("list", []),
+            "tasks": deleted.get("task", []),
+        }
+
+    return changes
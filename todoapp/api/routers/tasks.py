@@ -1,23 +1,128 @@
-from fastapi import APIRouter, HTTPException, status
-
-from todoapp.api.models.task import CreateTaskRequest, UpdateTaskRequest
-from todoapp.api.routers.auth import UserDependency
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Annotated
+from zoneinfo import ZoneInfo
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from todoapp.api.cache import CachedRoute
+from todoapp.api.etag import check_etag
+from todoapp.api.models.task import (
+    Agenda,
+    AgendaParams,
+    BulkCreateTaskRequest,
+    BulkUpdateTaskRequest,
+    CreateTaskRequest,
+    TaskCounts,
+    TaskFilters,
+    TaskPage,
+    TaskRead,
+    TaskSelection,
+    UpdateTaskRequest,
+)
+from todoapp.api.pagination import PageDependency
+from todoapp.api.routers.auth import UserDependency, invalid_credentials
 from todoapp.database.session import SessionDep
-from todoapp.models import Task, TaskList
+from todoapp.models import Task, TaskList, User, UserDueCount
+
+router = APIRouter(prefix="/tasks", tags=["tasks"], route_class=CachedRoute)
+
+
+@router.get(
+    "/",
+    status_code=status.HTTP_200_OK,
+    response_model=TaskPage,
+    dependencies=[Depends(check_etag)],
+)
+async def read_tasks(
+    current_user: UserDependency,
+    session: SessionDep,
+    page: PageDependency,
+    filters: Annotated[TaskFilters, Query()],
+):
+    tasks, last = await Task.page(
+        session,
+        page.limit,
+        page.after(Task, filters.sort),
+        sort=filters.sort,
+        where=Task.conditions(**filters.model_dump(exclude={"sort"})),
+        user_id=current_user.id,
+    )
+
+    return page.response("tasks", tasks, last, filters.sort)
+
+
+@router.get("/agenda", status_code=status.HTTP_200_OK, response_model=Agenda)
+async def read_agenda(
+    current_user: UserDependency,
+    session: SessionDep,
+    params: Annotated[AgendaParams, Query()],
+):
+    """Incomplete tasks that are overdue, due today and due in the next days
+
+    Dates are in the client's timezone and each bucket returns at most
+    `limit` tasks, grouped by due date.
+    """
+    today = datetime.now(ZoneInfo(params.tz)).date()
+    tomorrow = today + timedelta(days=1)
+    buckets = {
+        "overdue": (None, today),
+        "today": (today, tomorrow),
+        "upcoming": (tomorrow, tomorrow + timedelta(days=params.days)),
+    }
+
+    agenda: dict = {"date": today, "tz": params.tz, "limit": params.limit}
+    for name, (due_from, due_before) in buckets.items():
+        tasks, _last = await Task.page(
+            session,
+            params.limit,
+            sort="due_date",
+            where=Task.conditions(
+                completed=False, due_from=due_from, due_before=due_before
+            ),
+            user_id=current_user.id,
+        )
+        agenda[name] = [
+            {"date": due_date, "tasks": list(group)}
+            for due_date, group in groupby(tasks, key=lambda task: task.due_date)
+        ]
+
+    return agenda
+
+
+@router.get("/search", status_code=status.HTTP_200_OK, response_model=TaskPage)
+async def search_tasks(
+    current_user: UserDependency,
+    session: SessionDep,
+    page: PageDependency,
+    q: Annotated[str, Query(min_length=1, max_length=255)],
+):
+    """Full-text search over titles and notes, a trailing * matches prefixes"""
+    tasks, last = await Task.search(
+        session, current_user.id, q, page.limit, page.after(Task, "rank")
+    )
+    last_task, last_rank = last or (None, None)
 
-router = APIRouter(prefix="/tasks", tags=["tasks"])
+    return page.response("tasks", tasks, last_task, "rank", last_rank)
 
 
-@router.get("/", status_code=status.HTTP_200_OK)
-async def read_tasks(current_user: UserDependency, session: SessionDep):
-    tasks = Task.all(session, user_id=current_user.id)
+@router.get("/summary", status_code=status.HTTP_200_OK, response_model=TaskCounts)
+async def read_tasks_summary(current_user: UserDependency, session: SessionDep):
+    """Task counts of the current user, read from maintained counters"""
+    counts = await User.task_counts_of(session, current_user.id)
+    if counts is None:
+        raise invalid_credentials()
 
-    return {"tasks": tasks}
+    return {
+        "total_tasks": counts.task_count,
+        "completed_tasks": counts.completed_count,
+        "overdue_tasks": await UserDueCount.overdue(session, current_user.id),
+    }
 
 
-@router.get("/{task_id}", status_code=status.HTTP_200_OK, response_model=Task)
+@router.get("/{task_id}", status_code=status.HTTP_200_OK, response_model=TaskRead)
 async def read_task(current_user: UserDependency, session: SessionDep, task_id: int):
-    task = Task.find_by(session, obj_id=task_id, user_id=current_user.id)
+    task = await Task.find_by(session, obj_id=task_id, user_id=current_user.id)
 
     if task is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
@@ -25,43 +130,104 @@ async def read_task(current_user: UserDependency, session: SessionDep, task_id:
     return task
 
 
-@router.post("/", status_code=status.HTTP_201_CREATED, response_model=Task)
+@router.post("/", status_code=status.HTTP_201_CREATED, response_model=TaskRead)
 async def create_task(
     current_user: UserDependency, session: SessionDep, request: CreateTaskRequest
 ):
     attrs = request.model_dump(exclude_unset=True)
     task_list = None
     if list_id := attrs.pop("list_id", None):
-        task_list = TaskList.find_by(session, user_id=current_user.id, obj_id=list_id)
+        task_list = await TaskList.find_by(
+            session, user_id=current_user.id, obj_id=list_id, load=()
+        )
 
-    return Task.create_by(
+    return await Task.create_by(
         session, user_id=current_user.id, task_list=task_list, **attrs
     )
 
 
-@router.patch("/{task_id}", status_code=status.HTTP_200_OK, response_model=Task)
+@router.post("/bulk", status_code=status.HTTP_201_CREATED)
+async def bulk_create_tasks(
+    current_user: UserDependency, session: SessionDep, request: BulkCreateTaskRequest
+):
+    # Nulls take the column defaults, as they do in a single create
+    items = [
+        task.model_dump(exclude_unset=True, exclude_none=True) for task in request.tasks
+    ]
+    list_ids = await TaskList.owned_ids(
+        session,
+        current_user.id,
+        (attrs["list_id"] for attrs in items if attrs.get("list_id")),
+    )
+
+    rows = []
+    for attrs in items:
+        # Same as a single create: lists of other users are ignored
+        if attrs.get("list_id") not in list_ids:
+            attrs["list_id"] = None
+        rows.append({**attrs, "user_id": current_user.id})
+
+    return {"ids": await Task.bulk_create(session, rows)}
+
+
+@router.patch("/bulk", status_code=status.HTTP_200_OK)
+async def bulk_update_tasks(
+    current_user: UserDependency, session: SessionDep, request: BulkUpdateTaskRequest
+):
+    changes = request.changes.model_dump(exclude_unset=True)
+    list_id = changes.get("list_id")
+    if list_id is not None and not await TaskList.owned_ids(
+        session, current_user.id, [list_id]
+    ):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+
+    updated = await Task.update_where(
+        session,
+        current_user.id,
+        Task.conditions(**request.where.model_dump()),
+        **changes,
+    )
+
+    return {"updated": updated}
+
+
+@router.delete("/bulk", status_code=status.HTTP_200_OK)
+async def bulk_delete_tasks(
+    current_user: UserDependency, session: SessionDep, request: TaskSelection
+):
+    deleted = await Task.delete_where(
+        session, current_user.id, Task.conditions(**request.model_dump())
+    )
+
+    return {"deleted": deleted}
+
+
+@router.patch("/{task_id}", status_code=status.HTTP_200_OK, response_model=TaskRead)
 async def update_task(
     current_user: UserDependency,
     session: SessionDep,
     task_id: int,
     request: UpdateTaskRequest,
 ):
-    task = Task.find_by(session, obj_id=task_id, user_id=current_user.id)
+    attrs = request.model_dump(exclude_unset=True)
+    list_id = None
+    if requested_list_id := attrs.pop("list_id", None):
+        # Lists of other users are ignored, resolved within the UPDATE
+        list_id = TaskList.owned_id(current_user.id, requested_list_id)
+
+    task = await Task.update_by(
+        session, obj_id=task_id, user_id=current_user.id, list_id=list_id, **attrs
+    )
     if task is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
 
-    attrs = request.model_dump(exclude_unset=True)
-    task_list = None
-    if list_id := attrs.pop("list_id", None):
-        task_list = TaskList.find_by(session, obj_id=list_id, user_id=current_user.id)
-
-    return task.update(session, task_list=task_list, **attrs)
+    return task
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_task(current_user: UserDependency, session: SessionDep, task_id: int):
-    task = Task.find_by(session, obj_id=task_id, user_id=current_user.id)
+    task = await Task.find_by(session, obj_id=task_id, user_id=current_user.id, load=())
     if task is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
 
-    task.destroy(session)
+    await task.destroy(session)
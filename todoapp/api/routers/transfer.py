@@ -0,0 +1,62 @@
+from typing import AsyncIterator
+
+from fastapi import APIRouter, UploadFile, status
+from fastapi.responses import StreamingResponse
+
+from todoapp.api.importer import import_rows, read_rows
+from todoapp.api.models.transfer import (
+    GroupExport,
+    ImportReport,
+    TaskExport,
+    TaskListExport,
+)
+from todoapp.api.routers.auth import UserDependency
+from todoapp.database.session import SessionFactory, SessionFactoryDep
+from todoapp.models import Group, Task, TaskList
+
+router = APIRouter(tags=["transfer"])
+
+EXPORTS = ((Group, GroupExport), (TaskList, TaskListExport), (Task, TaskExport))
+
+
+async def export_lines(
+    new_session: SessionFactory, user_id: int
+) -> AsyncIterator[bytes]:
+    """Renders the user's groups, lists and tasks as NDJSON, a batch at a time
+
+    All rows are read within one transaction of the read-only pool, which
+    begins explicitly, so the export is a consistent snapshot even while the
+    user keeps writing.
+    """
+    async with new_session() as session:
+        for model, schema in EXPORTS:
+            async for rows in model.stream_rows(session, user_id, schema.columns()):
+                yield b"".join(
+                    schema.model_validate(row).model_dump_json().encode() + b"\n"
+                    for row in rows
+                )
+
+
+@router.get("/export", status_code=status.HTTP_200_OK)
+async def export_data(current_user: UserDependency, new_session: SessionFactoryDep):
+    """Streams all groups, lists and tasks of the user as NDJSON"""
+    return StreamingResponse(
+        export_lines(new_session, current_user.id),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="export.ndjson"'},
+    )
+
+
+@router.post("/import", status_code=status.HTTP_200_OK, response_model=ImportReport)
+async def import_data(
+    current_user: UserDependency, new_session: SessionFactoryDep, file: UploadFile
+):
+    """Creates groups, lists and tasks from an NDJSON or CSV file
+
+    Rows are validated like single creates and an optional "type" column
+    tells groups, lists and tasks apart. Valid rows are committed in batches,
+    so they are kept even when other rows are reported as invalid.
+    """
+    rows = read_rows(file)
+    async with new_session() as session:
+        return await import_rows(session, current_user.id, rows)
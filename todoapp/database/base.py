@@ -1,11 +1,83 @@
-from sqlmodel import SQLModel, create_engine
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel import SQLModel
+
+from .stats import instrument
 
 SQLITE_FILE_NAME = "todoapp.db"
 sqlite_url = f"sqlite:///{SQLITE_FILE_NAME}"
+async_sqlite_url = f"sqlite+aiosqlite:///{SQLITE_FILE_NAME}"
 
 connect_args = {"check_same_thread": False}
-engine = create_engine(sqlite_url, connect_args=connect_args)
+
+# Largest value of an INTEGER column, larger Python ints cannot be bound
+SQLITE_MAX_INTEGER = 2**63 - 1
+
+# Applied to every new connection. WAL lets readers proceed while a write is in
+# progress; journal_mode is persistent, so it is only set by writable connections.
+SQLITE_PRAGMAS: dict[str, Any] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "foreign_keys": "ON",
+    "busy_timeout": 5_000,  # milliseconds
+    "cache_size": -64_000,  # negative values are in KiB, i.e. 64 MiB
+    "mmap_size": 256 * 1024 * 1024,  # bytes
+}
+
+READ_POOL_SIZE = 5
+
+
+def create_sqlite_engine(
+    url: str,
+    read_only: bool = False,
+    pragmas: dict[str, Any] | None = None,
+    **kwargs: Any,
+) -> AsyncEngine:
+    """Creates an async SQLite engine which tunes every connection it opens"""
+    pragmas = {**SQLITE_PRAGMAS, **(pragmas or {})}
+    if read_only:
+        pragmas.pop("journal_mode", None)
+        pragmas["query_only"] = "ON"
+
+    kwargs.setdefault("connect_args", connect_args)
+    engine = create_async_engine(url, **kwargs)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    if read_only:
+        # pysqlite only sends BEGIN before a write, so each SELECT would see
+        # the latest commit. Beginning explicitly, as in SQLAlchemy's pysqlite
+        # "serializable isolation" recipe, makes every read of a transaction
+        # see the same snapshot.
+        @event.listens_for(engine.sync_engine, "connect")
+        def disable_implicit_begin(dbapi_connection, _connection_record):
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(engine.sync_engine, "begin")
+        def begin_snapshot(conn):
+            conn.exec_driver_sql("BEGIN")
+
+    instrument(engine.sync_engine)
+
+    return engine
+
+
+# SQLite allows a single writer at a time, so writes share one connection and
+# queue in the pool instead of failing with "database is locked", while reads
+# use their own pool and never wait behind them.
+engine = create_sqlite_engine(async_sqlite_url, pool_size=1, max_overflow=0)
+read_engine = create_sqlite_engine(
+    async_sqlite_url, read_only=True, pool_size=READ_POOL_SIZE, max_overflow=0
+)
 
 
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+async def create_db_and_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
@@ -0,0 +1,104 @@
+"""Task counters of lists and users, kept up to date by SQLite triggers
+
+Every write to the task table, including set-based statements and rows
+removed by ON DELETE CASCADE, adjusts the counters in the same transaction.
+Open tasks are also counted per due date, so that the number of overdue
+tasks can be read without scanning tasks. `repair_counters` recomputes
+everything from scratch:
+
+    python -m todoapp.database.counters
+"""
+
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+def _count_task(row: str, sign: str) -> str:
+    """Statements adding ("+") or removing ("-") the task `row` (NEW or OLD)"""
+    counts = (
+        f"task_count = task_count {sign} 1, "
+        f"completed_count = completed_count {sign} {row}.completed"
+    )
+    statements = [
+        f'UPDATE "user" SET {counts} WHERE id = {row}.user_id;',
+        f"UPDATE list SET {counts} WHERE id = {row}.list_id;",
+    ]
+    for table, owner in (("user_due_count", "user_id"), ("list_due_count", "list_id")):
+        is_open = (
+            f"{row}.{owner} IS NOT NULL AND {row}.due_date IS NOT NULL "
+            f"AND NOT {row}.completed"
+        )
+        if sign == "+":
+            statements.append(
+                f"INSERT INTO {table} ({owner}, due_date, open_tasks) "
+                f"SELECT {row}.{owner}, {row}.due_date, 1 WHERE {is_open} "
+                f"ON CONFLICT ({owner}, due_date) "
+                f"DO UPDATE SET open_tasks = open_tasks + 1;"
+            )
+        else:
+            match = f"{owner} = {row}.{owner} AND due_date = {row}.due_date"
+            statements += [
+                f"UPDATE {table} SET open_tasks = open_tasks - 1 "
+                f"WHERE {match} AND {is_open};",
+                f"DELETE FROM {table} WHERE {match} AND open_tasks <= 0;",
+            ]
+
+    return "\n".join(statements)
+
+
+TRIGGERS = [
+    f"""CREATE TRIGGER task_counters_insert AFTER INSERT ON task BEGIN
+{_count_task("NEW", "+")}
+END""",
+    f"""CREATE TRIGGER task_counters_update
+AFTER UPDATE OF user_id, list_id, completed, due_date ON task BEGIN
+{_count_task("OLD", "-")}
+{_count_task("NEW", "+")}
+END""",
+    f"""CREATE TRIGGER task_counters_delete AFTER DELETE ON task BEGIN
+{_count_task("OLD", "-")}
+END""",
+]
+
+REPAIR_STATEMENTS = [
+    """UPDATE list SET
+        task_count = (SELECT count(*) FROM task WHERE list_id = list.id),
+        completed_count = (
+            SELECT count(*) FROM task WHERE list_id = list.id AND completed
+        )""",
+    """UPDATE "user" SET
+        task_count = (SELECT count(*) FROM task WHERE user_id = "user".id),
+        completed_count = (
+            SELECT count(*) FROM task WHERE user_id = "user".id AND completed
+        )""",
+    "DELETE FROM list_due_count",
+    """INSERT INTO list_due_count (list_id, due_date, open_tasks)
+        SELECT list_id, due_date, count(*) FROM task
+        WHERE list_id IS NOT NULL AND due_date IS NOT NULL AND NOT completed
+        GROUP BY list_id, due_date""",
+    "DELETE FROM user_due_count",
+    """INSERT INTO user_due_count (user_id, due_date, open_tasks)
+        SELECT user_id, due_date, count(*) FROM task
+        WHERE due_date IS NOT NULL AND NOT completed
+        GROUP BY user_id, due_date""",
+]
+
+
+async def repair_counters(connection: AsyncConnection) -> None:
+    """Recomputes all task counters from the task table"""
+    for statement in REPAIR_STATEMENTS:
+        await connection.execute(text(statement))
+
+
+async def main() -> None:
+    from todoapp.database.base import engine
+
+    async with engine.begin() as connection:
+        await repair_counters(connection)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,49 @@
+"""Full-text index over task titles and notes, backed by SQLite FTS5
+
+task_fts is an external content table: it stores only the index and reads
+the text from the task table, which triggers keep it in sync with.
+"""
+
+from sqlalchemy import Float, Integer, column, literal_column, table
+
+# Statements creating the index, in order
+STATEMENTS = [
+    "CREATE VIRTUAL TABLE task_fts USING fts5("
+    "title, note, content='task', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    # Matches in titles weigh more than matches in notes
+    "INSERT INTO task_fts(task_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+    """CREATE TRIGGER task_fts_insert AFTER INSERT ON task BEGIN
+INSERT INTO task_fts(rowid, title, note) VALUES (NEW.id, NEW.title, NEW.note);
+END""",
+    """CREATE TRIGGER task_fts_update AFTER UPDATE OF title, note ON task BEGIN
+INSERT INTO task_fts(task_fts, rowid, title, note)
+VALUES ('delete', OLD.id, OLD.title, OLD.note);
+INSERT INTO task_fts(rowid, title, note) VALUES (NEW.id, NEW.title, NEW.note);
+END""",
+    """CREATE TRIGGER task_fts_delete AFTER DELETE ON task BEGIN
+INSERT INTO task_fts(task_fts, rowid, title, note)
+VALUES ('delete', OLD.id, OLD.title, OLD.note);
+END""",
+]
+
+# Indexes the tasks that already exist
+REBUILD = "INSERT INTO task_fts(task_fts) VALUES ('rebuild')"
+
+task_fts = table("task_fts", column("rowid", Integer), column("rank", Float))
+match = literal_column("task_fts").op("MATCH")
+
+
+def match_query(text: str) -> str:
+    """Turns user input into an FTS5 query
+
+    Every term has to match and a term ending with "*" matches as a prefix.
+    Terms are quoted, so FTS5 operators in the input are searched literally.
+    """
+    terms = []
+    for word in text.split():
+        term = word.rstrip("*").replace('"', '""')
+        if term:
+            terms.append(f'"{term}"*' if word.endswith("*") else f'"{term}"')
+
+    return " ".join(terms)
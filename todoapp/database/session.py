@@ -1,13 +1,89 @@
-from typing import Annotated
-from fastapi import Depends
+from typing import Annotated, Any, AsyncContextManager, Callable
+
+from fastapi import Depends, Request
+from sqlalchemy import Select, event
+from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .base import engine, read_engine
+
+
+class RoutingSession(Session):
+    """Sends plain SELECTs to the read-only pool and writes to the writer
+
+    Once a transaction has touched the writer it stays there until it ends, so
+    the session always reads its own uncommitted changes.
+    """
+
+    def __init__(self, writer: AsyncEngine, reader: AsyncEngine, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.writer = writer
+        self.reader = reader
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or not isinstance(clause, Select):
+            self.info["use_writer"] = True
+
+        if self.info.get("use_writer"):
+            return self.writer.sync_engine
+
+        return self.reader.sync_engine
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def release_writer(session: RoutingSession, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop("use_writer", None)
+
+
+def create_session() -> AsyncSession:
+    # Objects are still used after the commit, so they must not expire:
+    # reloading expired attributes would require implicit IO on the event loop.
+    return AsyncSession(
+        sync_session_class=RoutingSession,
+        writer=engine,
+        reader=read_engine,
+        expire_on_commit=False,
+    )
+
+
+async def get_session(request: Request) -> AsyncSession:
+    # Opened, committed and closed around the request by the unit_of_work
+    # middleware, so that a request commits all of its changes at once
+    return request.state.session
+
+
+SessionDep = Annotated[AsyncSession, Depends(get_session)]
+
+
+SessionFactory = Callable[[], AsyncContextManager[AsyncSession]]
+
+
+def get_session_factory() -> SessionFactory:
+    # For work that outlives the request, like streaming a response body,
+    # which runs after the unit_of_work middleware has closed its session
+    return create_session
+
+
+SessionFactoryDep = Annotated[SessionFactory, Depends(get_session_factory)]
+
+
+def mark_changed(session: AsyncSession, user_id: int) -> None:
+    """Records that the session's transaction writes data of the user"""
+    session.info.setdefault("changed_users", set()).add(user_id)
+
 
-from .base import engine
+def pop_changed(session: AsyncSession) -> set[int]:
+    """Returns and forgets the users whose data the session wrote"""
+    return session.info.pop("changed_users", set())
 
 
-def get_session():
-    with Session(engine) as session:
-        yield session
+def mark_deleted(session: AsyncSession, user_id: int) -> None:
+    """Records that the session's transaction deletes the user"""
+    session.info.setdefault("deleted_users", set()).add(user_id)
 
 
-SessionDep = Annotated[Session, Depends(get_session)]
+def pop_deleted(session: AsyncSession) -> set[int]:
+    """Returns and forgets the users the session deleted"""
+    return session.info.pop("deleted_users", set())
@@ -0,0 +1,102 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from sqlalchemy import Engine, event
+
+# Statements repeated more often than this within one request are reported
+N_PLUS_ONE_THRESHOLD = 10
+
+_WHITESPACE = re.compile(r"\s+")
+_PARAMETER_LIST = re.compile(r"\(\?(?:,\s*\?)*\)")
+_VALUES_LIST = re.compile(r"\(\?\)(?:,\s*\(\?\))+")
+
+_current_stats: ContextVar[Optional["QueryStats"]] = ContextVar(
+    "query_stats", default=None
+)
+_batched: ContextVar[bool] = ContextVar("batched_queries", default=False)
+
+
+def fingerprint(statement: str) -> str:
+    """Reduces a statement to its shape, so that repeats can be counted
+
+    Statements are already parametrized, only IN lists and multi-row VALUES
+    vary in length.
+    """
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    return _VALUES_LIST.sub("(?)", _PARAMETER_LIST.sub("(?)", statement))
+
+
+@dataclass
+class QueryStats:
+    """Statements executed while tracking was active"""
+
+    count: int = 0
+    duration: float = 0.0  # seconds
+    statements: Counter = field(default_factory=Counter)
+    # Statements repeated on purpose, see batched_queries
+    batched: Counter = field(default_factory=Counter)
+    parent: Optional["QueryStats"] = None
+
+    def record(self, statement: str, duration: float, batched: bool = False) -> None:
+        self.count += 1
+        self.duration += duration
+        key = fingerprint(statement)
+        self.statements[key] += 1
+        if batched:
+            self.batched[key] += 1
+        if self.parent is not None:
+            self.parent.record(statement, duration, batched)
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> dict[str, int]:
+        """Returns the statements executed more than `threshold` times"""
+        return {
+            statement: count
+            for statement, count in (self.statements - self.batched).items()
+            if count > threshold
+        }
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collects the statements executed in the current context
+
+    Tracking can be nested, outer trackers see the statements of inner ones.
+    """
+    stats = QueryStats(parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def batched_queries() -> Iterator[None]:
+    """Leaves the statements of the block out of N+1 detection
+
+    For work that repeats a statement on purpose, once per batch.
+    """
+    token = _batched.set(True)
+    try:
+        yield
+    finally:
+        _batched.reset(token)
+
+
+def instrument(engine: Engine) -> None:
+    """Reports every statement the engine executes to the active tracker"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, _cursor, _statement, _parameters, _context, _executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def record_query(conn, _cursor, statement, _parameters, _context, _executemany):
+        duration = time.perf_counter() - conn.info["query_start_time"].pop()
+        if (stats := _current_stats.get()) is not None:
+            stats.record(statement, duration, _batched.get())
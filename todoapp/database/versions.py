@@ -0,0 +1,64 @@
+"""Per-user change versions, maintained by SQLite triggers
+
+Any insert, update or delete of a user's groups, lists or tasks increments
+"user".change_version in the same transaction, so one primary key lookup
+tells whether anything the user can read has changed.
+
+Inserted and updated rows are stamped with the new version in their own
+version column, and deleted rows leave a tombstone carrying it. Changes
+after a given version are then found through the (user_id, version) indexes.
+"""
+
+# Columns the API shows, changes to anything else do not count. Leaving out
+# version itself keeps the stamping from firing the triggers again, and the
+# list task counters change along with a task, which counts already.
+COLUMNS = {
+    "task": (
+        "user_id, list_id, title, note, completed, due_date, created_at, updated_at"
+    ),
+    "list": "user_id, group_id, title, created_at, updated_at",
+    "group": "user_id, title, created_at, updated_at",
+}
+
+
+def _bump(*rows: str) -> str:
+    users = ", ".join(f"{row}.user_id" for row in rows)
+    return (
+        f'UPDATE "user" SET change_version = change_version + 1 WHERE id IN ({users});'
+    )
+
+
+def _stamp(table: str) -> str:
+    return (
+        f'UPDATE "{table}" SET version = '
+        f'(SELECT change_version FROM "user" WHERE id = NEW.user_id) '
+        f"WHERE id = NEW.id;"
+    )
+
+
+def _bury(table: str) -> str:
+    # Selecting from the user skips rows deleted along with their user
+    return (
+        f"INSERT INTO tombstone (user_id, version, entity, entity_id) "
+        f"SELECT id, change_version, '{table}', OLD.id "
+        f'FROM "user" WHERE id = OLD.user_id;'
+    )
+
+
+TRIGGERS = []
+for table, columns in COLUMNS.items():
+    TRIGGERS += [
+        f"""CREATE TRIGGER {table}_version_insert AFTER INSERT ON "{table}" BEGIN
+{_bump("NEW")}
+{_stamp(table)}
+END""",
+        f"""CREATE TRIGGER {table}_version_update
+AFTER UPDATE OF {columns} ON "{table}" BEGIN
+{_bump("OLD", "NEW")}
+{_stamp(table)}
+END""",
+        f"""CREATE TRIGGER {table}_version_delete AFTER DELETE ON "{table}" BEGIN
+{_bump("OLD")}
+{_bury(table)}
+END""",
+    ]
@@ -1,23 +1,78 @@
+import logging
+import os
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 
-from todoapp.api.routers import auth, groups, lists, tasks
+from todoapp.api.cache import commit, create_backend, response_cache
+from todoapp.api.routers import auth, groups, lists, sync, tasks, transfer
 from todoapp.database.base import create_db_and_tables
+from todoapp.database.session import create_session
+from todoapp.database.stats import N_PLUS_ONE_THRESHOLD, track_queries
 from todoapp.models import *
 
+logger = logging.getLogger(__name__)
+
+DEBUG = os.environ.get("TODOAPP_DEBUG", "").lower() in ("1", "true")
+# memory://, redis://host:port/db to share it between workers, or empty to disable
+CACHE_URL = os.environ.get("TODOAPP_CACHE_URL", "memory://")
+
+response_cache.backend = create_backend(CACHE_URL)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # create_db_and_tables()
+    # await create_db_and_tables()
     yield
 
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, debug=DEBUG)
 app.include_router(auth.router)
 app.include_router(groups.router)
 app.include_router(lists.router)
+app.include_router(sync.router)
 app.include_router(tasks.router)
+app.include_router(transfer.router)
+
+
+@app.middleware("http")
+async def unit_of_work(request: Request, call_next):
+    """Runs each request in one transaction
+
+    Model helpers only flush their changes, which are committed once the
+    request succeeds, invalidating the cached responses of the users they
+    changed, and rolled back when it fails.
+    """
+    async with create_session() as session:
+        request.state.session = session
+        response = await call_next(request)
+        if response.status_code < 400:
+            await commit(session)
+        else:
+            await session.rollback()
+
+    return response
+
+
+@app.middleware("http")
+async def track_database_queries(request: Request, call_next):
+    with track_queries() as stats:
+        response = await call_next(request)
+
+    for statement, count in stats.repeated(N_PLUS_ONE_THRESHOLD).items():
+        logger.warning(
+            "Possible N+1 query in %s %s, statement executed %d times: %s",
+            request.method,
+            request.url.path,
+            count,
+            statement,
+        )
+
+    if request.app.debug:
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Query-Time-Ms"] = f"{stats.duration * 1000:.2f}"
+
+    return response
 
 
 @app.get("/")
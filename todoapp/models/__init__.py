@@ -1,6 +1,16 @@
+from .due_count import ListDueCount, UserDueCount
 from .group import Group
 from .task import Task
 from .task_list import TaskList
+from .tombstone import Tombstone
 from .user import User
 
-__all__ = ["Group", "Task", "TaskList", "User"]
+__all__ = [
+    "Group",
+    "ListDueCount",
+    "Task",
+    "TaskList",
+    "Tombstone",
+    "User",
+    "UserDueCount",
+]
@@ -1,13 +1,41 @@
 from datetime import UTC, datetime
-from typing import Any, List, Optional, Type, TypeVar
+from typing import (
+    Any,
+    AsyncIterator,
+    ClassVar,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
-from sqlmodel import Field, Session, SQLModel, select
+from sqlalchemy import Row, inspect
+from sqlalchemy.orm import Load
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import Field, SQLModel, and_, delete, insert, or_, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from todoapp.database.session import mark_changed
 
 T = TypeVar("T", bound="BaseModel")
 
 
 class BaseModel(SQLModel):
-    """Base model providing common methods"""
+    """Base model providing common methods
+
+    The write helpers flush their changes without committing. Requests are
+    committed once by the unit_of_work middleware. They also mark the users
+    whose data they write, whose cached responses the commit then drops.
+    """
+
+    # Relationships read by the serializer. The query helpers load them
+    # eagerly, as dotted paths for nested relationships, so serializing a
+    # result never issues a query per row.
+    __serialized_relationships__: ClassVar[Tuple[str, ...]] = ()
 
     created_at: datetime = Field(
         default_factory=lambda: datetime.now(UTC), nullable=False
@@ -15,34 +43,326 @@ class BaseModel(SQLModel):
     updated_at: datetime = Field(
         default_factory=lambda: datetime.now(UTC), nullable=False
     )
+    # Change version of the user when the record last changed, stamped by
+    # database triggers, see todoapp.database.versions
+    version: int = Field(
+        default=0, nullable=False, sa_column_kwargs={"server_default": "0"}
+    )
+
+    @classmethod
+    def loader_options(cls, load: Optional[Sequence[str]] = None) -> List[Any]:
+        """Builds eager loader options for the given relationship paths
+
+        Collections are loaded with a separate SELECT ... IN query and
+        many-to-one relationships are joined into the main query. Defaults
+        to the relationships the model serializes.
+        """
+        if load is None:
+            load = cls.__serialized_relationships__
+
+        options = []
+        for path in load:
+            option, model = Load(cls), cls
+            for name in path.split("."):
+                attr = getattr(model, name)
+                if attr.property.uselist:
+                    option = option.selectinload(attr)
+                else:
+                    option = option.joinedload(attr)
+                model = attr.property.mapper.class_
+            options.append(option)
+
+        return options
 
     @classmethod
-    def find_by(cls, session: Session, obj_id: int, user_id: int) -> Optional[T]:
+    async def find_by(
+        cls,
+        session: AsyncSession,
+        obj_id: int,
+        user_id: int,
+        load: Optional[Sequence[str]] = None,
+    ) -> Optional[T]:
         """Find a record by its ID and user_id"""
-        return session.exec(
-            select(cls).where(cls.id == obj_id, cls.user_id == user_id)
-        ).first()
+        result = await session.exec(
+            select(cls)
+            .where(cls.id == obj_id, cls.user_id == user_id)
+            .options(*cls.loader_options(load))
+        )
+        return result.first()
 
     @classmethod
-    def all(cls: Type[T], session: Session, **filters: Any) -> List[T]:
+    async def all(
+        cls: Type[T],
+        session: AsyncSession,
+        load: Optional[Sequence[str]] = None,
+        **filters: Any,
+    ) -> List[T]:
         """Fetch all records, optionally filtering by giving parameters"""
-        stmt = select(cls)
+        stmt = select(cls).options(*cls.loader_options(load))
         for attr, value in filters.items():
             stmt = stmt.where(getattr(cls, attr) == value)
 
-        return session.exec(stmt).fetchall()
+        result = await session.exec(stmt)
+        return result.fetchall()
 
     @classmethod
-    def create_by(cls: Type[T], session: Session, **kwargs: Any) -> T:
-        """Create a new record"""
+    async def page(
+        cls: Type[T],
+        session: AsyncSession,
+        limit: int,
+        after: Optional[Tuple[Any, int]] = None,
+        sort: str = "id",
+        where: Sequence[Any] = (),
+        load: Optional[Sequence[str]] = None,
+        **filters: Any,
+    ) -> Tuple[List[T], Optional[T]]:
+        """Fetch up to `limit` records ordered by `sort` and then by ID
+
+        `sort` names a column, prefixed with "-" for descending order.
+        `after` is the (sort key, ID) pair of the last record already seen.
+        Returns the records and, unless this is the last page, the record
+        to continue after.
+        """
+        descending = sort.startswith("-")
+        column = getattr(cls, sort.lstrip("-"))
+        order_by = [cls.id] if column is cls.id else [column, cls.id]
+        if descending:
+            order_by = [col.desc() for col in order_by]
+
+        stmt = (
+            select(cls)
+            .where(*where)
+            .options(*cls.loader_options(load))
+            .order_by(*order_by)
+            .limit(limit + 1)
+        )
+        if after is not None:
+            stmt = stmt.where(cls._keyset_after(column, *after, descending))
+        for attr, value in filters.items():
+            stmt = stmt.where(getattr(cls, attr) == value)
+
+        result = await session.exec(stmt)
+        records = result.fetchall()
+        if len(records) > limit:
+            return records[:limit], records[limit - 1]
+
+        return records, None
+
+    @classmethod
+    def _keyset_after(cls, column: Any, key: Any, obj_id: int, descending: bool) -> Any:
+        """Builds the condition selecting rows past (key, obj_id)
+
+        SQLite sorts NULLs first in ascending order and last in descending
+        order, which is mirrored here for nullable columns.
+        """
+        if column is cls.id:
+            return cls.id < obj_id if descending else cls.id > obj_id
+
+        past_id = cls.id < obj_id if descending else cls.id > obj_id
+        if key is None:
+            if descending:
+                return and_(column.is_(None), past_id)
+            return or_(column.is_not(None), and_(column.is_(None), past_id))
+
+        past_key = column < key if descending else column > key
+        condition = or_(past_key, and_(column == key, past_id))
+        if descending and column.nullable:
+            condition = or_(condition, column.is_(None))
+
+        return condition
+
+    @classmethod
+    async def stream_rows(
+        cls,
+        session: AsyncSession,
+        user_id: int,
+        columns: Sequence[str],
+        batch_size: int = 1_000,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """Stream the given columns of all the user's records in ID order
+
+        Rows are fetched from a server-side cursor in batches of `batch_size`
+        and are not turned into ORM objects, so memory use does not depend
+        on the number of records.
+        """
+        stmt = (
+            select(*(getattr(cls, name) for name in columns))
+            .where(cls.user_id == user_id)
+            .order_by(cls.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await session.stream(stmt)
+        async for rows in result.partitions():
+            yield rows
+
+    @classmethod
+    async def changed_since(
+        cls,
+        session: AsyncSession,
+        user_id: int,
+        version: Optional[int],
+        columns: Sequence[str],
+    ) -> Sequence[Row]:
+        """The given columns of the user's records changed after `version`
+
+        Rows come in the order of their changes. A `version` of None
+        returns all records of the user.
+        """
+        stmt = (
+            select(*(getattr(cls, name) for name in columns))
+            .where(cls.user_id == user_id)
+            .order_by(cls.version, cls.id)
+        )
+        if version is not None:
+            stmt = stmt.where(cls.version > version)
+
+        result = await session.exec(stmt)
+        return result.all()
+
+    @classmethod
+    async def create_by(cls: Type[T], session: AsyncSession, **kwargs: Any) -> T:
+        """Create a new record
+
+        The generated ID comes back with the INSERT and a new record has no
+        children yet, so the record is not selected again after the INSERT.
+        """
         obj = cls(**kwargs)
+        for name in cls.__serialized_relationships__:
+            if getattr(cls, name).property.uselist:
+                set_committed_value(obj, name, [])
+
         session.add(obj)
-        session.commit()
-        session.refresh(obj)
+        await session.flush()
+        mark_changed(session, obj.user_id)
+        await obj.load_relationships(session)
 
         return obj
 
-    def update(self: T, session: Session, **kwargs: Any) -> T:
+    @classmethod
+    async def bulk_create(
+        cls, session: AsyncSession, rows: Sequence[dict[str, Any]]
+    ) -> List[int]:
+        """Create many records in one transaction, returning their IDs in order
+
+        Rows are sent as multi-row INSERT ... RETURNING statements instead of
+        one INSERT, commit and refresh per record.
+        """
+        if not rows:
+            return []
+
+        # Instantiating the model applies its Python-side defaults to the
+        # missing keys, an explicit None is written as NULL
+        columns = [
+            column.name for column in cls.__table__.columns if column.name != "id"
+        ]
+        values = []
+        for row in rows:
+            obj = cls(**row)
+            values.append({name: getattr(obj, name) for name in columns})
+            mark_changed(session, obj.user_id)
+
+        result = await session.exec(
+            insert(cls).returning(cls.id),
+            params=values,
+            # Keep NULL columns so that all rows share one statement
+            execution_options={"render_nulls": True},
+        )
+        # RETURNING order is unspecified, but SQLite hands out ascending rowids
+        # in VALUES order. Asking SQLAlchemy to sort by parameter order instead
+        # makes it fall back to a statement per row.
+        ids = sorted(result.scalars())
+
+        return ids
+
+    @classmethod
+    async def owned_ids(
+        cls, session: AsyncSession, user_id: int, ids: Iterable[int]
+    ) -> Set[int]:
+        """Return which of the given IDs belong to records of the user"""
+        ids = set(ids)
+        if not ids:
+            return set()
+
+        result = await session.exec(
+            select(cls.id).where(cls.user_id == user_id, cls.id.in_(ids))
+        )
+        return set(result.all())
+
+    @classmethod
+    def owned_id(cls, user_id: int, obj_id: int) -> Any:
+        """SQL expression giving `obj_id` if the record belongs to the user
+
+        Evaluates to NULL otherwise, which lets a write reference another
+        record without looking it up first.
+        """
+        return (
+            select(cls.id)
+            .where(cls.id == obj_id, cls.user_id == user_id)
+            .scalar_subquery()
+        )
+
+    @classmethod
+    async def update_by(
+        cls: Type[T], session: AsyncSession, obj_id: int, user_id: int, **values: Any
+    ) -> Optional[T]:
+        """Update a record by its ID and user_id with UPDATE ... RETURNING
+
+        Returns None when no record of the user has the given ID.
+        """
+        result = await session.exec(
+            update(cls)
+            .where(cls.id == obj_id, cls.user_id == user_id)
+            .values(updated_at=datetime.now(UTC), **values)
+            .returning(cls)
+        )
+        obj = result.scalars().first()
+        if obj is None:
+            return None
+
+        mark_changed(session, user_id)
+
+        # The RETURNING row refreshes the columns only, while a changed
+        # foreign key may point a loaded relationship elsewhere
+        session.expire(obj, cls.__serialized_relationships__)
+        return await obj.load_relationships(session)
+
+    @classmethod
+    async def update_where(
+        cls,
+        session: AsyncSession,
+        user_id: int,
+        where: Sequence[Any] = (),
+        **values: Any,
+    ) -> int:
+        """Update the user's records matching `where` in one statement
+
+        Returns the number of updated records.
+        """
+        result = await session.exec(
+            update(cls)
+            .where(cls.user_id == user_id, *where)
+            .values(updated_at=datetime.now(UTC), **values)
+        )
+        mark_changed(session, user_id)
+
+        return result.rowcount
+
+    @classmethod
+    async def delete_where(
+        cls, session: AsyncSession, user_id: int, where: Sequence[Any] = ()
+    ) -> int:
+        """Delete the user's records matching `where` in one statement
+
+        Dependent rows are handled by the database through the ON DELETE
+        actions of the foreign keys, not by ORM cascades. Returns the number
+        of deleted records.
+        """
+        result = await session.exec(delete(cls).where(cls.user_id == user_id, *where))
+        mark_changed(session, user_id)
+
+        return result.rowcount
+
+    async def update(self: T, session: AsyncSession, **kwargs: Any) -> T:
         """Update the current record"""
         self.updated_at = datetime.now(UTC)
 
@@ -50,12 +370,27 @@ class BaseModel(SQLModel):
             setattr(self, attr, value)
 
         session.add(self)
-        session.commit()
-        session.refresh(self)
+        await session.flush()
+        mark_changed(session, self.user_id)
+        await self.load_relationships(session)
+
+        return self
+
+    async def load_relationships(self: T, session: AsyncSession) -> T:
+        """Load the serialized relationships that are not loaded yet
+
+        Attributes written by the current process are kept as they are, so
+        only missing relationships cost a query.
+        """
+        unloaded = inspect(self).unloaded
+        names = [name for name in self.__serialized_relationships__ if name in unloaded]
+        if names:
+            await session.run_sync(lambda _: [getattr(self, name) for name in names])
 
         return self
 
-    def destroy(self: T, session: Session) -> None:
+    async def destroy(self: T, session: AsyncSession) -> None:
         """Delete the current record"""
-        session.delete(self)
-        session.commit()
+        await session.delete(self)
+        await session.flush()
+        mark_changed(session, self.user_id)
@@ -0,0 +1,58 @@
+from datetime import UTC, date, datetime
+from typing import Dict, Iterable
+
+from sqlalchemy import DDL, event
+from sqlmodel import Field, SQLModel, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from todoapp.database.counters import TRIGGERS
+
+# Tables created without migrations, e.g. by tests, get the counter triggers too
+for trigger in TRIGGERS:
+    event.listen(
+        SQLModel.metadata, "after_create", DDL(trigger).execute_if(dialect="sqlite")
+    )
+
+
+class ListDueCount(SQLModel, table=True):
+    """Number of open tasks of a list due on a date, maintained by triggers"""
+
+    __tablename__ = "list_due_count"
+
+    list_id: int = Field(foreign_key="list.id", primary_key=True, ondelete="CASCADE")
+    due_date: date = Field(primary_key=True)
+    open_tasks: int = Field(nullable=False)
+
+    @classmethod
+    async def overdue(
+        cls, session: AsyncSession, list_ids: Iterable[int]
+    ) -> Dict[int, int]:
+        """Number of overdue tasks of each list"""
+        today = datetime.now(UTC).date()
+        result = await session.exec(
+            select(cls.list_id, func.sum(cls.open_tasks))
+            .where(cls.list_id.in_(list_ids), cls.due_date < today)
+            .group_by(cls.list_id)
+        )
+        return dict(result.all())
+
+
+class UserDueCount(SQLModel, table=True):
+    """Number of open tasks of a user due on a date, maintained by triggers"""
+
+    __tablename__ = "user_due_count"
+
+    user_id: int = Field(foreign_key="user.id", primary_key=True, ondelete="CASCADE")
+    due_date: date = Field(primary_key=True)
+    open_tasks: int = Field(nullable=False)
+
+    @classmethod
+    async def overdue(cls, session: AsyncSession, user_id: int) -> int:
+        """Number of overdue tasks of the user"""
+        today = datetime.now(UTC).date()
+        result = await session.exec(
+            select(func.coalesce(func.sum(cls.open_tasks), 0)).where(
+                cls.user_id == user_id, cls.due_date < today
+            )
+        )
+        return result.one()
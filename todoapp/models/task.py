@@ -1,9 +1,11 @@
 from datetime import date
-from typing import Any, Optional
+from typing import Any, List, Optional, Sequence, Tuple
 
-from pydantic import model_serializer
-from sqlmodel import Field, Relationship
+from sqlalchemy import DDL, event
+from sqlmodel import Field, Index, Relationship, and_, or_, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from todoapp.database import search
 from todoapp.models.base_model import BaseModel
 from todoapp.models.task_list import TaskList
 from todoapp.models.user import User
@@ -12,10 +14,21 @@ from todoapp.models.user import User
 class Task(BaseModel, table=True):
     """Represents model to describe tasks"""
 
+    __serialized_relationships__ = ("task_list",)
+    __table_args__ = (
+        Index("ix_task_user_id_completed_due_date", "user_id", "completed", "due_date"),
+        Index("ix_task_user_id_due_date", "user_id", "due_date"),
+        Index("ix_task_user_id_created_at", "user_id", "created_at"),
+        Index("ix_task_user_id_updated_at", "user_id", "updated_at"),
+        Index("ix_task_user_id_version", "user_id", "version"),
+    )
+
     id: int = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="user.id", nullable=False, ondelete="CASCADE")
+    user_id: int = Field(
+        foreign_key="user.id", nullable=False, ondelete="CASCADE", index=True
+    )
     list_id: int | None = Field(
-        foreign_key="list.id", nullable=True, ondelete="CASCADE"
+        foreign_key="list.id", nullable=True, ondelete="CASCADE", index=True
     )
     title: str = Field(min_length=3, max_length=255, nullable=False)
     note: str = Field(max_length=1_000, default="", nullable=False)
@@ -25,27 +38,81 @@ class Task(BaseModel, table=True):
     user: "User" = Relationship(back_populates="tasks")
     task_list: Optional["TaskList"] = Relationship(back_populates="tasks")
 
-    @model_serializer
-    def serializer(self, include_task_list: bool = True) -> dict[str, Any]:
-        task_list = (
-            {
-                "id": self.task_list.id,
-                "title": self.task_list.title,
-            }
-            if self.task_list is not None
-            else None
+    @classmethod
+    def conditions(
+        cls,
+        completed: Optional[bool] = None,
+        list_id: Optional[int] = None,
+        due_from: Optional[date] = None,
+        due_to: Optional[date] = None,
+        due_before: Optional[date] = None,
+        ids: Optional[Sequence[int]] = None,
+    ) -> list[Any]:
+        """Builds WHERE clauses for the given filters, skipping unset ones"""
+        conditions = []
+        if ids is not None:
+            conditions.append(cls.id.in_(ids))
+        if completed is not None:
+            conditions.append(cls.completed == completed)
+        if list_id is not None:
+            conditions.append(cls.list_id == list_id)
+        if due_from is not None:
+            conditions.append(cls.due_date >= due_from)
+        if due_to is not None:
+            conditions.append(cls.due_date <= due_to)
+        if due_before is not None:
+            conditions.append(cls.due_date < due_before)
+
+        return conditions
+
+    @classmethod
+    async def search(
+        cls,
+        session: AsyncSession,
+        user_id: int,
+        query: str,
+        limit: int,
+        after: Optional[Tuple[float, int]] = None,
+    ) -> Tuple[List["Task"], Optional[Tuple["Task", float]]]:
+        """Full-text search over the user's tasks, best matches first
+
+        `after` is the (rank, ID) pair of the last match already seen.
+        Returns the matches and, unless this is the last page, the match to
+        continue after along with its rank.
+        """
+        match_query = search.match_query(query)
+        if not match_query:
+            return [], None
+
+        rank = search.task_fts.c.rank
+        stmt = (
+            select(cls, rank)
+            .join(search.task_fts, search.task_fts.c.rowid == cls.id)
+            .where(search.match(match_query), cls.user_id == user_id)
+            .options(*cls.loader_options())
+            .order_by(rank, cls.id)
+            .limit(limit + 1)
         )
+        if after is not None:
+            key, obj_id = after
+            stmt = stmt.where(or_(rank > key, and_(rank == key, cls.id > obj_id)))
 
-        task_dict = {
-            "id": self.id,
-            "title": self.title,
-            "note": self.note,
-            "completed": self.completed,
-            "created_at": str(self.created_at),
-            "updated_at": str(self.updated_at),
-        }
+        result = await session.exec(stmt)
+        rows = result.all()
+        records = [task for task, _rank in rows[:limit]]
+        if len(rows) > limit:
+            return records, tuple(rows[limit - 1])
 
-        if include_task_list:
-            task_dict["task_list"] = task_list
+        return records, None
 
-        return task_dict
+
+# Tables created without migrations, e.g. by tests, get the search index too
+for statement in search.STATEMENTS:
+    event.listen(
+        Task.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite")
+    )
+event.listen(
+    Task.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS task_fts").execute_if(dialect="sqlite"),
+)
@@ -1,10 +1,11 @@
-from typing import TYPE_CHECKING, Any
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any, Dict, Optional, Sequence
 
-from pydantic import model_serializer
-from sqlalchemy.orm import selectinload
-from sqlmodel import Field, Relationship, Session, select
+from sqlmodel import Field, Index, Relationship, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from todoapp.models.base_model import BaseModel
+from todoapp.models.due_count import ListDueCount
 from todoapp.models.group import Group
 from todoapp.models.user import User
 
@@ -12,51 +13,75 @@ from todoapp.models.user import User
 if TYPE_CHECKING:
     from todoapp.models.task import Task
 
+TASK_COUNTS = ("total_tasks", "completed_tasks", "overdue_tasks")
+
 
 class TaskList(BaseModel, table=True):
     """List allows to group several tasks"""
 
     __tablename__ = "list"
+    __serialized_relationships__ = ("tasks", "group")
+    __table_args__ = (Index("ix_list_user_id_version", "user_id", "version"),)
 
     id: int = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="user.id", nullable=False, ondelete="CASCADE")
+    user_id: int = Field(
+        foreign_key="user.id", nullable=False, ondelete="CASCADE", index=True
+    )
     group_id: int | None = Field(
         default=None, foreign_key="group.id", ondelete="SET NULL"
     )
     title: str = Field(min_length=3, max_length=50, nullable=False)
+    # Maintained by database triggers, see todoapp.database.counters
+    task_count: int = Field(
+        default=0, nullable=False, sa_column_kwargs={"server_default": "0"}
+    )
+    completed_count: int = Field(
+        default=0, nullable=False, sa_column_kwargs={"server_default": "0"}
+    )
 
     user: "User" = Relationship(back_populates="task_lists")
     group: "Group" = Relationship(back_populates="task_lists")
     tasks: list["Task"] = Relationship(back_populates="task_list", cascade_delete=True)
 
-    @model_serializer
-    def serializer(
-        self, include_tasks: bool = True, include_group: bool = True
-    ) -> dict[str, Any]:
-        task_list_dict = {
-            "id": self.id,
-            "title": self.title,
-        }
-
-        if include_tasks:
-            task_list_dict["tasks"] = [
-                task.serializer(include_task_list=False) for task in self.tasks
-            ]
-
-        if include_group:
-            task_list_dict["group"] = (
-                self.group.serializer(include_task_lists=False)
-                if self.group is not None
-                else None
-            )
+    @classmethod
+    def conditions(
+        cls,
+        ids: Optional[Sequence[int]] = None,
+        group_id: Optional[int] = None,
+    ) -> list[Any]:
+        """Builds WHERE clauses for the given filters, skipping unset ones"""
+        conditions = []
+        if ids is not None:
+            conditions.append(cls.id.in_(ids))
+        if group_id is not None:
+            conditions.append(cls.group_id == group_id)
 
-        return task_list_dict
+        return conditions
 
     @classmethod
-    def all(cls: "TaskList", session: Session, **filters: Any) -> list["TaskList"]:
-        """Fetch all records, optionally filtering by giving parameters"""
-        stmt = select(cls).options(selectinload(cls.tasks))
-        for attr, value in filters.items():
-            stmt = stmt.where(getattr(cls, attr) == value)
+    async def counts_per_group(
+        cls, session: AsyncSession, user_id: int, group_ids: Sequence[int]
+    ) -> Dict[int, Dict[str, int]]:
+        """Sums the task counters of the lists in each group"""
+        today = datetime.now(UTC).date()
+        overdue = (
+            select(func.sum(ListDueCount.open_tasks))
+            .where(ListDueCount.list_id == cls.id, ListDueCount.due_date < today)
+            .scalar_subquery()
+        )
+        result = await session.exec(
+            select(
+                cls.group_id,
+                func.sum(cls.task_count),
+                func.sum(cls.completed_count),
+                func.sum(func.coalesce(overdue, 0)),
+            )
+            .where(cls.user_id == user_id, cls.group_id.in_(group_ids))
+            .group_by(cls.group_id)
+        )
+
+        counts = {group_id: dict.fromkeys(TASK_COUNTS, 0) for group_id in group_ids}
+        for group_id, *values in result:
+            counts[group_id] = dict(zip(TASK_COUNTS, values))
 
-        return session.exec(stmt).fetchall()
+        return counts
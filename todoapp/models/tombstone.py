@@ -0,0 +1,33 @@
+from typing import Dict, List
+
+from sqlmodel import Field, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+class Tombstone(SQLModel, table=True):
+    """Deleted group, list or task, recorded by triggers for delta sync
+
+    `version` is the change version of the user at the deletion, see
+    todoapp.database.versions.
+    """
+
+    user_id: int = Field(foreign_key="user.id", primary_key=True, ondelete="CASCADE")
+    version: int = Field(primary_key=True)
+    entity: str = Field(nullable=False)
+    entity_id: int = Field(nullable=False)
+
+    @classmethod
+    async def deleted_since(
+        cls, session: AsyncSession, user_id: int, version: int
+    ) -> Dict[str, List[int]]:
+        """IDs of the records deleted after the given version, by table"""
+        result = await session.exec(
+            select(cls.entity, cls.entity_id)
+            .where(cls.user_id == user_id, cls.version > version)
+            .order_by(cls.version)
+        )
+        deleted: Dict[str, List[int]] = {}
+        for entity, entity_id in result:
+            deleted.setdefault(entity, []).append(entity_id)
+
+        return deleted
@@ -1,8 +1,12 @@
 from datetime import UTC, datetime
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
-from sqlmodel import Field, Relationship, Session, SQLModel, func, or_, select
+from sqlalchemy import DDL, Row, event
+from sqlmodel import Field, Index, Relationship, SQLModel, func, select, text
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from todoapp.database import versions
+from todoapp.database.session import mark_changed, mark_deleted
 from todoapp.security.password import hash_password
 
 if TYPE_CHECKING:
@@ -14,6 +18,13 @@ if TYPE_CHECKING:
 class User(SQLModel, table=True):
     """Represents a model to describe a user"""
 
+    # Lookups are case-insensitive, so they filter on lower(...) and need
+    # expression indexes to avoid scanning the table
+    __table_args__ = (
+        Index("ix_user_lower_email", func.lower(text("email"))),
+        Index("ix_user_lower_username", func.lower(text("username"))),
+    )
+
     id: int = Field(default=None, primary_key=True)
     email: str = Field(
         index=True, min_length=3, max_length=255, unique=True, nullable=False
@@ -23,6 +34,17 @@ class User(SQLModel, table=True):
     )
     hashed_password: str = Field(min_length=3, max_length=255, nullable=False)
     created_at: datetime = Field(default=datetime.now(UTC), nullable=False)
+    # Maintained by database triggers, see todoapp.database.counters
+    task_count: int = Field(
+        default=0, nullable=False, sa_column_kwargs={"server_default": "0"}
+    )
+    completed_count: int = Field(
+        default=0, nullable=False, sa_column_kwargs={"server_default": "0"}
+    )
+    # Maintained by database triggers, see todoapp.database.versions
+    change_version: int = Field(
+        default=0, nullable=False, sa_column_kwargs={"server_default": "0"}
+    )
 
     groups: list["Group"] = Relationship(back_populates="user")
     tasks: list["Task"] = Relationship(back_populates="user", cascade_delete=True)
@@ -31,47 +53,75 @@ class User(SQLModel, table=True):
     )
 
     @classmethod
-    def find_by_email(cls, session: Session, email: str) -> "User | None":
+    async def find_by_email(cls, session: AsyncSession, email: str) -> "User | None":
         """Finds a user by email"""
-        return session.exec(
+        result = await session.exec(
             select(cls).where(func.lower(cls.email) == func.lower(email))
-        ).first()
+        )
+        return result.first()
 
     @classmethod
-    def find_by_username(cls, session: Session, username: str) -> "User | None":
+    async def find_by_username(
+        cls, session: AsyncSession, username: str
+    ) -> "User | None":
         """Finds a user by username"""
-        return session.exec(
+        result = await session.exec(
             select(cls).where(func.lower(cls.username) == func.lower(username))
-        ).first()
+        )
+        return result.first()
 
     @classmethod
-    def find_by_email_or_username(
-        cls, session: Session, email_or_username: str
+    async def find_by_email_or_username(
+        cls, session: AsyncSession, email_or_username: str
     ) -> "User | None":
         """Finds a user by email or username"""
-        return session.exec(
-            select(cls).where(
-                or_(
-                    func.lower(cls.email) == func.lower(email_or_username),
-                    func.lower(cls.username) == func.lower(email_or_username),
-                )
-            )
-        ).first()
+        # Two point lookups, each served by its own index, instead of an OR
+        user = await cls.find_by_email(session, email_or_username)
+        if user is None:
+            user = await cls.find_by_username(session, email_or_username)
+
+        return user
 
     @classmethod
-    def create_by(
-        cls, session: Session, email: str, username: str, password: str
+    async def create_by(
+        cls, session: AsyncSession, email: str, username: str, password: str
     ) -> "User":
         """Creates a new user"""
         hashed_password = hash_password(password)
         user = cls(email=email, username=username, hashed_password=hashed_password)
         session.add(user)
-        session.commit()
-        session.refresh(user)
+        # The generated ID is returned by the INSERT itself
+        await session.flush()
 
         return user
 
-    def destroy(self, session: Session) -> None:
+    @classmethod
+    async def change_version_of(
+        cls, session: AsyncSession, user_id: int
+    ) -> Optional[int]:
+        """Reads the current change version of a user, None if there is no user"""
+        result = await session.exec(select(cls.change_version).where(cls.id == user_id))
+        return result.one_or_none()
+
+    @classmethod
+    async def task_counts_of(cls, session: AsyncSession, user_id: int) -> Optional[Row]:
+        """Reads the maintained task_count and completed_count of a user, None
+        if there is no user"""
+        result = await session.exec(
+            select(cls.task_count, cls.completed_count).where(cls.id == user_id)
+        )
+        return result.one_or_none()
+
+    async def destroy(self, session: AsyncSession) -> None:
         """Delete the current record"""
-        session.delete(self)
-        session.commit()
+        await session.delete(self)
+        await session.flush()
+        mark_changed(session, self.id)
+        mark_deleted(session, self.id)
+
+
+# Tables created without migrations, e.g. by tests, get the version triggers too
+for trigger in versions.TRIGGERS:
+    event.listen(
+        SQLModel.metadata, "after_create", DDL(trigger).execute_if(dialect="sqlite")
+    )
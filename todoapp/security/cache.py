@@ -0,0 +1,49 @@
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """In-process LRU mapping whose entries expire, bounded by their number"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl  # seconds
+        # Least recently used first, values are (expires_at, value)
+        self.entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: K) -> Optional[V]:
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] <= time.time():
+            del self.entries[key]
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: K, value: V, expires_at: Optional[float] = None) -> None:
+        """Stores a value for the TTL, or until `expires_at` (UNIX time) if sooner"""
+        limit = time.time() + self.ttl
+        if expires_at is not None:
+            limit = min(limit, expires_at)
+
+        self.entries[key] = (limit, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        self.entries.clear()
@@ -1,24 +1,43 @@
+import hashlib
 from datetime import datetime, timedelta, timezone
+from typing import Any
 
 from jose import JWTError, jwt
 
 from todoapp.models.user import User
+from todoapp.security.cache import TTLCache
 
 # also can generate with `openssl rand -hex 32`
 SECRET_KEY = "super-secret-key"  # TODO: move to .env
 ALGORITHM = "HS256"
+TOKEN_LIFETIME = timedelta(minutes=30)
 
+# Verified payloads by token digest, each kept until its token expires. Clients
+# send the same token with every request, and a hit skips the signature check
+# and the parsing. Invalid tokens are not cached.
+TOKEN_CACHE_SIZE = 10_000
+token_payloads: TTLCache[bytes, dict[str, Any]] = TTLCache(
+    TOKEN_CACHE_SIZE, TOKEN_LIFETIME.total_seconds()
+)
 
-def encode_token(user: User, expires_delta=timedelta(minutes=30)) -> str:
+
+def encode_token(user: User, expires_delta=TOKEN_LIFETIME) -> str:
     """Encodes JWT token"""
     expires = datetime.now(timezone.utc) + expires_delta
     encode = {"sub": user.email, "user_id": user.id, "exp": expires}
     return jwt.encode(encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def decode_token(token: str):
-    """Decodes JWT token"""
-    try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    except JWTError:
-        return {}
+def decode_token(token: str) -> dict[str, Any]:
+    """Decodes JWT token, returning {} when it is invalid or expired"""
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_payloads.get(key)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            return {}
+        token_payloads.set(key, payload, expires_at=payload.get("exp"))
+
+    # A copy, so that callers cannot change the cached payload
+    return dict(payload)
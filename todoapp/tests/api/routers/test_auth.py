@@ -1,9 +1,11 @@
 import pytest
 from fastapi import HTTPException, status
-from fastapi.testclient import TestClient
-from sqlmodel import Session, select
+from httpx import AsyncClient
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from todoapp.api.routers.auth import get_current_user
+from todoapp.api.cache import commit
+from todoapp.api.routers.auth import Principal, get_current_user, revoked_users
 from todoapp.models.user import User
 from todoapp.security.password import verify_password
 from todoapp.security.token import decode_token, encode_token
@@ -18,8 +20,10 @@ def is_valid_jwt_token(user: User, token: str) -> bool:
 
 
 class TestAuthRegister:
-    def test_successful_response(self, session: Session, client: TestClient):
-        response = client.post(
+    async def test_successful_response(
+        self, session: AsyncSession, client: AsyncClient
+    ):
+        response = await client.post(
             "/auth/register",
             json={
                 "email": "user@example.com",
@@ -29,7 +33,7 @@ class TestAuthRegister:
             },
         )
 
-        user = session.exec(select(User)).first()
+        user = (await session.exec(select(User))).first()
         assert user is not None
         assert user.id is not None
         assert user.email == "user@example.com"
@@ -86,9 +90,9 @@ class TestAuthRegister:
             "password_and_confirmation_do_not_match",
         ],
     )
-    def test_validation_errors(
+    async def test_validation_errors(
         self,
-        client: TestClient,
+        client: AsyncClient,
         email,
         username,
         password,
@@ -96,7 +100,7 @@ class TestAuthRegister:
         expected_type,
         expected_msg,
     ):
-        response = client.post(
+        response = await client.post(
             "/auth/register",
             json={
                 "email": email,
@@ -112,12 +116,12 @@ class TestAuthRegister:
             assert expected_msg == err["msg"]
 
     @pytest.mark.parametrize("email", [("user@example.com"), ("USER@EXAMPLE.COM")])
-    def test_when_user_email_already_exists(
-        self, client: TestClient, create_user, email
+    async def test_when_user_email_already_exists(
+        self, client: AsyncClient, create_user, email
     ):
-        create_user()
+        await create_user()
 
-        response = client.post(
+        response = await client.post(
             "/auth/register",
             json={
                 "email": email,
@@ -131,12 +135,12 @@ class TestAuthRegister:
         assert response.json() == {"detail": "A user with this email already exists."}
 
     @pytest.mark.parametrize("username", [("username"), ("USERNAME")])
-    def test_when_user_username_already_exists(
-        self, client: TestClient, create_user, username
+    async def test_when_user_username_already_exists(
+        self, client: AsyncClient, create_user, username
     ):
-        create_user()
+        await create_user()
 
-        response = client.post(
+        response = await client.post(
             "/auth/register",
             json={
                 "email": "newuser@example.com",
@@ -172,9 +176,9 @@ class TestAuthCreateToken:
             "no user",
         ],
     )
-    def test_auth_create_token(
+    async def test_auth_create_token(
         self,
-        client: TestClient,
+        client: AsyncClient,
         create_user: User,
         email_or_username,
         password,
@@ -182,9 +186,9 @@ class TestAuthCreateToken:
         expect_error,
     ):
         if persisted_user:
-            user = create_user()
+            user = await create_user()
 
-        response = client.post(
+        response = await client.post(
             "/auth/token",
             data={"username": email_or_username, "password": password},
             headers={"Content-Type": "application/x-www-form-urlencoded"},
@@ -203,25 +207,87 @@ class TestAuthCreateToken:
 
 class TestGetCurrentUser:
     @pytest.mark.asyncio
-    async def test_valid_token_and_existing_user(self, session: Session, create_user):
-        user = create_user()
+    async def test_valid_token(self, create_user, query_budget):
+        user = await create_user()
         token = encode_token(user)
-        result = await get_current_user(token, session)
 
-        assert result == user
+        with query_budget(0):
+            result = await get_current_user(token)
+
+        assert result == Principal(id=user.id, email=user.email)
 
     @pytest.mark.asyncio
-    async def test_invalid_token(self, session: Session):
+    async def test_invalid_token(self):
         with pytest.raises(HTTPException) as exc_info:
-            await get_current_user("invalid_token", session)
+            await get_current_user("invalid_token")
 
         assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
         assert exc_info.value.detail == "Could not validate credentials"
 
     @pytest.mark.asyncio
-    async def test_valid_token_user_does_not_exist(self, session: Session):
+    async def test_token_without_user_id(self):
         non_peristed_user = User(email="user@example.com", user_id=503)
         token = encode_token(non_peristed_user)
-        result = await get_current_user(token, session)
 
-        assert result is None
+        with pytest.raises(HTTPException) as exc_info:
+            await get_current_user(token)
+
+        assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
+
+    @pytest.mark.asyncio
+    async def test_deleted_user(self, session: AsyncSession, create_user):
+        user = await create_user()
+        token = encode_token(user)
+
+        await user.destroy(session)
+        await commit(session)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await get_current_user(token)
+
+        assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestDeletedUser:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "method, path",
+        [
+            ("GET", "/tasks"),
+            ("GET", "/tasks/summary"),
+            ("POST", "/tasks/"),
+            ("POST", "/groups/"),
+            ("GET", "/sync"),
+        ],
+    )
+    async def test_token_is_refused(
+        self, client: AsyncClient, session: AsyncSession, create_user, method, path
+    ):
+        user = await create_user()
+        headers = {"Authorization": f"Bearer {encode_token(user)}"}
+
+        await user.destroy(session)
+        await commit(session)
+
+        response = await client.request(
+            method, path, headers=headers, json={"title": "Title"}
+        )
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("path", ["/tasks", "/tasks/summary", "/sync"])
+    async def test_deleted_by_another_process(
+        self, client: AsyncClient, session: AsyncSession, create_user, path
+    ):
+        user = await create_user()
+        headers = {"Authorization": f"Bearer {encode_token(user)}"}
+
+        await user.destroy(session)
+        await commit(session)
+        # Only the process that deleted the user knows to revoke its tokens
+        revoked_users.clear()
+
+        response = await client.get(path, headers=headers)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -1,91 +1,218 @@
+from datetime import date
 from typing import Tuple
 
 from fastapi import status
-from fastapi.testclient import TestClient
-from sqlmodel import Session
+from httpx import AsyncClient
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from todoapp.models import Group, User
 
 
 class TestReadGroups:
-    def test_unauthenticated(self, client: TestClient):
-        response = client.get("/groups")
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.get("/groups")
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
         assert response.json() == {"detail": "Not authenticated"}
 
-    def test_authenticated_success(
+    async def test_authenticated_success(
         self,
-        authenticated_client: Tuple[TestClient, User],
+        authenticated_client: Tuple[AsyncClient, User],
         create_user,
         create_group,
+        render,
     ):
         client, current_user = authenticated_client
 
-        another_user = create_user(email="user2@example.com", username="user2")
-        group1 = create_group(user_id=current_user.id, title="Group 1")
-        group2 = create_group(user_id=current_user.id, title="Group 2")
-        _group3 = create_group(user_id=another_user.id, title="Group 3")
+        another_user = await create_user(email="user2@example.com", username="user2")
+        group1 = await create_group(user_id=current_user.id, title="Group 1")
+        group2 = await create_group(user_id=current_user.id, title="Group 2")
+        _group3 = await create_group(user_id=another_user.id, title="Group 3")
 
-        response = client.get("/groups")
+        response = await client.get("/groups")
         assert response.json() == {
             "groups": [
-                group1.model_dump(),
-                group2.model_dump(),
-            ]
+                render(group1),
+                render(group2),
+            ],
+            "limit": 100,
+            "next_cursor": None,
         }
 
+    async def test_paginated(
+        self, authenticated_client: Tuple[AsyncClient, User], create_group
+    ):
+        client, current_user = authenticated_client
+        ids = [
+            (await create_group(user_id=current_user.id, title=f"Group {i}")).id
+            for i in range(5)
+        ]
+
+        response = await client.get("/groups", params={"limit": 2})
+        json_response = response.json()
+        assert [obj["id"] for obj in json_response["groups"]] == ids[:2]
+        assert json_response["limit"] == 2
+        assert json_response["next_cursor"] is not None
+
+        response = await client.get(
+            "/groups", params={"limit": 2, "cursor": json_response["next_cursor"]}
+        )
+        json_response = response.json()
+        assert [obj["id"] for obj in json_response["groups"]] == ids[2:4]
+
+        response = await client.get(
+            "/groups", params={"limit": 2, "cursor": json_response["next_cursor"]}
+        )
+        json_response = response.json()
+        assert [obj["id"] for obj in json_response["groups"]] == ids[4:]
+        assert json_response["next_cursor"] is None
+
+    async def test_query_budget(
+        self,
+        query_budget,
+        authenticated_client: Tuple[AsyncClient, User],
+        create_group,
+        create_list,
+    ):
+        client, current_user = authenticated_client
+        for i in range(3):
+            group = await create_group(user_id=current_user.id, title=f"Group {i}")
+            await create_list(user_id=current_user.id, group_id=group.id, title="List")
+
+        # The change version for the ETag, the groups and one query for all
+        # their lists
+        with query_budget(3):
+            response = await client.get("/groups")
+
+        assert len(response.json()["groups"]) == 3
+
+    async def test_summary(
+        self,
+        query_budget,
+        authenticated_client: Tuple[AsyncClient, User],
+        create_group,
+        create_list,
+        create_task,
+    ):
+        client, current_user = authenticated_client
+        group1 = await create_group(user_id=current_user.id, title="Group 1")
+        group2 = await create_group(user_id=current_user.id, title="Group 2")
+        list1 = await create_list(
+            user_id=current_user.id, group_id=group1.id, title="List 1"
+        )
+        list2 = await create_list(
+            user_id=current_user.id, group_id=group1.id, title="List 2"
+        )
+        await create_task(user_id=current_user.id, list_id=list1.id, title="Task 1")
+        await create_task(
+            user_id=current_user.id, list_id=list2.id, title="Task 2", completed=True
+        )
+        await create_task(
+            user_id=current_user.id,
+            list_id=list2.id,
+            title="Task 3",
+            due_date=date(2000, 1, 1),
+        )
+        await create_task(user_id=current_user.id, title="Task 4")
+
+        # The change version for the ETag, the groups and one query summing
+        # the counters of their lists
+        with query_budget(3):
+            response = await client.get("/groups", params={"summary": True})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["groups"] == [
+            {
+                "id": group1.id,
+                "title": "Group 1",
+                "total_tasks": 3,
+                "completed_tasks": 1,
+                "overdue_tasks": 1,
+            },
+            {
+                "id": group2.id,
+                "title": "Group 2",
+                "total_tasks": 0,
+                "completed_tasks": 0,
+                "overdue_tasks": 0,
+            },
+        ]
+
+    async def test_etag(self, authenticated_client: Tuple[AsyncClient, User]):
+        client, _current_user = authenticated_client
+
+        etag = (await client.get("/groups")).headers["ETag"]
+        response = await client.get("/groups", headers={"If-None-Match": etag})
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.headers["ETag"] == etag
+
 
 class TestReadSingleGroup:
-    def test_unauthenticated(self, client: TestClient):
-        response = client.get("/groups/1")
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.get("/groups/1")
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
         assert response.json() == {"detail": "Not authenticated"}
 
     class TestAuthenticated:
-        def test_success(
+        async def test_success(
             self,
-            authenticated_client: Tuple[TestClient, User],
+            authenticated_client: Tuple[AsyncClient, User],
             create_group,
             create_list,
+            reload,
+            render,
         ):
             client, current_user = authenticated_client
-            group = create_group(user_id=current_user.id, title="Group title")
-            create_list(user_id=current_user.id, group_id=group.id, title="List 1")
-            create_list(user_id=current_user.id, group_id=group.id, title="List 2")
+            group = await create_group(user_id=current_user.id, title="Group title")
+            await create_list(
+                user_id=current_user.id, group_id=group.id, title="List 1"
+            )
+            await create_list(
+                user_id=current_user.id, group_id=group.id, title="List 2"
+            )
+            await reload(group)
 
-            response = client.get(f"/groups/{group.id}")
+            response = await client.get(f"/groups/{group.id}")
 
             assert response.status_code == status.HTTP_200_OK
             json_response = response.json()
-            assert json_response == group.model_dump()
+            assert json_response == render(group)
             assert len(json_response["task_lists"]) == 2
 
-        def test_group_not_found(self, authenticated_client: Tuple[TestClient, User]):
+        async def test_group_not_found(
+            self, authenticated_client: Tuple[AsyncClient, User]
+        ):
             client, _current_user = authenticated_client
 
-            response = client.get("/groups/503")
+            response = await client.get("/groups/503")
 
             assert response.status_code == status.HTTP_404_NOT_FOUND
             assert response.json() == {"detail": "Not found"}
 
 
 class TestCreateGroup:
-    def test_unauthenticated(self, client: TestClient):
-        response = client.post("/groups", json={"title": "New group"})
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.post("/groups", json={"title": "New group"})
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
         assert response.json() == {"detail": "Not authenticated"}
 
     class TestAuthenticated:
-        def test_success(
-            self, authenticated_client: Tuple[TestClient, User], session: Session
+        async def test_success(
+            self,
+            query_budget,
+            authenticated_client: Tuple[AsyncClient, User],
+            session: AsyncSession,
+            render,
         ):
             client, current_user = authenticated_client
-            response = client.post("/groups", json={"title": "New group"})
+            # Only the INSERT, the group is not selected again
+            with query_budget(1):
+                response = await client.post("/groups", json={"title": "New group"})
 
-            groups = Group.all(session, user_id=current_user.id)
+            groups = await Group.all(session, user_id=current_user.id)
 
             assert len(groups) > 0
             group = groups[0]
@@ -95,15 +222,15 @@ class TestCreateGroup:
             assert json_response["id"] == group.id
             assert json_response["title"] == group.title
             assert group.user_id == current_user.id
-            assert json_response == group.model_dump()
+            assert json_response == render(group)
 
-        def test_invalid_title(
-            self, authenticated_client: Tuple[TestClient, User], session: Session
+        async def test_invalid_title(
+            self, authenticated_client: Tuple[AsyncClient, User], session: AsyncSession
         ):
             client, current_user = authenticated_client
-            response = client.post("/groups", json={"title": "G"})
+            response = await client.post("/groups", json={"title": "G"})
 
-            groups = Group.all(session, user_id=current_user.id)
+            groups = await Group.all(session, user_id=current_user.id)
 
             assert len(groups) == 0
             assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -116,40 +243,40 @@ class TestCreateGroup:
 
 
 class TestUpdateGroup:
-    def test_unauthenticated(self, client: TestClient):
-        response = client.patch("/groups/1", json={"title": "Updated title"})
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.patch("/groups/1", json={"title": "Updated title"})
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
     class TestAuthenticated:
-        def test_success(
-            self, authenticated_client: Tuple[TestClient, User], create_group
+        async def test_success(
+            self, authenticated_client: Tuple[AsyncClient, User], create_group, render
         ):
             client, current_user = authenticated_client
 
-            group = create_group(user_id=current_user.id, title="Group title")
+            group = await create_group(user_id=current_user.id, title="Group title")
 
-            response = client.patch(
+            response = await client.patch(
                 f"/groups/{group.id}", json={"title": "Updated title"}
             )
 
             assert group.title == "Updated title"
             assert response.status_code == status.HTTP_200_OK
             json_response = response.json()
-            assert json_response == group.model_dump()
+            assert json_response == render(group)
             assert json_response["title"] == "Updated title"
 
-        def test_belongs_to_another_user(
+        async def test_belongs_to_another_user(
             self,
-            authenticated_client: Tuple[TestClient, User],
+            authenticated_client: Tuple[AsyncClient, User],
             create_group,
             create_user,
         ):
             client, _ = authenticated_client
-            user = create_user(email="user2@example.com", username="user2")
-            group = create_group(user_id=user.id, title="Group title")
+            user = await create_user(email="user2@example.com", username="user2")
+            group = await create_group(user_id=user.id, title="Group title")
 
-            response = client.patch(
+            response = await client.patch(
                 f"/groups/{group.id}", json={"title": "Updated title"}
             )
 
@@ -157,13 +284,13 @@ class TestUpdateGroup:
             assert response.status_code == status.HTTP_404_NOT_FOUND
             assert response.json() == {"detail": "Not found"}
 
-        def test_invalid_title(
-            self, authenticated_client: Tuple[TestClient, User], create_group
+        async def test_invalid_title(
+            self, authenticated_client: Tuple[AsyncClient, User], create_group
         ):
             client, current_user = authenticated_client
-            group = create_group(user_id=current_user.id, title="Group title")
+            group = await create_group(user_id=current_user.id, title="Group title")
 
-            response = client.patch(f"/groups/{group.id}", json={"title": "G"})
+            response = await client.patch(f"/groups/{group.id}", json={"title": "G"})
 
             assert group.title == "Group title"
             assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -175,34 +302,84 @@ class TestUpdateGroup:
             )
 
 
+class TestBulkDeleteGroups:
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.request("DELETE", "/groups/bulk", json={"ids": [1]})
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    class TestAuthenticated:
+        async def test_success(
+            self,
+            query_budget,
+            authenticated_client: Tuple[AsyncClient, User],
+            session: AsyncSession,
+            create_user,
+            create_group,
+            create_list,
+            reload,
+        ):
+            client, current_user = authenticated_client
+            group1 = await create_group(user_id=current_user.id, title="Group 1")
+            group2 = await create_group(user_id=current_user.id, title="Group 2")
+            lst = await create_list(
+                user_id=current_user.id, title="List", group_id=group1.id
+            )
+            user = await create_user(email="user2@example.com", username="user2")
+            another_group = await create_group(user_id=user.id, title="Another group")
+
+            with query_budget(2):
+                response = await client.request(
+                    "DELETE",
+                    "/groups/bulk",
+                    json={"ids": [group1.id, another_group.id]},
+                )
+
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json() == {"deleted": 1}
+            groups = await Group.all(session, load=())
+            assert {group.id for group in groups} == {group2.id, another_group.id}
+            # Lists of deleted groups are kept and detached by the database
+            await reload(lst, load=())
+            assert lst.group_id is None
+
+        async def test_empty(self, authenticated_client: Tuple[AsyncClient, User]):
+            client, _ = authenticated_client
+
+            response = await client.request("DELETE", "/groups/bulk", json={"ids": []})
+
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
 class TestDestroyGroup:
-    def test_unauthenticated(self, client: TestClient):
-        response = client.delete("/groups/1")
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.delete("/groups/1")
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
         assert response.json() == {"detail": "Not authenticated"}
 
     class TestAuthenticated:
-        def test_success(
+        async def test_success(
             self,
-            authenticated_client: Tuple[TestClient, User],
-            session: Session,
+            authenticated_client: Tuple[AsyncClient, User],
+            session: AsyncSession,
             create_group,
         ):
             client, current_user = authenticated_client
-            group = create_group(user_id=current_user.id, title="Group title")
+            group = await create_group(user_id=current_user.id, title="Group title")
 
-            response = client.delete(f"/groups/{group.id}")
+            response = await client.delete(f"/groups/{group.id}")
 
             assert (
-                Group.find_by(session, user_id=current_user.id, obj_id=group.id) is None
+                await Group.find_by(session, user_id=current_user.id, obj_id=group.id)
+                is None
             )
             assert response.status_code == status.HTTP_204_NO_CONTENT
 
-        def test_not_found(self, authenticated_client: Tuple[TestClient, User]):
+        async def test_not_found(self, authenticated_client: Tuple[AsyncClient, User]):
             client, _current_user = authenticated_client
 
-            response = client.delete("/groups/503")
+            response = await client.delete("/groups/503")
 
             assert response.status_code == status.HTTP_404_NOT_FOUND
             assert response.json() == {"detail": "Not found"}
@@ -1,142 +1,267 @@
-import logging
+from datetime import date
 from typing import Tuple
 
-import pytest
 from fastapi import status
-from fastapi.testclient import TestClient
-from sqlmodel import Session
+from httpx import AsyncClient
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from todoapp.models import TaskList, User
+from todoapp.models import Task, TaskList, User
 
 
 class TestReadLists:
-    def test_unauthenticated(self, client: TestClient):
-        response = client.get("/lists")
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.get("/lists")
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
         assert response.json() == {"detail": "Not authenticated"}
 
-    def test_authenticated_success(
+    async def test_authenticated_success(
         self,
-        authenticated_client: Tuple[TestClient, User],
+        authenticated_client: Tuple[AsyncClient, User],
         create_list,
         create_user,
         create_task,
+        render,
     ):
         client, current_user = authenticated_client
 
-        another_user = create_user(
+        another_user = await create_user(
             email="another-user@example.com", username="another-user"
         )
-        list1 = create_list(user_id=current_user.id, title="List 1")
-        list2 = create_list(user_id=current_user.id, title="List 2")
-        create_list(user_id=another_user.id, title="List 3")
-        create_task(user_id=current_user.id, list_id=list1.id, title="Task 1")
-        create_task(user_id=current_user.id, list_id=list1.id, title="Task 2")
-        create_task(user_id=current_user.id, list_id=list2.id, title="Task 3")
+        list1 = await create_list(user_id=current_user.id, title="List 1")
+        list2 = await create_list(user_id=current_user.id, title="List 2")
+        await create_list(user_id=another_user.id, title="List 3")
+        await create_task(user_id=current_user.id, list_id=list1.id, title="Task 1")
+        await create_task(user_id=current_user.id, list_id=list1.id, title="Task 2")
+        await create_task(user_id=current_user.id, list_id=list2.id, title="Task 3")
 
-        response = client.get("/lists")
+        response = await client.get("/lists")
 
         assert response.status_code == status.HTTP_200_OK
         assert response.json() == {
             "lists": [
-                list1.model_dump(),
-                list2.model_dump(),
-            ]
+                render(list1),
+                render(list2),
+            ],
+            "limit": 100,
+            "next_cursor": None,
         }
 
-    @pytest.mark.skip(reason="Fixing N+1 problems seems to be pain in the ass")
-    def test_authenticated_n_plus_one(
+    async def test_paginated(
+        self, authenticated_client: Tuple[AsyncClient, User], create_list
+    ):
+        client, current_user = authenticated_client
+        ids = [
+            (await create_list(user_id=current_user.id, title=f"List {i}")).id
+            for i in range(5)
+        ]
+
+        response = await client.get("/lists", params={"limit": 2})
+        json_response = response.json()
+        assert [obj["id"] for obj in json_response["lists"]] == ids[:2]
+        assert json_response["limit"] == 2
+        assert json_response["next_cursor"] is not None
+
+        response = await client.get(
+            "/lists", params={"limit": 2, "cursor": json_response["next_cursor"]}
+        )
+        json_response = response.json()
+        assert [obj["id"] for obj in json_response["lists"]] == ids[2:4]
+
+        response = await client.get(
+            "/lists", params={"limit": 2, "cursor": json_response["next_cursor"]}
+        )
+        json_response = response.json()
+        assert [obj["id"] for obj in json_response["lists"]] == ids[4:]
+        assert json_response["next_cursor"] is None
+
+    async def test_authenticated_n_plus_one(
         self,
-        caplog,
-        authenticated_client: Tuple[TestClient, User],
+        query_budget,
+        authenticated_client: Tuple[AsyncClient, User],
         create_list,
         create_user,
         create_task,
+        create_group,
     ):
         client, current_user = authenticated_client
 
-        another_user = create_user(
+        another_user = await create_user(
             email="another-user@example.com", username="another-user"
         )
-        list1 = create_list(user_id=current_user.id, title="List 1")
-        list2 = create_list(user_id=current_user.id, title="List 2")
-        create_list(user_id=another_user.id, title="List 3")
-        create_task(user_id=current_user.id, list_id=list1.id, title="Task 1")
-        create_task(user_id=current_user.id, list_id=list1.id, title="Task 2")
-        create_task(user_id=current_user.id, list_id=list2.id, title="Task 3")
-        create_task(user_id=current_user.id, list_id=list2.id, title="Task 4")
-        create_task(user_id=current_user.id, list_id=list2.id, title="Task 5")
-
-        with caplog.at_level(logging.INFO):
-            response = client.get("/lists")
+        group = await create_group(user_id=current_user.id, title="Group")
+        list1 = await create_list(
+            user_id=current_user.id, group_id=group.id, title="List 1"
+        )
+        list2 = await create_list(user_id=current_user.id, title="List 2")
+        await create_list(user_id=another_user.id, title="List 3")
+        await create_task(user_id=current_user.id, list_id=list1.id, title="Task 1")
+        await create_task(user_id=current_user.id, list_id=list1.id, title="Task 2")
+        await create_task(user_id=current_user.id, list_id=list2.id, title="Task 3")
+        await create_task(user_id=current_user.id, list_id=list2.id, title="Task 4")
+        await create_task(user_id=current_user.id, list_id=list2.id, title="Task 5")
+
+        # The change version for the ETag, lists joined with their groups and
+        # one query for all their tasks
+        with query_budget(3):
+            response = await client.get("/lists")
 
         assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()["lists"]) == 2
 
-        # Test N+1 problem
-        query_logs = [record for record in caplog.records if "SELECT" in record.message]
-        print("\n+++++++\n".join(record.message for record in query_logs))
-        assert len(query_logs) == 2
+    async def test_summary(
+        self,
+        query_budget,
+        authenticated_client: Tuple[AsyncClient, User],
+        create_list,
+        create_user,
+        create_task,
+        create_group,
+        reload,
+    ):
+        client, current_user = authenticated_client
+
+        another_user = await create_user(
+            email="another-user@example.com", username="another-user"
+        )
+        group = await create_group(user_id=current_user.id, title="Group")
+        list1 = await create_list(
+            user_id=current_user.id, group_id=group.id, title="List 1"
+        )
+        list2 = await create_list(user_id=current_user.id, title="List 2")
+        another_list = await create_list(user_id=another_user.id, title="List 3")
+        await create_task(user_id=current_user.id, list_id=list1.id, title="Task 1")
+        await create_task(
+            user_id=current_user.id, list_id=list1.id, title="Task 2", completed=True
+        )
+        await create_task(
+            user_id=current_user.id,
+            list_id=list1.id,
+            title="Task 3",
+            due_date=date(2000, 1, 1),
+        )
+        await create_task(
+            user_id=current_user.id,
+            list_id=list1.id,
+            title="Task 4",
+            completed=True,
+            due_date=date(2000, 1, 1),
+        )
+        await create_task(
+            user_id=current_user.id,
+            list_id=list1.id,
+            title="Task 5",
+            due_date=date(2999, 1, 1),
+        )
+        await create_task(
+            user_id=another_user.id, list_id=another_list.id, title="Task 6"
+        )
+        # The counters are updated by the database behind the session's back
+        await reload(list1, load=())
+
+        # The change version for the ETag, lists joined with their groups and
+        # one query for overdue counts
+        with query_budget(3):
+            response = await client.get("/lists", params={"summary": True})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            "lists": [
+                {
+                    "id": list1.id,
+                    "title": "List 1",
+                    "group": {"id": group.id, "title": "Group"},
+                    "total_tasks": 5,
+                    "completed_tasks": 2,
+                    "overdue_tasks": 1,
+                },
+                {
+                    "id": list2.id,
+                    "title": "List 2",
+                    "group": None,
+                    "total_tasks": 0,
+                    "completed_tasks": 0,
+                    "overdue_tasks": 0,
+                },
+            ],
+            "limit": 100,
+            "next_cursor": None,
+        }
+
+    async def test_etag(self, authenticated_client: Tuple[AsyncClient, User]):
+        client, _current_user = authenticated_client
+
+        etag = (await client.get("/lists")).headers["ETag"]
+        response = await client.get("/lists", headers={"If-None-Match": etag})
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.headers["ETag"] == etag
 
 
 class TestReadSingleList:
-    def test_unauthenticated(self, client: TestClient):
-        response = client.get("/lists/1")
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.get("/lists/1")
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
     class TestAuthenticated:
-        def test_success(
+        async def test_success(
             self,
-            authenticated_client: Tuple[TestClient, User],
+            authenticated_client: Tuple[AsyncClient, User],
             create_list,
             create_task,
+            reload,
+            render,
         ):
             client, current_user = authenticated_client
 
-            lst = create_list(user_id=current_user.id, title="List 1")
-            create_task(user_id=current_user.id, list_id=lst.id, title="Task 1")
-            create_task(user_id=current_user.id, list_id=lst.id, title="Task 2")
+            lst = await create_list(user_id=current_user.id, title="List 1")
+            await create_task(user_id=current_user.id, list_id=lst.id, title="Task 1")
+            await create_task(user_id=current_user.id, list_id=lst.id, title="Task 2")
+            await reload(lst)
 
-            response = client.get(f"/lists/{lst.id}")
+            response = await client.get(f"/lists/{lst.id}")
 
             assert response.status_code == status.HTTP_200_OK
             json_response = response.json()
-            assert json_response == lst.model_dump()
+            assert json_response == render(lst)
             assert len(json_response["tasks"]) == 2
 
-        def test_belongs_to_another_user(
+        async def test_belongs_to_another_user(
             self,
-            authenticated_client: Tuple[TestClient, User],
+            authenticated_client: Tuple[AsyncClient, User],
             create_user,
             create_list,
         ):
             client, _current_user = authenticated_client
 
-            user = create_user(email="user2@example.com", username="user2")
-            lst = create_list(user_id=user.id, title="List 1")
+            user = await create_user(email="user2@example.com", username="user2")
+            lst = await create_list(user_id=user.id, title="List 1")
 
-            response = client.get(f"/lists/{lst.id}")
+            response = await client.get(f"/lists/{lst.id}")
 
             assert response.status_code == status.HTTP_404_NOT_FOUND
             assert response.json() == {"detail": "Not found"}
 
 
 class TestCreateList:
-    def test_unauthenticated(self, client: TestClient):
-        response = client.post("/lists", json={"title": "New list"})
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.post("/lists", json={"title": "New list"})
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
         assert response.json() == {"detail": "Not authenticated"}
 
     class TestAuthenticated:
-        def test_success(
-            self, authenticated_client: Tuple[TestClient, User], session: Session
+        async def test_success(
+            self,
+            authenticated_client: Tuple[AsyncClient, User],
+            session: AsyncSession,
+            render,
         ):
             client, current_user = authenticated_client
-            response = client.post("/lists", json={"title": "New list"})
+            response = await client.post("/lists", json={"title": "New list"})
 
-            lists = TaskList.all(session, user_id=current_user.id)
+            lists = await TaskList.all(session, user_id=current_user.id)
 
             assert len(lists) > 0
             lst = lists[0]
@@ -146,15 +271,15 @@ class TestCreateList:
             assert json_response["id"] == lst.id
             assert json_response["title"] == lst.title
             assert lst.user_id == current_user.id
-            assert response.json() == lst.model_dump()
+            assert response.json() == render(lst)
 
-        def test_with_invalid_title(
-            self, authenticated_client: Tuple[TestClient, User], session: Session
+        async def test_with_invalid_title(
+            self, authenticated_client: Tuple[AsyncClient, User], session: AsyncSession
         ):
             client, current_user = authenticated_client
-            response = client.post("/lists", json={"title": "L"})
+            response = await client.post("/lists", json={"title": "L"})
 
-            lists = TaskList.all(session, user_id=current_user.id)
+            lists = await TaskList.all(session, user_id=current_user.id)
 
             assert len(lists) == 0
             assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -165,20 +290,21 @@ class TestCreateList:
                 == "String should have at least 3 characters"
             )
 
-        def test_with_group_id_success(
+        async def test_with_group_id_success(
             self,
-            authenticated_client: Tuple[TestClient, User],
-            session: Session,
+            authenticated_client: Tuple[AsyncClient, User],
+            session: AsyncSession,
             create_group,
+            render,
         ):
             client, current_user = authenticated_client
-            group = create_group(user_id=current_user.id, title="Group 1")
+            group = await create_group(user_id=current_user.id, title="Group 1")
 
-            response = client.post(
+            response = await client.post(
                 "/lists", json={"title": "New list", "group_id": group.id}
             )
 
-            lists = TaskList.all(session, user_id=current_user.id)
+            lists = await TaskList.all(session, user_id=current_user.id)
 
             assert len(lists) == 1
             lst = lists[0]
@@ -187,83 +313,88 @@ class TestCreateList:
             assert lst.group_id == group.id
             assert response.status_code == status.HTTP_201_CREATED
             json_response = response.json()
-            assert json_response == lst.model_dump()
+            assert json_response == render(lst)
             assert json_response["group"] == {"id": group.id, "title": group.title}
 
-        def test_with_group_id_of_another_user(
+        async def test_with_group_id_of_another_user(
             self,
-            authenticated_client: Tuple[TestClient, User],
-            session: Session,
+            authenticated_client: Tuple[AsyncClient, User],
+            session: AsyncSession,
             create_user,
             create_group,
+            render,
         ):
             client, current_user = authenticated_client
 
-            user = create_user(email="user2@example.com", username="user2")
-            group = create_group(user_id=user.id, title="Another user group")
+            user = await create_user(email="user2@example.com", username="user2")
+            group = await create_group(user_id=user.id, title="Another user group")
 
-            response = client.post(
+            response = await client.post(
                 "/lists", json={"title": "New list", "group_id": group.id}
             )
 
-            lists = TaskList.all(session, user_id=current_user.id)
+            lists = await TaskList.all(session, user_id=current_user.id)
 
             assert len(lists) == 1
             lst = lists[0]
             assert response.status_code == status.HTTP_201_CREATED
             json_response = response.json()
-            assert json_response == lst.model_dump()
+            assert json_response == render(lst)
             assert json_response["title"] == "New list"
             assert json_response["group"] is None
 
 
 class TestUpdateList:
-    def test_unauthenticated(self, client: TestClient):
-        response = client.patch("/lists/1", json={"title": "Updated title"})
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.patch("/lists/1", json={"title": "Updated title"})
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
     class TestAuthenticated:
-        def test_success(
-            self, authenticated_client: Tuple[TestClient, User], create_list
+        async def test_success(
+            self, authenticated_client: Tuple[AsyncClient, User], create_list, render
         ):
             client, current_user = authenticated_client
 
-            lst = create_list(user_id=current_user.id, title="List title")
+            lst = await create_list(user_id=current_user.id, title="List title")
 
-            response = client.patch(f"/lists/{lst.id}", json={"title": "Updated title"})
+            response = await client.patch(
+                f"/lists/{lst.id}", json={"title": "Updated title"}
+            )
 
             assert lst.title == "Updated title"
             assert response.status_code == status.HTTP_200_OK
             json_response = response.json()
-            assert json_response == lst.model_dump()
+            assert json_response == render(lst)
             assert json_response["title"] == "Updated title"
 
-        def test_blongs_to_another_user(
+        async def test_blongs_to_another_user(
             self,
-            authenticated_client: Tuple[TestClient, User],
+            authenticated_client: Tuple[AsyncClient, User],
             create_list,
             create_user,
         ):
             client, _current_user = authenticated_client
 
-            user = create_user(email="user2@example.com", username="user2")
-            lst = create_list(user_id=user.id, title="List title")
+            user = await create_user(email="user2@example.com", username="user2")
+            lst = await create_list(user_id=user.id, title="List title")
 
-            response = client.patch(f"/lists/{lst.id}", json={"title": "Updated title"})
+            response = await client.patch(
+                f"/lists/{lst.id}", json={"title": "Updated title"}
+            )
 
             assert lst.title == "List title"
             assert response.status_code == status.HTTP_404_NOT_FOUND
             assert response.json() == {"detail": "Not found"}
 
-        def test_invalid_title(
-            self, authenticated_client: Tuple[TestClient, User], create_list
+        async def test_invalid_title(
+            self, authenticated_client: Tuple[AsyncClient, User], create_list
         ):
             client, current_user = authenticated_client
 
-            lst = create_list(user_id=current_user.id, title="List title")
+            lst = await create_list(user_id=current_user.id, title="List title")
 
-            response = client.patch(f"/lists/{lst.id}", json={"title": "L"})
+            response = await client.patch(f"/lists/{lst.id}", json={"title": "L"})
 
             assert lst.title == "List title"
             assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -274,90 +405,172 @@ class TestUpdateList:
                 == "String should have at least 3 characters"
             )
 
-        def test_only_group_id(
+        async def test_only_group_id(
             self,
-            authenticated_client: Tuple[TestClient, User],
-            session: Session,
+            authenticated_client: Tuple[AsyncClient, User],
+            session: AsyncSession,
             create_list,
             create_group,
+            render,
         ):
             client, current_user = authenticated_client
-            lst = create_list(user_id=current_user.id, title="List title")
-            group = create_group(user_id=current_user.id, title="Group title")
+            lst = await create_list(user_id=current_user.id, title="List title")
+            group = await create_group(user_id=current_user.id, title="Group title")
 
-            response = client.patch(f"/lists/{lst.id}", json={"group_id": group.id})
+            response = await client.patch(
+                f"/lists/{lst.id}", json={"group_id": group.id}
+            )
 
-            updated_list = TaskList.find_by(
+            updated_list = await TaskList.find_by(
                 session, user_id=current_user.id, obj_id=lst.id
             )
             json_response = response.json()
 
             assert response.status_code == status.HTTP_200_OK
-            assert json_response == updated_list.model_dump()
+            assert json_response == render(updated_list)
             assert json_response["group"] == {"id": group.id, "title": group.title}
             assert updated_list.group_id == group.id
 
-        def test_another_user_group(
+        async def test_another_user_group(
             self,
-            authenticated_client: Tuple[TestClient, User],
-            session: Session,
+            authenticated_client: Tuple[AsyncClient, User],
             create_list,
             create_group,
             create_user,
+            reload,
         ):
             client, current_user = authenticated_client
-            lst = create_list(user_id=current_user.id, title="List title")
-            user = create_user(email="user2@example.com", username="user2")
-            group = create_group(user_id=user.id, title="Another user group")
+            lst = await create_list(user_id=current_user.id, title="List title")
+            user = await create_user(email="user2@example.com", username="user2")
+            group = await create_group(user_id=user.id, title="Another user group")
             original_group_id = lst.group_id
 
-            response = client.patch(f"/lists/{lst.id}", json={"group_id": group.id})
+            response = await client.patch(
+                f"/lists/{lst.id}", json={"group_id": group.id}
+            )
 
-            session.refresh(lst)
+            await reload(lst)
 
             assert response.status_code == status.HTTP_200_OK
             assert lst.group_id == original_group_id
 
 
+class TestBulkDeleteLists:
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.request("DELETE", "/lists/bulk", json={"ids": [1]})
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    class TestAuthenticated:
+        async def test_by_ids(
+            self,
+            query_budget,
+            authenticated_client: Tuple[AsyncClient, User],
+            session: AsyncSession,
+            create_user,
+            create_list,
+            create_task,
+        ):
+            client, current_user = authenticated_client
+            list1 = await create_list(user_id=current_user.id, title="List 1")
+            list2 = await create_list(user_id=current_user.id, title="List 2")
+            await create_task(user_id=current_user.id, title="Task 1", list_id=list1.id)
+            task2 = await create_task(
+                user_id=current_user.id, title="Task 2", list_id=list2.id
+            )
+            user = await create_user(email="user2@example.com", username="user2")
+            another_list = await create_list(user_id=user.id, title="Another list")
+
+            with query_budget(2):
+                response = await client.request(
+                    "DELETE",
+                    "/lists/bulk",
+                    json={"ids": [list1.id, another_list.id]},
+                )
+
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json() == {"deleted": 1}
+            lists = await TaskList.all(session, load=())
+            assert {lst.id for lst in lists} == {list2.id, another_list.id}
+            # Tasks of deleted lists are removed by the database
+            tasks = await Task.all(session, user_id=current_user.id, load=())
+            assert {task.id for task in tasks} == {task2.id}
+
+        async def test_by_group(
+            self,
+            authenticated_client: Tuple[AsyncClient, User],
+            session: AsyncSession,
+            create_list,
+            create_group,
+        ):
+            client, current_user = authenticated_client
+            group = await create_group(user_id=current_user.id, title="Group")
+            await create_list(
+                user_id=current_user.id, title="List 1", group_id=group.id
+            )
+            list2 = await create_list(user_id=current_user.id, title="List 2")
+
+            response = await client.request(
+                "DELETE", "/lists/bulk", json={"group_id": group.id}
+            )
+
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json() == {"deleted": 1}
+            lists = await TaskList.all(session, user_id=current_user.id, load=())
+            assert {lst.id for lst in lists} == {list2.id}
+
+        async def test_empty_selection(
+            self, authenticated_client: Tuple[AsyncClient, User]
+        ):
+            client, _ = authenticated_client
+
+            response = await client.request("DELETE", "/lists/bulk", json={})
+
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
 class TestDeleteList:
-    def test_unauthenticated(self, client: TestClient):
-        response = client.delete("/lists/1")
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.delete("/lists/1")
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
     class TestAuthenticated:
-        def test_success(
+        async def test_success(
             self,
-            authenticated_client: Tuple[TestClient, User],
-            session: Session,
+            authenticated_client: Tuple[AsyncClient, User],
+            session: AsyncSession,
             create_list,
         ):
             client, current_user = authenticated_client
 
-            lst = create_list(user_id=current_user.id, title="List title")
+            lst = await create_list(user_id=current_user.id, title="List title")
 
-            response = client.delete(f"/lists/{lst.id}")
+            response = await client.delete(f"/lists/{lst.id}")
 
             assert (
-                TaskList.find_by(session, user_id=current_user.id, obj_id=lst.id)
+                await TaskList.find_by(session, user_id=current_user.id, obj_id=lst.id)
                 is None
             )
             assert response.status_code == status.HTTP_204_NO_CONTENT
 
-        def test_belongs_to_another_user(
+        async def test_belongs_to_another_user(
             self,
-            authenticated_client: Tuple[TestClient, User],
-            session: Session,
+            authenticated_client: Tuple[AsyncClient, User],
+            session: AsyncSession,
             create_list,
             create_user,
         ):
             client, _current_user = authenticated_client
 
-            user = create_user(email="user2@example.com", username="user2")
-            lst = create_list(user_id=user.id, title="List title")
+            user = await create_user(email="user2@example.com", username="user2")
+            lst = await create_list(user_id=user.id, title="List title")
 
-            response = client.delete(f"/lists/{lst.id}")
+            response = await client.delete(f"/lists/{lst.id}")
 
-            assert TaskList.find_by(session, user_id=user.id, obj_id=lst.id) is not None
+            assert (
+                await TaskList.find_by(session, user_id=user.id, obj_id=lst.id)
+                is not None
+            )
             assert response.status_code == status.HTTP_404_NOT_FOUND
             assert response.json() == {"detail": "Not found"}
@@ -0,0 +1,105 @@
+from typing import Tuple
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from todoapp.models import Task, TaskList, User
+
+
+class TestSync:
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.get("/sync")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    async def test_full_sync(
+        self,
+        authenticated_client: Tuple[AsyncClient, User],
+        create_user,
+        create_group,
+        create_list,
+        create_task,
+    ):
+        client, current_user = authenticated_client
+        another_user = await create_user(
+            email="another-user@example.com", username="another-user"
+        )
+        group = await create_group(user_id=current_user.id, title="Group")
+        lst = await create_list(
+            user_id=current_user.id, title="List", group_id=group.id
+        )
+        task = await create_task(user_id=current_user.id, title="Task")
+        await create_task(user_id=another_user.id, title="Other task")
+
+        response = await client.get("/sync")
+
+        assert response.status_code == status.HTTP_200_OK
+        json_response = response.json()
+        assert json_response["cursor"] == 3
+        assert [obj["id"] for obj in json_response["groups"]] == [group.id]
+        assert [obj["id"] for obj in json_response["lists"]] == [lst.id]
+        assert [obj["id"] for obj in json_response["tasks"]] == [task.id]
+        assert json_response["tasks"][0]["title"] == "Task"
+        assert json_response["deleted"] == {"groups": [], "lists": [], "tasks": []}
+
+    async def test_delta_sync(
+        self,
+        authenticated_client: Tuple[AsyncClient, User],
+        session: AsyncSession,
+        query_budget,
+        create_list,
+        create_task,
+    ):
+        client, current_user = authenticated_client
+        lst = await create_list(user_id=current_user.id, title="List")
+        unchanged = await create_task(user_id=current_user.id, title="Unchanged")
+        updated = await create_task(user_id=current_user.id, title="Updated")
+        deleted = await create_task(
+            user_id=current_user.id, title="Deleted", list_id=lst.id
+        )
+        cursor = (await client.get("/sync")).json()["cursor"]
+
+        await Task.update_by(session, updated.id, current_user.id, completed=True)
+        created = await create_task(user_id=current_user.id, title="Created")
+        await TaskList.delete_where(session, current_user.id)
+
+        # The cursor, the three tables and the tombstones
+        with query_budget(5):
+            response = await client.get("/sync", params={"since": cursor})
+
+        json_response = response.json()
+        assert json_response["cursor"] == cursor + 4
+        assert json_response["groups"] == []
+        assert json_response["lists"] == []
+        assert [obj["id"] for obj in json_response["tasks"]] == [
+            updated.id,
+            created.id,
+        ]
+        assert json_response["tasks"][0]["completed"] is True
+        assert unchanged.id not in [obj["id"] for obj in json_response["tasks"]]
+        assert json_response["deleted"] == {
+            "groups": [],
+            "lists": [lst.id],
+            "tasks": [deleted.id],
+        }
+
+        response = await client.get("/sync", params={"since": json_response["cursor"]})
+        assert response.json() == {
+            "cursor": json_response["cursor"],
+            "groups": [],
+            "lists": [],
+            "tasks": [],
+            "deleted": {"groups": [], "lists": [], "tasks": []},
+        }
+
+    @pytest.mark.parametrize("since", [-1, 2**63])
+    async def test_invalid_cursor(
+        self, authenticated_client: Tuple[AsyncClient, User], since: int
+    ):
+        client, _current_user = authenticated_client
+
+        response = await client.get("/sync", params={"since": since})
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -1,103 +1,579 @@
-from datetime import date
+from datetime import UTC, date, datetime, timedelta
 from typing import Tuple
+from zoneinfo import ZoneInfo
 
+import pytest
 from fastapi import status
-from fastapi.testclient import TestClient
-from sqlmodel import Session
+from httpx import AsyncClient
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from todoapp.api.pagination import encode_cursor
 from todoapp.models import Task, User
 
 
 class TestReadTasks:
-    def test_unauthenticated(self, client: TestClient):
-        response = client.get("/tasks")
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.get("/tasks")
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
         assert response.json() == {"detail": "Not authenticated"}
 
-    def test_authenticated_success(
-        self, authenticated_client: Tuple[TestClient, User], create_task, create_user
+    async def test_authenticated_success(
+        self,
+        authenticated_client: Tuple[AsyncClient, User],
+        create_task,
+        create_user,
+        render,
     ):
         client, current_user = authenticated_client
 
-        another_user = create_user(
+        another_user = await create_user(
             email="another-user@example.com", username="another-user"
         )
-        task1 = create_task(user_id=current_user.id, title="Task 1")
-        task2 = create_task(user_id=current_user.id, title="Task 2", completed=True)
-        create_task(user_id=another_user.id, title="Task 3")
+        task1 = await create_task(user_id=current_user.id, title="Task 1")
+        task2 = await create_task(
+            user_id=current_user.id, title="Task 2", completed=True
+        )
+        await create_task(user_id=another_user.id, title="Task 3")
 
-        response = client.get("/tasks")
+        response = await client.get("/tasks")
 
         assert response.status_code == status.HTTP_200_OK
         assert response.json() == {
             "tasks": [
-                task1.model_dump(),
-                task2.model_dump(),
+                render(task1),
+                render(task2),
+            ],
+            "limit": 100,
+            "next_cursor": None,
+        }
+
+    async def test_paginated(
+        self, authenticated_client: Tuple[AsyncClient, User], create_task
+    ):
+        client, current_user = authenticated_client
+        ids = [
+            (await create_task(user_id=current_user.id, title=f"Task {i}")).id
+            for i in range(5)
+        ]
+
+        response = await client.get("/tasks", params={"limit": 2})
+        json_response = response.json()
+        assert [obj["id"] for obj in json_response["tasks"]] == ids[:2]
+        assert json_response["limit"] == 2
+        assert json_response["next_cursor"] is not None
+
+        response = await client.get(
+            "/tasks", params={"limit": 2, "cursor": json_response["next_cursor"]}
+        )
+        json_response = response.json()
+        assert [obj["id"] for obj in json_response["tasks"]] == ids[2:4]
+
+        response = await client.get(
+            "/tasks", params={"limit": 2, "cursor": json_response["next_cursor"]}
+        )
+        json_response = response.json()
+        assert [obj["id"] for obj in json_response["tasks"]] == ids[4:]
+        assert json_response["next_cursor"] is None
+
+    @pytest.mark.parametrize(
+        "cursor",
+        [
+            "not-a-cursor",
+            "eyJpZCI6ImEifQ",
+            # An ID larger than a SQLite INTEGER
+            "eyJpZCI6MTAwMDAwMDAwMDAwMDAwMDAwMDAwfQ",
+        ],
+    )
+    async def test_invalid_cursor(
+        self, authenticated_client: Tuple[AsyncClient, User], cursor
+    ):
+        client, _ = authenticated_client
+
+        response = await client.get("/tasks", params={"cursor": cursor})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {"detail": "Invalid cursor"}
+
+    @pytest.mark.parametrize(
+        "params, expected_titles",
+        [
+            ({"completed": True}, ["Done"]),
+            ({"completed": False}, ["Listed", "Due soon", "Due later"]),
+            ({"due_from": "2025-01-10"}, ["Due later"]),
+            ({"due_to": "2025-01-10"}, ["Done", "Due soon"]),
+            ({"due_from": "2025-01-01", "due_to": "2025-01-10"}, ["Due soon"]),
+        ],
+    )
+    async def test_filters(
+        self,
+        authenticated_client: Tuple[AsyncClient, User],
+        create_task,
+        params,
+        expected_titles,
+    ):
+        client, current_user = authenticated_client
+        await create_task(
+            user_id=current_user.id,
+            title="Done",
+            completed=True,
+            due_date=date(2024, 12, 31),
+        )
+        await create_task(user_id=current_user.id, title="Listed")
+        await create_task(
+            user_id=current_user.id, title="Due soon", due_date=date(2025, 1, 5)
+        )
+        await create_task(
+            user_id=current_user.id, title="Due later", due_date=date(2025, 2, 1)
+        )
+
+        response = await client.get("/tasks", params=params)
+
+        assert response.status_code == status.HTTP_200_OK
+        titles = [task["title"] for task in response.json()["tasks"]]
+        assert titles == expected_titles
+
+    async def test_filter_by_list_id(
+        self, authenticated_client: Tuple[AsyncClient, User], create_task, create_list
+    ):
+        client, current_user = authenticated_client
+        lst = await create_list(user_id=current_user.id, title="List")
+        task = await create_task(
+            user_id=current_user.id, list_id=lst.id, title="In list"
+        )
+        await create_task(user_id=current_user.id, title="Without list")
+
+        response = await client.get("/tasks", params={"list_id": lst.id})
+
+        assert [t["id"] for t in response.json()["tasks"]] == [task.id]
+
+    @pytest.mark.parametrize(
+        "sort, expected_titles",
+        [
+            ("due_date", ["No date 1", "No date 2", "Jan", "Feb 1", "Feb 2"]),
+            ("-due_date", ["Feb 2", "Feb 1", "Jan", "No date 2", "No date 1"]),
+            ("-created_at", ["Feb 2", "No date 2", "Jan", "No date 1", "Feb 1"]),
+        ],
+    )
+    async def test_sorted_pages(
+        self,
+        authenticated_client: Tuple[AsyncClient, User],
+        create_task,
+        sort,
+        expected_titles,
+    ):
+        client, current_user = authenticated_client
+        for title, due_date in [
+            ("Feb 1", date(2025, 2, 1)),
+            ("No date 1", None),
+            ("Jan", date(2025, 1, 1)),
+            ("No date 2", None),
+            ("Feb 2", date(2025, 2, 1)),
+        ]:
+            await create_task(user_id=current_user.id, title=title, due_date=due_date)
+
+        titles = []
+        params = {"sort": sort, "limit": 2}
+        while True:
+            response = await client.get("/tasks", params=params)
+            assert response.status_code == status.HTTP_200_OK
+            json_response = response.json()
+            titles += [task["title"] for task in json_response["tasks"]]
+            if json_response["next_cursor"] is None:
+                break
+            params["cursor"] = json_response["next_cursor"]
+
+        assert titles == expected_titles
+
+    async def test_cursor_of_another_sort(
+        self, authenticated_client: Tuple[AsyncClient, User], create_task
+    ):
+        client, current_user = authenticated_client
+        for i in range(3):
+            await create_task(user_id=current_user.id, title=f"Task {i}")
+
+        response = await client.get("/tasks", params={"sort": "due_date", "limit": 1})
+        cursor = response.json()["next_cursor"]
+        response = await client.get("/tasks", params={"cursor": cursor})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {"detail": "Invalid cursor"}
+
+    async def test_query_budget(
+        self,
+        query_budget,
+        authenticated_client: Tuple[AsyncClient, User],
+        create_task,
+        create_list,
+    ):
+        client, current_user = authenticated_client
+        for i in range(3):
+            lst = await create_list(user_id=current_user.id, title=f"List {i}")
+            await create_task(user_id=current_user.id, list_id=lst.id, title="Task")
+
+        # The change version for the ETag, then tasks joined with their lists
+        with query_budget(2):
+            response = await client.get("/tasks")
+
+        assert len(response.json()["tasks"]) == 3
+
+    async def test_etag(
+        self,
+        authenticated_client: Tuple[AsyncClient, User],
+        query_budget,
+        create_task,
+    ):
+        client, current_user = authenticated_client
+        await create_task(user_id=current_user.id, title="Task 1")
+
+        response = await client.get("/tasks")
+        etag = response.headers["ETag"]
+
+        # Only the change version is read for an unchanged resource
+        with query_budget(1):
+            response = await client.get("/tasks", headers={"If-None-Match": etag})
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.headers["ETag"] == etag
+        assert response.content == b""
+
+        response = await client.get(
+            "/tasks", params={"limit": 1}, headers={"If-None-Match": etag}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["ETag"] != etag
+
+        await create_task(user_id=current_user.id, title="Task 2")
+
+        response = await client.get(
+            "/tasks", headers={"If-None-Match": f'"other", W/{etag}'}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()["tasks"]) == 2
+        assert response.headers["ETag"] != etag
+
+
+class TestReadAgenda:
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.get("/tasks/agenda")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    class TestAuthenticated:
+        async def test_success(
+            self,
+            query_budget,
+            authenticated_client: Tuple[AsyncClient, User],
+            create_user,
+            create_task,
+            render,
+        ):
+            client, current_user = authenticated_client
+            user = await create_user(email="user2@example.com", username="user2")
+            today = datetime.now(ZoneInfo("Pacific/Kiritimati")).date()
+
+            def due(days):
+                return today + timedelta(days=days)
+
+            overdue = await create_task(
+                user_id=current_user.id, title="Overdue", due_date=due(-30)
+            )
+            await create_task(
+                user_id=current_user.id, title="Done", due_date=due(-1), completed=True
+            )
+            due_today = await create_task(
+                user_id=current_user.id, title="Today", due_date=due(0)
+            )
+            soon1 = await create_task(
+                user_id=current_user.id, title="Soon 1", due_date=due(3)
+            )
+            soon2 = await create_task(
+                user_id=current_user.id, title="Soon 2", due_date=due(3)
+            )
+            later = await create_task(
+                user_id=current_user.id, title="Later", due_date=due(7)
+            )
+            await create_task(
+                user_id=current_user.id, title="Too late", due_date=due(8)
+            )
+            await create_task(user_id=current_user.id, title="Someday")
+            await create_task(user_id=user.id, title="Another user", due_date=due(0))
+
+            with query_budget(3):
+                response = await client.get(
+                    "/tasks/agenda", params={"tz": "Pacific/Kiritimati"}
+                )
+
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json() == {
+                "date": str(today),
+                "tz": "Pacific/Kiritimati",
+                "limit": 100,
+                "overdue": [{"date": str(due(-30)), "tasks": [render(overdue)]}],
+                "today": [{"date": str(today), "tasks": [render(due_today)]}],
+                "upcoming": [
+                    {
+                        "date": str(due(3)),
+                        "tasks": [render(soon1), render(soon2)],
+                    },
+                    {"date": str(due(7)), "tasks": [render(later)]},
+                ],
+            }
+
+        async def test_days_and_limit(
+            self, authenticated_client: Tuple[AsyncClient, User], create_task
+        ):
+            client, current_user = authenticated_client
+            today = datetime.now(UTC).date()
+            for days in (1, 1, 2, 3):
+                await create_task(
+                    user_id=current_user.id,
+                    title="Task",
+                    due_date=today + timedelta(days=days),
+                )
+
+            response = await client.get("/tasks/agenda", params={"days": 2, "limit": 2})
+
+            upcoming = response.json()["upcoming"]
+            assert [day["date"] for day in upcoming] == [str(today + timedelta(days=1))]
+            assert len(upcoming[0]["tasks"]) == 2
+
+        async def test_unknown_timezone(
+            self, authenticated_client: Tuple[AsyncClient, User]
+        ):
+            client, _ = authenticated_client
+
+            response = await client.get("/tasks/agenda", params={"tz": "Mars/Base"})
+
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+            assert response.json()["detail"][0]["loc"] == ["query", "tz"]
+
+
+class TestSearchTasks:
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.get("/tasks/search", params={"q": "task"})
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    class TestAuthenticated:
+        async def test_success(
+            self,
+            authenticated_client: Tuple[AsyncClient, User],
+            create_user,
+            create_task,
+            render,
+        ):
+            client, current_user = authenticated_client
+            user = await create_user(email="user2@example.com", username="user2")
+            in_note = await create_task(
+                user_id=current_user.id, title="Shopping", note="Buy milk"
+            )
+            in_title = await create_task(user_id=current_user.id, title="Milk the cow")
+            await create_task(user_id=current_user.id, title="Walk the dog")
+            await create_task(user_id=user.id, title="Milk for user2")
+
+            response = await client.get("/tasks/search", params={"q": "MILK"})
+
+            assert response.status_code == status.HTTP_200_OK
+            # Title matches rank above note matches
+            assert response.json() == {
+                "tasks": [render(in_title), render(in_note)],
+                "limit": 100,
+                "next_cursor": None,
+            }
+
+        async def test_prefix(
+            self, authenticated_client: Tuple[AsyncClient, User], create_task
+        ):
+            client, current_user = authenticated_client
+            task = await create_task(user_id=current_user.id, title="Groceries")
+
+            response = await client.get("/tasks/search", params={"q": "groc"})
+            assert response.json()["tasks"] == []
+
+            response = await client.get("/tasks/search", params={"q": "groc*"})
+            assert [obj["id"] for obj in response.json()["tasks"]] == [task.id]
+
+        async def test_operators_are_searched_literally(
+            self, authenticated_client: Tuple[AsyncClient, User], create_task
+        ):
+            client, current_user = authenticated_client
+            await create_task(user_id=current_user.id, title="Cats and dogs")
+
+            response = await client.get("/tasks/search", params={"q": 'cats OR "birds'})
+
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json()["tasks"] == []
+
+        async def test_follows_updates(
+            self,
+            authenticated_client: Tuple[AsyncClient, User],
+            session: AsyncSession,
+            create_task,
+        ):
+            client, current_user = authenticated_client
+            task = await create_task(user_id=current_user.id, title="Old title")
+            deleted = await create_task(user_id=current_user.id, title="New title")
+            await Task.update_by(session, task.id, current_user.id, title="New title")
+            await deleted.destroy(session)
+
+            response = await client.get("/tasks/search", params={"q": "old"})
+            assert response.json()["tasks"] == []
+
+            response = await client.get("/tasks/search", params={"q": "new"})
+            assert [obj["id"] for obj in response.json()["tasks"]] == [task.id]
+
+        async def test_paginated(
+            self, authenticated_client: Tuple[AsyncClient, User], create_task
+        ):
+            client, current_user = authenticated_client
+            ids = [
+                (await create_task(user_id=current_user.id, title=f"Task {i}")).id
+                for i in range(5)
             ]
+
+            found = []
+            cursor = None
+            for _ in range(3):
+                params = {"q": "task", "limit": 2}
+                if cursor:
+                    params["cursor"] = cursor
+                response = await client.get("/tasks/search", params=params)
+                json_response = response.json()
+                found += [obj["id"] for obj in json_response["tasks"]]
+                cursor = json_response["next_cursor"]
+
+            assert found == ids
+            assert cursor is None
+
+        @pytest.mark.parametrize(
+            "cursor",
+            [
+                encode_cursor(Task(id=1), "id"),
+                encode_cursor(Task(id=1), "rank", 10**20),
+            ],
+        )
+        async def test_invalid_cursor(
+            self, authenticated_client: Tuple[AsyncClient, User], cursor
+        ):
+            client, _ = authenticated_client
+
+            response = await client.get(
+                "/tasks/search", params={"q": "task", "cursor": cursor}
+            )
+
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        async def test_empty_query(
+            self, authenticated_client: Tuple[AsyncClient, User]
+        ):
+            client, _ = authenticated_client
+
+            response = await client.get("/tasks/search", params={"q": ""})
+
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+class TestReadTasksSummary:
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.get("/tasks/summary")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    async def test_success(
+        self,
+        authenticated_client: Tuple[AsyncClient, User],
+        create_user,
+        create_task,
+    ):
+        client, current_user = authenticated_client
+        user = await create_user(email="user2@example.com", username="user2")
+        await create_task(user_id=current_user.id, title="Task 1")
+        await create_task(user_id=current_user.id, title="Task 2", completed=True)
+        await create_task(
+            user_id=current_user.id, title="Task 3", due_date=date(2000, 1, 1)
+        )
+        await create_task(user_id=user.id, title="Task 4", due_date=date(2000, 1, 1))
+
+        response = await client.get("/tasks/summary")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            "total_tasks": 3,
+            "completed_tasks": 1,
+            "overdue_tasks": 1,
         }
 
 
 class TestReadSingleTask:
-    def test_unauthenticated(self, client: TestClient):
-        response = client.get("/tasks/1")
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.get("/tasks/1")
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
         assert response.json() == {"detail": "Not authenticated"}
 
     class TestAuthenticated:
-        def test_success(self, authenticated_client: TestClient, create_task):
+        async def test_success(
+            self, authenticated_client: AsyncClient, create_task, render
+        ):
             client, current_user = authenticated_client
 
-            task = create_task(user_id=current_user.id, title="Task 1")
+            task = await create_task(user_id=current_user.id, title="Task 1")
 
-            response = client.get(f"/tasks/{task.id}")
+            response = await client.get(f"/tasks/{task.id}")
 
             assert response.status_code == status.HTTP_200_OK
-            assert response.json() == task.model_dump()
+            assert response.json() == render(task)
 
-        def test_task_does_not_exist(
+        async def test_task_does_not_exist(
             self,
-            authenticated_client: TestClient,
+            authenticated_client: AsyncClient,
         ):
             client, _ = authenticated_client
 
-            response = client.get("/tasks/1")
+            response = await client.get("/tasks/1")
 
             assert response.status_code == status.HTTP_404_NOT_FOUND
             assert response.json() == {"detail": "Not found"}
 
-        def test_belongs_to_another_user(
-            self, authenticated_client: TestClient, create_task, create_user
+        async def test_belongs_to_another_user(
+            self, authenticated_client: AsyncClient, create_task, create_user
         ):
             client, _ = authenticated_client
 
-            user = create_user(
+            user = await create_user(
                 email="another-user@example.com", username="another-user"
             )
-            task = create_task(user_id=user.id, title="Another user task")
+            task = await create_task(user_id=user.id, title="Another user task")
 
-            response = client.get(f"/tasks/{task.id}")
+            response = await client.get(f"/tasks/{task.id}")
 
             assert response.status_code == status.HTTP_404_NOT_FOUND
             assert response.json() == {"detail": "Not found"}
 
 
 class TestCreateTask:
-    def test_unauthenticated(self, client: TestClient):
-        response = client.post("/tasks", json={"title": "New task"})
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.post("/tasks", json={"title": "New task"})
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
         assert response.json() == {"detail": "Not authenticated"}
 
     class TestAuthenticated:
-        def test_success(self, authenticated_client: TestClient, session: Session):
+        async def test_success(
+            self,
+            query_budget,
+            authenticated_client: AsyncClient,
+            session: AsyncSession,
+            render,
+        ):
             client, current_user = authenticated_client
-            response = client.post(
-                "/tasks", json={"title": "New task", "note": "Task note"}
-            )
+            with query_budget(2):
+                response = await client.post(
+                    "/tasks", json={"title": "New task", "note": "Task note"}
+                )
 
-            task = Task.all(session, user_id=current_user.id)[0]
+            task = (await Task.all(session, user_id=current_user.id))[0]
 
             assert task is not None
             assert task.user_id == current_user.id
@@ -105,39 +581,40 @@ class TestCreateTask:
             assert task.title == "New task"
             assert task.note == "Task note"
             assert response.status_code == status.HTTP_201_CREATED
-            assert response.json() == task.model_dump()
+            assert response.json() == render(task)
 
-        def test_with_due_date_success(
-            self, authenticated_client: TestClient, session: Session
+        async def test_with_due_date_success(
+            self, authenticated_client: AsyncClient, session: AsyncSession, render
         ):
             client, current_user = authenticated_client
-            response = client.post(
+            response = await client.post(
                 "/tasks", json={"title": "New task", "due_date": "2015-01-06"}
             )
 
-            task = Task.all(session, user_id=current_user.id)[0]
+            task = (await Task.all(session, user_id=current_user.id))[0]
 
             assert task is not None
             assert task.user_id == current_user.id
             assert task.title == "New task"
             assert task.due_date == date(2015, 1, 6)
             assert response.status_code == status.HTTP_201_CREATED
-            assert response.json() == task.model_dump()
+            assert response.json() == render(task)
 
-        def test_with_list_id_success(
+        async def test_with_list_id_success(
             self,
-            authenticated_client: Tuple[TestClient, User],
-            session: Session,
+            authenticated_client: Tuple[AsyncClient, User],
+            session: AsyncSession,
             create_list,
+            render,
         ):
             client, current_user = authenticated_client
-            lst = create_list(user_id=current_user.id, title="List 1")
+            lst = await create_list(user_id=current_user.id, title="List 1")
 
-            response = client.post(
+            response = await client.post(
                 "/tasks", json={"title": "New task", "list_id": lst.id}
             )
 
-            tasks = Task.all(session, user_id=current_user.id)
+            tasks = await Task.all(session, user_id=current_user.id)
 
             assert len(tasks) == 1
             task = tasks[0]
@@ -146,16 +623,16 @@ class TestCreateTask:
             assert task.list_id == lst.id
             assert response.status_code == status.HTTP_201_CREATED
             json_response = response.json()
-            assert json_response == task.model_dump()
+            assert json_response == render(task)
             assert json_response["task_list"] == {"id": lst.id, "title": lst.title}
 
-        def test_with_invalid_title(
-            self, authenticated_client: TestClient, session: Session
+        async def test_with_invalid_title(
+            self, authenticated_client: AsyncClient, session: AsyncSession
         ):
             client, current_user = authenticated_client
-            response = client.post("/tasks", json={"title": ""})
+            response = await client.post("/tasks", json={"title": ""})
 
-            tasks = Task.all(session, user_id=current_user.id)
+            tasks = await Task.all(session, user_id=current_user.id)
 
             assert len(tasks) == 0
             assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -166,15 +643,15 @@ class TestCreateTask:
                 == "String should have at least 3 characters"
             )
 
-        def test_with_invalid_due_date(
-            self, authenticated_client: TestClient, session: Session
+        async def test_with_invalid_due_date(
+            self, authenticated_client: AsyncClient, session: AsyncSession
         ):
             client, current_user = authenticated_client
-            response = client.post(
+            response = await client.post(
                 "/tasks", json={"title": "New task", "due_date": "Invalid"}
             )
 
-            tasks = Task.all(session, user_id=current_user.id)
+            tasks = await Task.all(session, user_id=current_user.id)
 
             assert len(tasks) == 0
             assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -185,156 +662,505 @@ class TestCreateTask:
                 == "Value error, Invalid date format. Please use YYYY-MM-DD."
             )
 
-        def test_with_list_id_of_another_user(
+        async def test_with_list_id_of_another_user(
             self,
-            authenticated_client: Tuple[TestClient, User],
-            session: Session,
+            authenticated_client: Tuple[AsyncClient, User],
+            session: AsyncSession,
             create_user,
             create_list,
+            render,
         ):
             client, current_user = authenticated_client
 
-            user = create_user(email="user2@example.com", username="user2")
-            lst = create_list(user_id=user.id, title="Another user list")
+            user = await create_user(email="user2@example.com", username="user2")
+            lst = await create_list(user_id=user.id, title="Another user list")
 
-            response = client.post(
+            response = await client.post(
                 "/tasks", json={"title": "New task", "list_id": lst.id}
             )
 
-            tasks = Task.all(session, user_id=current_user.id)
+            tasks = await Task.all(session, user_id=current_user.id)
 
             assert len(tasks) == 1
             task = tasks[0]
             assert response.status_code == status.HTTP_201_CREATED
             json_response = response.json()
-            assert json_response == task.model_dump()
+            assert json_response == render(task)
             assert json_response["title"] == "New task"
             assert json_response["task_list"] is None
 
 
-class TestUpdateTask:
-    def test_unauthenticated(self, client: TestClient):
-        response = client.patch("/tasks/1", json={"title": "Updated title"})
+class TestBulkCreateTasks:
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.post("/tasks/bulk", json={"tasks": []})
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json() == {"detail": "Not authenticated"}
+
+    class TestAuthenticated:
+        async def test_success(
+            self,
+            query_budget,
+            authenticated_client: Tuple[AsyncClient, User],
+            session: AsyncSession,
+            create_user,
+            create_list,
+        ):
+            client, current_user = authenticated_client
+            lst = await create_list(user_id=current_user.id, title="List")
+            user = await create_user(email="user2@example.com", username="user2")
+            another_list = await create_list(user_id=user.id, title="Another list")
+
+            with query_budget(2):
+                response = await client.post(
+                    "/tasks/bulk",
+                    json={
+                        "tasks": [
+                            {"title": "Task 1", "list_id": lst.id},
+                            {"title": "Task 2", "due_date": "2025-01-06"},
+                            {"title": "Task 3", "list_id": another_list.id},
+                            {"title": "Task 4", "note": "Note", "completed": True},
+                        ]
+                    },
+                )
+
+            assert response.status_code == status.HTTP_201_CREATED
+            tasks = sorted(
+                await Task.all(session, user_id=current_user.id), key=lambda t: t.id
+            )
+            assert response.json() == {"ids": [task.id for task in tasks]}
+            assert [task.title for task in tasks] == [
+                "Task 1",
+                "Task 2",
+                "Task 3",
+                "Task 4",
+            ]
+            assert [task.list_id for task in tasks] == [lst.id, None, None, None]
+            assert tasks[1].due_date == date(2025, 1, 6)
+            assert tasks[3].note == "Note"
+            assert tasks[3].completed
+            assert not tasks[0].completed
+            assert tasks[0].created_at is not None
+
+        async def test_null_fields(
+            self, authenticated_client: Tuple[AsyncClient, User], session: AsyncSession
+        ):
+            client, current_user = authenticated_client
+            item = {"title": "Task", "note": None, "completed": None, "list_id": None}
+
+            single = await client.post("/tasks/", json=item)
+            response = await client.post("/tasks/bulk", json={"tasks": [item]})
+
+            assert single.status_code == status.HTTP_201_CREATED
+            assert response.status_code == status.HTTP_201_CREATED
+            [task_id] = response.json()["ids"]
+            task = await Task.find_by(session, obj_id=task_id, user_id=current_user.id)
+            assert (task.note, task.completed, task.list_id) == (
+                single.json()["note"],
+                single.json()["completed"],
+                None,
+            )
+            assert (task.note, task.completed) == ("", False)
+
+        async def test_invalid_item(
+            self, authenticated_client: Tuple[AsyncClient, User], session: AsyncSession
+        ):
+            client, current_user = authenticated_client
+
+            response = await client.post(
+                "/tasks/bulk",
+                json={"tasks": [{"title": "Task 1"}, {"title": ""}]},
+            )
+
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+            json_response = response.json()
+            assert json_response["detail"][0]["loc"] == ["body", "tasks", 1, "title"]
+            assert await Task.all(session, user_id=current_user.id) == []
+
+        async def test_empty(self, authenticated_client: Tuple[AsyncClient, User]):
+            client, _ = authenticated_client
+
+            response = await client.post("/tasks/bulk", json={"tasks": []})
+
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+class TestBulkUpdateTasks:
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.patch(
+            "/tasks/bulk",
+            json={"where": {"ids": [1]}, "changes": {"completed": True}},
+        )
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
         assert response.json() == {"detail": "Not authenticated"}
 
     class TestAuthenticated:
-        def test_success(
-            self, authenticated_client: TestClient, session: Session, create_task
+        async def test_by_ids(
+            self,
+            query_budget,
+            authenticated_client: Tuple[AsyncClient, User],
+            create_user,
+            create_task,
+            reload,
+        ):
+            client, current_user = authenticated_client
+            task1 = await create_task(user_id=current_user.id, title="Task 1")
+            task2 = await create_task(user_id=current_user.id, title="Task 2")
+            task3 = await create_task(user_id=current_user.id, title="Task 3")
+            user = await create_user(email="user2@example.com", username="user2")
+            another_task = await create_task(user_id=user.id, title="Another task")
+
+            with query_budget(2):
+                response = await client.patch(
+                    "/tasks/bulk",
+                    json={
+                        "where": {"ids": [task1.id, task3.id, another_task.id]},
+                        "changes": {"completed": True},
+                    },
+                )
+
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json() == {"updated": 2}
+            for task in (task1, task2, task3, another_task):
+                await reload(task)
+            assert task1.completed
+            assert not task2.completed
+            assert task3.completed
+            assert not another_task.completed
+            assert task1.updated_at > task2.updated_at
+
+        async def test_by_filters(
+            self,
+            authenticated_client: Tuple[AsyncClient, User],
+            create_task,
+            create_list,
+            reload,
+        ):
+            client, current_user = authenticated_client
+            lst = await create_list(user_id=current_user.id, title="List")
+            overdue = await create_task(
+                user_id=current_user.id,
+                title="Overdue",
+                list_id=lst.id,
+                due_date=date(2025, 1, 1),
+            )
+            upcoming = await create_task(
+                user_id=current_user.id,
+                title="Upcoming",
+                list_id=lst.id,
+                due_date=date(2025, 2, 1),
+            )
+            elsewhere = await create_task(
+                user_id=current_user.id, title="Elsewhere", due_date=date(2025, 1, 1)
+            )
+
+            response = await client.patch(
+                "/tasks/bulk",
+                json={
+                    "where": {"list_id": lst.id, "due_before": "2025-02-01"},
+                    "changes": {"due_date": "2025-03-01"},
+                },
+            )
+
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json() == {"updated": 1}
+            for task in (overdue, upcoming, elsewhere):
+                await reload(task)
+            assert overdue.due_date == date(2025, 3, 1)
+            assert upcoming.due_date == date(2025, 2, 1)
+            assert elsewhere.due_date == date(2025, 1, 1)
+
+        async def test_move_to_list(
+            self,
+            authenticated_client: Tuple[AsyncClient, User],
+            create_task,
+            create_list,
+            reload,
+        ):
+            client, current_user = authenticated_client
+            lst = await create_list(user_id=current_user.id, title="List")
+            task = await create_task(user_id=current_user.id, title="Task")
+
+            response = await client.patch(
+                "/tasks/bulk",
+                json={"where": {"ids": [task.id]}, "changes": {"list_id": lst.id}},
+            )
+
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json() == {"updated": 1}
+            await reload(task)
+            assert task.list_id == lst.id
+
+        async def test_list_of_another_user(
+            self,
+            authenticated_client: Tuple[AsyncClient, User],
+            create_user,
+            create_task,
+            create_list,
+            reload,
         ):
             client, current_user = authenticated_client
-            task = create_task(user_id=current_user.id, title="Task title")
+            user = await create_user(email="user2@example.com", username="user2")
+            another_list = await create_list(user_id=user.id, title="Another list")
+            task = await create_task(user_id=current_user.id, title="Task")
 
-            response = client.patch(
-                f"/tasks/{task.id}",
+            response = await client.patch(
+                "/tasks/bulk",
                 json={
-                    "title": "Updated title",
-                    "completed": True,
-                    "note": "Updated note",
-                    "due_date": "2025-01-07",
+                    "where": {"ids": [task.id]},
+                    "changes": {"list_id": another_list.id},
                 },
             )
 
-            updated_task = Task.find_by(
+            assert response.status_code == status.HTTP_404_NOT_FOUND
+            assert response.json() == {"detail": "Not found"}
+            await reload(task)
+            assert task.list_id is None
+
+        async def test_empty_selection(
+            self, authenticated_client: Tuple[AsyncClient, User]
+        ):
+            client, _ = authenticated_client
+
+            response = await client.patch(
+                "/tasks/bulk",
+                json={"where": {}, "changes": {"completed": True}},
+            )
+
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+        async def test_empty_changes(
+            self, authenticated_client: Tuple[AsyncClient, User]
+        ):
+            client, _ = authenticated_client
+
+            response = await client.patch(
+                "/tasks/bulk", json={"where": {"ids": [1]}, "changes": {}}
+            )
+
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+        async def test_null_completed(
+            self, authenticated_client: Tuple[AsyncClient, User]
+        ):
+            client, _ = authenticated_client
+
+            response = await client.patch(
+                "/tasks/bulk",
+                json={"where": {"ids": [1]}, "changes": {"completed": None}},
+            )
+
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+class TestBulkDeleteTasks:
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.request("DELETE", "/tasks/bulk", json={"ids": [1]})
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json() == {"detail": "Not authenticated"}
+
+    class TestAuthenticated:
+        async def test_by_ids(
+            self,
+            query_budget,
+            authenticated_client: Tuple[AsyncClient, User],
+            session: AsyncSession,
+            create_user,
+            create_task,
+        ):
+            client, current_user = authenticated_client
+            task1 = await create_task(user_id=current_user.id, title="Task 1")
+            task2 = await create_task(user_id=current_user.id, title="Task 2")
+            user = await create_user(email="user2@example.com", username="user2")
+            another_task = await create_task(user_id=user.id, title="Another task")
+
+            with query_budget(2):
+                response = await client.request(
+                    "DELETE", "/tasks/bulk", json={"ids": [task1.id, another_task.id]}
+                )
+
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json() == {"deleted": 1}
+            tasks = await Task.all(session)
+            assert {task.id for task in tasks} == {task2.id, another_task.id}
+
+        async def test_by_filters(
+            self,
+            authenticated_client: Tuple[AsyncClient, User],
+            session: AsyncSession,
+            create_task,
+            create_list,
+        ):
+            client, current_user = authenticated_client
+            lst = await create_list(user_id=current_user.id, title="List")
+            await create_task(
+                user_id=current_user.id, title="Done", list_id=lst.id, completed=True
+            )
+            open_task = await create_task(
+                user_id=current_user.id, title="Open", list_id=lst.id
+            )
+            elsewhere = await create_task(
+                user_id=current_user.id, title="Elsewhere", completed=True
+            )
+
+            response = await client.request(
+                "DELETE", "/tasks/bulk", json={"list_id": lst.id, "completed": True}
+            )
+
+            assert response.status_code == status.HTTP_200_OK
+            assert response.json() == {"deleted": 1}
+            tasks = await Task.all(session, user_id=current_user.id)
+            assert {task.id for task in tasks} == {open_task.id, elsewhere.id}
+
+        async def test_empty_selection(
+            self, authenticated_client: Tuple[AsyncClient, User]
+        ):
+            client, _ = authenticated_client
+
+            response = await client.request("DELETE", "/tasks/bulk", json={})
+
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+class TestUpdateTask:
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.patch("/tasks/1", json={"title": "Updated title"})
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json() == {"detail": "Not authenticated"}
+
+    class TestAuthenticated:
+        async def test_success(
+            self,
+            query_budget,
+            authenticated_client: AsyncClient,
+            session: AsyncSession,
+            create_task,
+            render,
+        ):
+            client, current_user = authenticated_client
+            task = await create_task(user_id=current_user.id, title="Task title")
+
+            # A single UPDATE ... RETURNING
+            with query_budget(1):
+                response = await client.patch(
+                    f"/tasks/{task.id}",
+                    json={
+                        "title": "Updated title",
+                        "completed": True,
+                        "note": "Updated note",
+                        "due_date": "2025-01-07",
+                    },
+                )
+
+            updated_task = await Task.find_by(
                 session, user_id=current_user.id, obj_id=task.id
             )
             assert response.status_code == status.HTTP_200_OK
-            assert response.json() == updated_task.model_dump()
+            assert response.json() == render(updated_task)
             assert updated_task.title == "Updated title"
             assert updated_task.note == "Updated note"
             assert updated_task.due_date == date(2025, 1, 7)
             assert updated_task.completed
 
-        def test_only_title(
-            self, authenticated_client: TestClient, session: Session, create_task
+        async def test_only_title(
+            self,
+            authenticated_client: AsyncClient,
+            session: AsyncSession,
+            create_task,
+            render,
         ):
             client, current_user = authenticated_client
-            task = create_task(user_id=current_user.id, title="Task title")
+            task = await create_task(user_id=current_user.id, title="Task title")
 
-            response = client.patch(
+            response = await client.patch(
                 f"/tasks/{task.id}", json={"title": "Updated title"}
             )
 
-            updated_task = Task.find_by(
+            updated_task = await Task.find_by(
                 session, user_id=current_user.id, obj_id=task.id
             )
             assert response.status_code == status.HTTP_200_OK
-            assert response.json() == updated_task.model_dump()
+            assert response.json() == render(updated_task)
             assert updated_task.title == "Updated title"
             assert updated_task.completed == task.completed
 
-        def test_only_list_id(
+        async def test_only_list_id(
             self,
-            authenticated_client: Tuple[TestClient, User],
-            session: Session,
+            authenticated_client: Tuple[AsyncClient, User],
+            session: AsyncSession,
             create_list,
             create_task,
+            render,
         ):
             client, current_user = authenticated_client
-            task = create_task(user_id=current_user.id, title="Task title")
-            lst = create_list(user_id=current_user.id, title="List title")
+            task = await create_task(user_id=current_user.id, title="Task title")
+            lst = await create_list(user_id=current_user.id, title="List title")
 
-            response = client.patch(f"/tasks/{task.id}", json={"list_id": lst.id})
+            response = await client.patch(f"/tasks/{task.id}", json={"list_id": lst.id})
 
-            updated_task = Task.find_by(
+            updated_task = await Task.find_by(
                 session, user_id=current_user.id, obj_id=task.id
             )
             json_response = response.json()
 
             assert response.status_code == status.HTTP_200_OK
-            assert json_response == updated_task.model_dump()
+            assert json_response == render(updated_task)
             assert json_response["task_list"] == {"id": lst.id, "title": lst.title}
             assert updated_task.list_id == lst.id
 
-        def test_another_user_task(
+        async def test_another_user_task(
             self,
-            authenticated_client: TestClient,
-            session: Session,
+            authenticated_client: AsyncClient,
+            session: AsyncSession,
             create_task,
             create_user,
         ):
             client, _ = authenticated_client
-            user = create_user(
+            user = await create_user(
                 email="another-user@example.com", username="another-user"
             )
-            task = create_task(user_id=user.id, title="Another user task")
+            task = await create_task(user_id=user.id, title="Another user task")
 
-            response = client.patch(
+            response = await client.patch(
                 f"/tasks/{task.id}", json={"title": "Updated title"}
             )
 
             assert response.status_code == status.HTTP_404_NOT_FOUND
             assert response.json() == {"detail": "Not found"}
-            task = Task.find_by(session, obj_id=task.id, user_id=user.id)
+            task = await Task.find_by(session, obj_id=task.id, user_id=user.id)
             assert task.title != "Updated title"
 
-        def test_another_user_list(
+        async def test_another_user_list(
             self,
-            authenticated_client: Tuple[TestClient, User],
-            session: Session,
+            authenticated_client: Tuple[AsyncClient, User],
             create_task,
             create_user,
             create_list,
+            reload,
         ):
             client, current_user = authenticated_client
-            task = create_task(user_id=current_user.id, title="Task title")
+            task = await create_task(user_id=current_user.id, title="Task title")
             original_list_id = task.list_id
-            user = create_user(email="user2@example.com", username="user2")
-            lst = create_list(user_id=user.id, title="List 1")
+            user = await create_user(email="user2@example.com", username="user2")
+            lst = await create_list(user_id=user.id, title="List 1")
 
-            response = client.patch(f"/tasks/{task.id}", json={"list_id": lst.id})
+            response = await client.patch(f"/tasks/{task.id}", json={"list_id": lst.id})
 
-            session.refresh(task)
+            await reload(task)
 
             assert response.status_code == status.HTTP_200_OK
             assert task.list_id == original_list_id
 
-        def test_invalid_title(self, authenticated_client: TestClient, create_task):
+        async def test_invalid_title(
+            self, authenticated_client: AsyncClient, create_task
+        ):
             client, current_user = authenticated_client
-            task = create_task(user_id=current_user.id, title="Task title")
+            task = await create_task(user_id=current_user.id, title="Task title")
 
-            response = client.patch(f"/tasks/{task.id}", json={"title": ""})
+            response = await client.patch(f"/tasks/{task.id}", json={"title": ""})
 
             assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
             json_response = response.json()
@@ -346,47 +1172,47 @@ class TestUpdateTask:
 
 
 class TestDeleteTask:
-    def test_unauthenticated(self, client: TestClient):
-        response = client.delete("/tasks/1")
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.delete("/tasks/1")
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
         assert response.json() == {"detail": "Not authenticated"}
 
     class TestAuthenticated:
-        def test_success(
-            self, authenticated_client: TestClient, session: Session, create_task
+        async def test_success(
+            self, authenticated_client: AsyncClient, session: AsyncSession, create_task
         ):
             client, current_user = authenticated_client
-            task = create_task(user_id=current_user.id, title="To delete")
+            task = await create_task(user_id=current_user.id, title="To delete")
 
-            tasks = Task.all(session)
+            tasks = await Task.all(session)
             assert len(tasks) == 1
 
-            response = client.delete(f"/tasks/{task.id}")
+            response = await client.delete(f"/tasks/{task.id}")
 
             assert response.status_code == status.HTTP_204_NO_CONTENT
-            tasks = Task.all(session)
+            tasks = await Task.all(session)
             assert len(tasks) == 0
 
-        def test_another_user_task(
+        async def test_another_user_task(
             self,
-            authenticated_client: TestClient,
-            session: Session,
+            authenticated_client: AsyncClient,
+            session: AsyncSession,
             create_task,
             create_user,
         ):
             client, _ = authenticated_client
-            user = create_user(
+            user = await create_user(
                 email="another-user@example.com", username="another-user"
             )
-            task = create_task(user_id=user.id, title="Another user task")
+            task = await create_task(user_id=user.id, title="Another user task")
 
-            tasks = Task.all(session)
+            tasks = await Task.all(session)
             assert len(tasks) == 1
 
-            response = client.delete(f"/tasks/{task.id}")
+            response = await client.delete(f"/tasks/{task.id}")
 
             assert response.status_code == status.HTTP_404_NOT_FOUND
             assert response.json() == {"detail": "Not found"}
-            tasks = Task.all(session)
+            tasks = await Task.all(session)
             assert len(tasks) == 1
@@ -0,0 +1,271 @@
+import json
+from datetime import date
+from typing import Tuple
+
+from fastapi import status
+from httpx import AsyncClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from todoapp.api import importer
+from todoapp.models import Group, Task, TaskList, User
+from todoapp.security.token import encode_token
+
+
+class TestExport:
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.get("/export")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    async def test_streams_ndjson(
+        self,
+        authenticated_client: Tuple[AsyncClient, User],
+        create_user,
+        create_group,
+        create_list,
+        create_task,
+    ):
+        client, current_user = authenticated_client
+        another_user = await create_user(
+            email="another-user@example.com", username="another-user"
+        )
+        group = await create_group(user_id=current_user.id, title="Group")
+        lst = await create_list(
+            user_id=current_user.id, title="List", group_id=group.id
+        )
+        task1 = await create_task(
+            user_id=current_user.id,
+            title="Task 1",
+            list_id=lst.id,
+            note="Note",
+            due_date=date(2030, 1, 2),
+        )
+        task2 = await create_task(user_id=current_user.id, title="Task 2")
+        await create_task(user_id=another_user.id, title="Task 3")
+
+        response = await client.get("/export")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert [json.loads(line) for line in response.text.splitlines()] == [
+            {
+                "type": "group",
+                "id": group.id,
+                "title": "Group",
+                "created_at": str(group.created_at),
+                "updated_at": str(group.updated_at),
+            },
+            {
+                "type": "list",
+                "id": lst.id,
+                "title": "List",
+                "group_id": group.id,
+                "created_at": str(lst.created_at),
+                "updated_at": str(lst.updated_at),
+            },
+            {
+                "type": "task",
+                "id": task1.id,
+                "title": "Task 1",
+                "list_id": lst.id,
+                "note": "Note",
+                "completed": False,
+                "due_date": "2030-01-02",
+                "created_at": str(task1.created_at),
+                "updated_at": str(task1.updated_at),
+            },
+            {
+                "type": "task",
+                "id": task2.id,
+                "title": "Task 2",
+                "list_id": None,
+                "note": "",
+                "completed": False,
+                "due_date": None,
+                "created_at": str(task2.created_at),
+                "updated_at": str(task2.updated_at),
+            },
+        ]
+
+    async def test_empty(self, authenticated_client: Tuple[AsyncClient, User]):
+        client, _current_user = authenticated_client
+
+        response = await client.get("/export")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.text == ""
+
+
+def ndjson(*rows) -> bytes:
+    return "".join(json.dumps(row) + "\n" for row in rows).encode()
+
+
+class TestImport:
+    async def test_unauthenticated(self, client: AsyncClient):
+        response = await client.post(
+            "/import", files={"file": ("tasks.ndjson", b"", "application/x-ndjson")}
+        )
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    async def test_ndjson(
+        self,
+        authenticated_client: Tuple[AsyncClient, User],
+        session: AsyncSession,
+        create_user,
+        create_list,
+    ):
+        client, current_user = authenticated_client
+        another_user = await create_user(
+            email="another-user@example.com", username="another-user"
+        )
+        existing = await create_list(user_id=current_user.id, title="Existing")
+        foreign = await create_list(user_id=another_user.id, title="Foreign")
+        content = ndjson(
+            {"type": "group", "id": 100, "title": "Group"},
+            {"type": "list", "id": 200, "title": "List", "group_id": 100},
+            {"title": "In new list", "list_id": 200, "due_date": "2030-01-02"},
+            {"title": "In existing list", "list_id": existing.id},
+            {"title": "In foreign list", "list_id": foreign.id, "completed": True},
+        )
+        content += b"\n{not json}\n" + ndjson(
+            {"title": "No"}, {"type": "folder", "title": "Folder"}
+        )
+
+        response = await client.post(
+            "/import", files={"file": ("tasks.ndjson", content, "text/plain")}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        report = response.json()
+        assert report["created"] == {"groups": 1, "lists": 1, "tasks": 3}
+        assert report["failed"] == 3
+        assert [
+            (error["row"], error["errors"][0]["type"]) for error in report["errors"]
+        ] == [
+            (7, "json_invalid"),
+            (8, "string_too_short"),
+            (9, "literal_error"),
+        ]
+
+        groups = await Group.all(session, load=(), user_id=current_user.id)
+        lists = await TaskList.all(session, load=(), user_id=current_user.id)
+        new_list = next(lst for lst in lists if lst.title == "List")
+        assert [g.title for g in groups] == ["Group"]
+        assert new_list.group_id == groups[0].id
+
+        tasks = await Task.all(session, load=(), user_id=current_user.id)
+        assert sorted(
+            (task.title, task.list_id, task.due_date, task.completed) for task in tasks
+        ) == [
+            ("In existing list", existing.id, None, False),
+            ("In foreign list", None, None, True),
+            ("In new list", new_list.id, date(2030, 1, 2), False),
+        ]
+
+    async def test_csv(
+        self, authenticated_client: Tuple[AsyncClient, User], session: AsyncSession
+    ):
+        client, current_user = authenticated_client
+        content = (
+            "\ufefftitle,note,completed,due_date\n"
+            'Task 1,"Two\nlines",true,2030-01-02\n'
+            "Task 2,,,\n"
+            "Task 3,,maybe,\n"
+        ).encode()
+
+        response = await client.post(
+            "/import", files={"file": ("tasks.csv", content, "text/csv")}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        report = response.json()
+        assert report["created"] == {"groups": 0, "lists": 0, "tasks": 2}
+        assert report["failed"] == 1
+        assert report["errors"] == [
+            {
+                "row": 4,
+                "errors": [
+                    {
+                        "type": "bool_parsing",
+                        "loc": ["completed"],
+                        "msg": "Input should be a valid boolean, unable to interpret input",
+                    }
+                ],
+            }
+        ]
+
+        tasks = await Task.all(session, load=(), user_id=current_user.id)
+        assert sorted((task.title, task.note, task.completed) for task in tasks) == [
+            ("Task 1", "Two\nlines", True),
+            ("Task 2", "", False),
+        ]
+
+    async def test_commits_in_batches(
+        self,
+        authenticated_client: Tuple[AsyncClient, User],
+        session: AsyncSession,
+        monkeypatch,
+    ):
+        client, current_user = authenticated_client
+        monkeypatch.setattr(importer, "IMPORT_BATCH_SIZE", 2)
+        commits = []
+        commit = session.commit
+
+        async def track_commit():
+            commits.append(len(await Task.all(session, load=())))
+            await commit()
+
+        monkeypatch.setattr(session, "commit", track_commit)
+        content = ndjson(*({"title": f"Task {i}"} for i in range(5)))
+
+        response = await client.post(
+            "/import", files={"file": ("tasks.jsonl", content, "text/plain")}
+        )
+
+        assert response.json()["created"]["tasks"] == 5
+        assert commits == [2, 4, 5]
+
+    async def test_round_trip(
+        self,
+        authenticated_client: Tuple[AsyncClient, User],
+        session: AsyncSession,
+        create_user,
+        create_group,
+        create_list,
+        create_task,
+    ):
+        client, current_user = authenticated_client
+        group = await create_group(user_id=current_user.id, title="Group")
+        lst = await create_list(
+            user_id=current_user.id, title="List", group_id=group.id
+        )
+        await create_task(user_id=current_user.id, title="Task", list_id=lst.id)
+        export = (await client.get("/export")).content
+
+        another_user = await create_user(
+            email="another-user@example.com", username="another-user"
+        )
+        client.headers = {"Authorization": f"Bearer {encode_token(another_user)}"}
+        response = await client.post(
+            "/import", files={"file": ("export.ndjson", export, "text/plain")}
+        )
+
+        assert response.json()["created"] == {"groups": 1, "lists": 1, "tasks": 1}
+        [task] = await Task.all(session, user_id=another_user.id)
+        assert task.title == "Task"
+        assert task.task_list.title == "List"
+        assert task.task_list.user_id == another_user.id
+        assert task.task_list.group_id != group.id
+
+    async def test_unsupported_file(
+        self, authenticated_client: Tuple[AsyncClient, User]
+    ):
+        client, _current_user = authenticated_client
+
+        response = await client.post(
+            "/import", files={"file": ("tasks.xlsx", b"", "application/octet-stream")}
+        )
+
+        assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+        assert response.json() == {"detail": "Upload an NDJSON or CSV file"}
@@ -0,0 +1,202 @@
+from typing import Tuple
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from todoapp.api.cache import (
+    MemoryBackend,
+    RedisBackend,
+    commit,
+    create_backend,
+    response_cache,
+)
+from todoapp.database.session import pop_changed
+from todoapp.models import Task, User
+from todoapp.security.token import encode_token
+
+
+@pytest.fixture(name="cache")
+def cache_fixture(client: AsyncClient, monkeypatch):
+    backend = MemoryBackend()
+    monkeypatch.setattr(response_cache, "backend", backend)
+    return backend
+
+
+class TestMemoryBackend:
+    async def test_get_and_set(self):
+        backend = MemoryBackend()
+        await backend.set("key", b"value", ttl=60)
+
+        assert await backend.get("key") == b"value"
+        assert await backend.get("missing") is None
+
+        await backend.set("key", b"other", ttl=60)
+        assert await backend.get("key") == b"other"
+        assert backend.size == len("key") + len(b"other")
+
+    async def test_expiry(self):
+        backend = MemoryBackend()
+        await backend.set("key", b"value", ttl=0)
+
+        assert await backend.get("key") is None
+        assert backend.size == 0
+
+    async def test_evicts_least_recently_used(self):
+        backend = MemoryBackend(max_bytes=20)
+        await backend.set("a", b"123456789", ttl=60)
+        await backend.set("b", b"123456789", ttl=60)
+        await backend.get("a")
+        await backend.set("c", b"123456789", ttl=60)
+
+        assert await backend.get("a") is not None
+        assert await backend.get("b") is None
+        assert await backend.get("c") is not None
+        assert backend.size == 20
+
+        # Entries larger than the whole cache are not stored
+        await backend.set("d", b"x" * 20, ttl=60)
+        assert await backend.get("d") is None
+
+
+def test_create_backend():
+    assert create_backend("") is None
+    assert isinstance(create_backend("memory://"), MemoryBackend)
+    with pytest.raises(ValueError):
+        create_backend("memcached://localhost")
+
+
+def test_create_redis_backend():
+    pytest.importorskip("redis")
+
+    # The client connects lazily, on the first command
+    backend = create_backend("redis://localhost:6379/0")
+
+    assert isinstance(backend, RedisBackend)
+
+
+async def test_write_helpers_mark_changed_users(
+    session: AsyncSession, create_user, create_task
+):
+    user = await create_user()
+    another_user = await create_user(email="user2@example.com", username="user2")
+    pop_changed(session)
+
+    task = await create_task(user_id=user.id, title="Task")
+    assert pop_changed(session) == {user.id}
+
+    await Task.bulk_create(
+        session,
+        [
+            {"user_id": user.id, "title": "Task 2"},
+            {"user_id": another_user.id, "title": "Task 3"},
+        ],
+    )
+    assert pop_changed(session) == {user.id, another_user.id}
+
+    await Task.update_by(session, task.id, another_user.id, title="Not mine")
+    assert pop_changed(session) == set()
+
+    await task.update(session, title="Updated")
+    await Task.delete_where(session, another_user.id)
+    assert pop_changed(session) == {user.id, another_user.id}
+
+    await another_user.destroy(session)
+    assert pop_changed(session) == {another_user.id}
+
+
+class TestCachedResponses:
+    async def test_hit_and_invalidation(
+        self,
+        authenticated_client: Tuple[AsyncClient, User],
+        session: AsyncSession,
+        cache: MemoryBackend,
+        query_budget,
+        create_task,
+    ):
+        client, current_user = authenticated_client
+        task = await create_task(user_id=current_user.id, title="Task")
+
+        response = await client.get("/tasks")
+        assert response.headers["X-Cache"] == "MISS"
+
+        with query_budget(0):
+            cached = await client.get("/tasks")
+
+        assert cached.status_code == status.HTTP_200_OK
+        assert cached.headers["X-Cache"] == "HIT"
+        assert cached.headers["ETag"] == response.headers["ETag"]
+        assert cached.json() == response.json()
+
+        # Other parameters are cached apart
+        response = await client.get("/tasks", params={"limit": 1})
+        assert response.headers["X-Cache"] == "MISS"
+
+        await task.update(session, title="Updated")
+        await commit(session)
+
+        response = await client.get("/tasks")
+        assert response.headers["X-Cache"] == "MISS"
+        assert response.json()["tasks"][0]["title"] == "Updated"
+
+    async def test_not_modified(
+        self,
+        authenticated_client: Tuple[AsyncClient, User],
+        cache: MemoryBackend,
+    ):
+        client, _current_user = authenticated_client
+        etag = (await client.get("/groups")).headers["ETag"]
+
+        response = await client.get("/groups", headers={"If-None-Match": etag})
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.headers["X-Cache"] == "HIT"
+        assert response.content == b""
+
+    async def test_invalidates_only_changed_users(
+        self,
+        authenticated_client: Tuple[AsyncClient, User],
+        session: AsyncSession,
+        cache: MemoryBackend,
+        create_user,
+        create_list,
+    ):
+        client, current_user = authenticated_client
+        another_user = await create_user(email="user2@example.com", username="user2")
+        another_headers = {"Authorization": f"Bearer {encode_token(another_user)}"}
+
+        await client.get("/lists")
+        await client.get("/lists", headers=another_headers)
+
+        await create_list(user_id=current_user.id, title="List")
+        await commit(session)
+
+        response = await client.get("/lists")
+        assert response.headers["X-Cache"] == "MISS"
+        assert [lst["title"] for lst in response.json()["lists"]] == ["List"]
+
+        response = await client.get("/lists", headers=another_headers)
+        assert response.headers["X-Cache"] == "HIT"
+        assert response.json()["lists"] == []
+
+    async def test_errors_are_not_cached(
+        self,
+        authenticated_client: Tuple[AsyncClient, User],
+        cache: MemoryBackend,
+    ):
+        client, _current_user = authenticated_client
+
+        for _ in range(2):
+            response = await client.get("/tasks/1")
+
+            assert response.status_code == status.HTTP_404_NOT_FOUND
+            assert "X-Cache" not in response.headers
+
+    async def test_invalid_token(self, client: AsyncClient, cache: MemoryBackend):
+        response = await client.get(
+            "/tasks", headers={"Authorization": "Bearer invalid"}
+        )
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert cache.entries == {}
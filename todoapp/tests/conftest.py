@@ -1,56 +1,85 @@
+from contextlib import asynccontextmanager, contextmanager
+
 import pytest
-from fastapi.testclient import TestClient
-from sqlmodel import Session, SQLModel, create_engine
+from httpx import ASGITransport, AsyncClient
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel.pool import StaticPool
 
-from todoapp.database.session import get_session
+from todoapp.api.cache import response_cache
+from todoapp.api.models.group import GroupRead
+from todoapp.api.models.list import TaskListRead
+from todoapp.api.models.task import TaskRead
+from todoapp.api.routers.auth import revoked_users
+from todoapp.database.base import create_sqlite_engine
+from todoapp.database.session import get_session, get_session_factory
+from todoapp.database.stats import track_queries
 from todoapp.main import app
 from todoapp.models import Group, Task, TaskList, User
 from todoapp.security.token import encode_token
 
 
 @pytest.fixture(name="session")
-def session_fixture():
-    engine = create_engine(
+async def session_fixture():
+    engine = create_sqlite_engine(
         # By not specifying the database name is enough to tell
         # SQLModel (actually SQLAlchemy) that we want to use
         # an in-memory SQLite database.
-        "sqlite://",
-        connect_args={"check_same_thread": False},
+        "sqlite+aiosqlite://",
         poolclass=StaticPool,
         # echo=True,
     )
-    SQLModel.metadata.create_all(engine)
-    with Session(engine) as session:
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
 
-    SQLModel.metadata.drop_all(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+    await engine.dispose()
 
 
 @pytest.fixture(name="client")
-def client_fixture(session: Session):
+async def client_fixture(session: AsyncSession, monkeypatch):
+    # The test session is never committed, so nothing would invalidate the
+    # cache. Cache tests enable it themselves.
+    monkeypatch.setattr(response_cache, "backend", None)
+    # IDs restart with every test database
+    revoked_users.clear()
+
     def get_session_override():
         return session
 
+    @asynccontextmanager
+    async def use_session():
+        yield session
+
     app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_session_factory] = lambda: use_session
 
-    client = TestClient(app)
-    yield client
+    transport = ASGITransport(app=app)
+    async with AsyncClient(
+        transport=transport, base_url="http://test", follow_redirects=True
+    ) as client:
+        yield client
     app.dependency_overrides.clear()
 
 
 @pytest.fixture(name="authenticated_client")
-def authenticated_client_fixture(client: TestClient, create_user):
-    user = create_user()
+async def authenticated_client_fixture(client: AsyncClient, create_user):
+    user = await create_user()
     token = encode_token(user)
     client.headers = {"Authorization": f"Bearer {token}"}
     return client, user
 
 
 @pytest.fixture(name="create_user", scope="function")
-def create_user_fixture(session: Session):
-    def _create_user(email="user@example.com", username="username", password="pwd123"):
-        return User.create_by(
+def create_user_fixture(session: AsyncSession):
+    async def _create_user(
+        email="user@example.com", username="username", password="pwd123"
+    ):
+        return await User.create_by(
             session,
             email=email,
             username=username,
@@ -61,27 +90,27 @@ def create_user_fixture(session: Session):
 
 
 @pytest.fixture(name="create_task")
-def create_task_fixture(session: Session):
-    def _create_task(user_id, title, completed=False, list_id=None, note=""):
-        task = Task(
+def create_task_fixture(session: AsyncSession):
+    async def _create_task(
+        user_id, title, completed=False, list_id=None, note="", due_date=None
+    ):
+        return await Task.create_by(
+            session,
             user_id=user_id,
             list_id=list_id,
             title=title,
             completed=completed,
             note=note,
+            due_date=due_date,
         )
-        session.add(task)
-        session.commit()
-        session.refresh(task)
-        return task
 
     yield _create_task
 
 
 @pytest.fixture(name="create_list")
-def create_list_fixture(session: Session):
-    def _create_list(user_id, title, group_id=None):
-        return TaskList.create_by(
+def create_list_fixture(session: AsyncSession):
+    async def _create_list(user_id, title, group_id=None):
+        return await TaskList.create_by(
             session, user_id=user_id, title=title, group_id=group_id
         )
 
@@ -89,8 +118,58 @@ def create_list_fixture(session: Session):
 
 
 @pytest.fixture(name="create_group")
-def create_group_fixture(session: Session):
-    def _create_group(user_id, title):
-        return Group.create_by(session, user_id=user_id, title=title)
+def create_group_fixture(session: AsyncSession):
+    async def _create_group(user_id, title):
+        return await Group.create_by(session, user_id=user_id, title=title)
 
     yield _create_group
+
+
+@pytest.fixture(name="reload")
+def reload_fixture(session: AsyncSession):
+    """Reloads a record along with the relationships it serializes
+
+    For rows changed behind the session's back, by triggers or ON DELETE
+    actions.
+    """
+
+    async def _reload(obj, load=None):
+        cls = type(obj)
+        await session.exec(
+            select(cls)
+            .where(cls.id == obj.id)
+            .options(*cls.loader_options(load))
+            .execution_options(populate_existing=True)
+        )
+        return obj
+
+    yield _reload
+
+
+@pytest.fixture(name="render")
+def render_fixture():
+    """Renders a record as the API does, through its response schema"""
+    schemas = {Task: TaskRead, TaskList: TaskListRead, Group: GroupRead}
+
+    def _render(obj, schema=None):
+        return (schema or schemas[type(obj)]).model_validate(obj).model_dump()
+
+    return _render
+
+
+@pytest.fixture(name="query_budget")
+def query_budget_fixture():
+    """Fails the test when the block issues more than `max_queries` statements"""
+
+    @contextmanager
+    def _query_budget(max_queries):
+        with track_queries() as stats:
+            yield stats
+
+        assert (
+            stats.count <= max_queries
+        ), f"Expected at most {max_queries} queries, got {stats.count}:\n" + "\n".join(
+            stats.statements
+        )
+
+    yield _query_budget
@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from todoapp.database.base import create_sqlite_engine
+
+
+async def test_create_sqlite_engine_applies_pragmas(tmp_path):
+    engine = create_sqlite_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", pragmas={"busy_timeout": 1234}
+    )
+
+    async with engine.connect() as conn:
+        journal_mode = await conn.scalar(text("PRAGMA journal_mode"))
+        synchronous = await conn.scalar(text("PRAGMA synchronous"))
+        foreign_keys = await conn.scalar(text("PRAGMA foreign_keys"))
+        busy_timeout = await conn.scalar(text("PRAGMA busy_timeout"))
+    await engine.dispose()
+
+    assert journal_mode == "wal"
+    assert synchronous == 1  # NORMAL
+    assert foreign_keys == 1
+    assert busy_timeout == 1234
+
+
+async def test_create_sqlite_engine_read_only(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"
+    writer = create_sqlite_engine(url)
+    reader = create_sqlite_engine(url, read_only=True)
+
+    async with writer.begin() as conn:
+        await conn.execute(text("CREATE TABLE item (id INTEGER PRIMARY KEY)"))
+        await conn.execute(text("INSERT INTO item (id) VALUES (1)"))
+
+    async with reader.connect() as conn:
+        assert await conn.scalar(text("SELECT count(*) FROM item")) == 1
+        with pytest.raises(OperationalError):
+            await conn.execute(text("INSERT INTO item (id) VALUES (2)"))
+
+    await reader.dispose()
+    await writer.dispose()
+
+
+async def test_read_only_transactions_see_one_snapshot(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"
+    writer = create_sqlite_engine(url)
+    reader = create_sqlite_engine(url, read_only=True)
+
+    async with writer.begin() as conn:
+        await conn.execute(text("CREATE TABLE item (id INTEGER PRIMARY KEY)"))
+
+    async with reader.begin() as read_conn:
+        assert await read_conn.scalar(text("SELECT count(*) FROM item")) == 0
+        async with writer.begin() as conn:
+            await conn.execute(text("INSERT INTO item (id) VALUES (1)"))
+        assert await read_conn.scalar(text("SELECT count(*) FROM item")) == 0
+
+    async with reader.connect() as read_conn:
+        assert await read_conn.scalar(text("SELECT count(*) FROM item")) == 1
+
+    await reader.dispose()
+    await writer.dispose()
@@ -0,0 +1,79 @@
+from datetime import date
+
+from sqlalchemy import text
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from todoapp.database.counters import repair_counters
+from todoapp.models import ListDueCount, Task, TaskList, UserDueCount
+
+PAST = date(2000, 1, 1)
+
+
+async def counters(session: AsyncSession, obj):
+    """Reads the counters of a list or user, which change behind the session"""
+    await session.refresh(obj, ["task_count", "completed_count"])
+    return obj.task_count, obj.completed_count
+
+
+async def due_counts(session: AsyncSession):
+    lists = (await session.exec(select(ListDueCount))).all()
+    users = (await session.exec(select(UserDueCount))).all()
+    return (
+        [(row.list_id, row.due_date, row.open_tasks) for row in lists],
+        [(row.user_id, row.due_date, row.open_tasks) for row in users],
+    )
+
+
+async def test_counters(session: AsyncSession, create_user, create_list, create_task):
+    user = await create_user()
+    lst = await create_list(user_id=user.id, title="List")
+
+    task = await create_task(user_id=user.id, title="Task 1", list_id=lst.id)
+    await create_task(user_id=user.id, title="Task 2", due_date=PAST)
+    await Task.bulk_create(
+        session,
+        [
+            {"user_id": user.id, "title": "Task 3", "list_id": lst.id},
+            {"user_id": user.id, "title": "Task 4", "list_id": lst.id},
+        ],
+    )
+    assert await counters(session, lst) == (3, 0)
+    assert await counters(session, user) == (4, 0)
+    assert await due_counts(session) == ([], [(user.id, PAST, 1)])
+
+    await Task.update_by(session, task.id, user.id, completed=True, due_date=PAST)
+    assert await counters(session, lst) == (3, 1)
+    assert await due_counts(session) == ([], [(user.id, PAST, 1)])
+
+    await Task.update_where(session, user.id, completed=False)
+    assert await counters(session, lst) == (3, 0)
+    assert await counters(session, user) == (4, 0)
+    assert await due_counts(session) == (
+        [(lst.id, PAST, 1)],
+        [(user.id, PAST, 2)],
+    )
+
+    # Tasks removed by ON DELETE CASCADE are counted out too
+    await TaskList.delete_where(session, user.id)
+    assert await counters(session, user) == (1, 0)
+    assert await due_counts(session) == ([], [(user.id, PAST, 1)])
+
+
+async def test_repair_counters(
+    session: AsyncSession, create_user, create_list, create_task
+):
+    user = await create_user()
+    lst = await create_list(user_id=user.id, title="List")
+    await create_task(user_id=user.id, title="Task 1", list_id=lst.id, due_date=PAST)
+    await create_task(user_id=user.id, title="Task 2", list_id=lst.id, completed=True)
+
+    await session.exec(text("UPDATE list SET task_count = 0, completed_count = 5"))
+    await session.exec(text('UPDATE "user" SET task_count = 7'))
+    await session.exec(text("DELETE FROM list_due_count"))
+
+    await repair_counters(await session.connection())
+
+    assert await counters(session, lst) == (2, 1)
+    assert await counters(session, user) == (2, 1)
+    assert await due_counts(session) == ([(lst.id, PAST, 1)], [(user.id, PAST, 1)])
@@ -0,0 +1,8 @@
+from todoapp.database.search import match_query
+
+
+def test_match_query():
+    assert match_query("buy milk") == '"buy" "milk"'
+    assert match_query("  groc*  ") == '"groc"*'
+    assert match_query('say "hi" OR NOT') == '"say" """hi""" "OR" "NOT"'
+    assert match_query("* **") == ""
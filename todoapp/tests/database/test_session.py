@@ -0,0 +1,55 @@
+from sqlalchemy import event
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from todoapp.database.base import create_sqlite_engine
+from todoapp.database.session import RoutingSession
+from todoapp.models import Group, User
+
+
+async def test_routing_session(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"
+    writer = create_sqlite_engine(url, pool_size=1, max_overflow=0)
+    reader = create_sqlite_engine(url, read_only=True)
+    async with writer.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    statements = []
+    for name, engine in (("writer", writer), ("reader", reader)):
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def log(_conn, _cursor, statement, *_args, name=name):
+            statements.append((name, statement.split()[0]))
+
+    async with AsyncSession(
+        sync_session_class=RoutingSession,
+        writer=writer,
+        reader=reader,
+        expire_on_commit=False,
+    ) as session:
+        user = User(email="user@example.com", username="user", hashed_password="x")
+        session.add(user)
+        await session.commit()
+
+        assert await Group.all(session, user_id=user.id) == []
+        # Read transactions begin explicitly, to read from one snapshot
+        assert statements == [
+            ("writer", "INSERT"),
+            ("reader", "BEGIN"),
+            ("reader", "SELECT"),
+        ]
+
+        # Reads inside a transaction that has written stay on the writer
+        statements.clear()
+        session.add(Group(user_id=user.id, title="Group"))
+        await session.flush()
+        assert len(await Group.all(session, user_id=user.id)) == 1
+        await session.commit()
+        assert await User.find_by_email(session, "user@example.com") is not None
+
+        assert statements[0] == ("writer", "INSERT")
+        assert {name for name, _ in statements[1:-2]} == {"writer"}
+        assert statements[-2:] == [("reader", "BEGIN"), ("reader", "SELECT")]
+
+    await reader.dispose()
+    await writer.dispose()
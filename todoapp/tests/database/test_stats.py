@@ -0,0 +1,68 @@
+from sqlalchemy import text
+
+from todoapp.database.base import create_sqlite_engine
+from todoapp.database.stats import (
+    QueryStats,
+    batched_queries,
+    fingerprint,
+    track_queries,
+)
+
+
+def test_fingerprint():
+    assert fingerprint("SELECT *\n  FROM task WHERE id IN (?, ?, ?)") == (
+        "SELECT * FROM task WHERE id IN (?)"
+    )
+    assert fingerprint("INSERT INTO task (id, title) VALUES (?), (?), (?)") == (
+        "INSERT INTO task (id, title) VALUES (?)"
+    )
+
+
+def test_query_stats_repeated():
+    stats = QueryStats()
+    for _ in range(3):
+        stats.record("SELECT * FROM task WHERE id = ?", 0.001)
+    stats.record("SELECT * FROM list", 0.001)
+
+    assert stats.count == 4
+    assert stats.repeated(threshold=2) == {"SELECT * FROM task WHERE id = ?": 3}
+
+
+def test_query_stats_repeated_in_batches():
+    stats = QueryStats()
+    for _ in range(3):
+        stats.record("INSERT INTO task (title) VALUES (?)", 0.001, batched=True)
+
+    assert stats.count == 3
+    assert stats.repeated(threshold=2) == {}
+
+
+async def test_track_queries():
+    engine = create_sqlite_engine("sqlite+aiosqlite://")
+
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        with track_queries() as outer:
+            await conn.execute(text("SELECT 2"))
+            with track_queries() as inner:
+                await conn.execute(text("SELECT 3"))
+    await engine.dispose()
+
+    assert inner.count == 1
+    assert outer.count == 2
+    assert list(outer.statements) == ["SELECT 2", "SELECT 3"]
+    assert outer.duration >= inner.duration > 0
+
+
+async def test_batched_queries():
+    engine = create_sqlite_engine("sqlite+aiosqlite://")
+
+    async with engine.connect() as conn:
+        with track_queries() as stats:
+            await conn.execute(text("SELECT 1"))
+            with batched_queries():
+                await conn.execute(text("SELECT 2"))
+    await engine.dispose()
+
+    assert stats.count == 2
+    assert stats.batched == {"SELECT 2": 1}
@@ -0,0 +1,60 @@
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from todoapp.models import Group, Task, TaskList, Tombstone, User
+
+
+async def version(session: AsyncSession, user: User) -> int:
+    """Reads the change version, which changes behind the session"""
+    await session.refresh(user, ["change_version"])
+    return user.change_version
+
+
+async def test_change_version(
+    session: AsyncSession, create_user, create_group, create_list, create_task
+):
+    user = await create_user()
+    another_user = await create_user(
+        email="another-user@example.com", username="another-user"
+    )
+    assert await version(session, user) == 0
+
+    group = await create_group(user_id=user.id, title="Group")
+    lst = await create_list(user_id=user.id, title="List", group_id=group.id)
+    assert await version(session, user) == 2
+
+    # Adjusting the task counters of the list does not count twice
+    task = await create_task(user_id=user.id, title="Task", list_id=lst.id)
+    assert await version(session, user) == 3
+
+    await Task.update_by(session, task.id, user.id, completed=True)
+    await TaskList.update_by(session, lst.id, user.id, title="Renamed")
+    await Group.update_by(session, group.id, user.id, title="Renamed")
+    assert await version(session, user) == 6
+
+    # The task goes with its list, and the group has no lists left
+    await TaskList.delete_where(session, user.id)
+    assert await version(session, user) == 8
+
+    await group.destroy(session)
+    assert await version(session, user) == 9
+    assert await version(session, another_user) == 0
+
+
+async def test_stamps_and_tombstones(session: AsyncSession, create_user, create_task):
+    user = await create_user()
+    task1 = await create_task(user_id=user.id, title="Task 1")
+    task2 = await create_task(user_id=user.id, title="Task 2")
+    await Task.update_by(session, task1.id, user.id, note="Note")
+
+    await session.refresh(task1, ["version"])
+    await session.refresh(task2, ["version"])
+    assert (task1.version, task2.version) == (3, 2)
+
+    await task2.destroy(session)
+    assert await Tombstone.deleted_since(session, user.id, 3) == {"task": [task2.id]}
+    assert await Tombstone.deleted_since(session, user.id, 4) == {}
+
+    # Tombstones go with their user
+    await user.destroy(session)
+    assert (await session.exec(select(Tombstone))).all() == []
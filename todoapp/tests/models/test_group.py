@@ -1,37 +1,43 @@
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from todoapp.api.models.group import GroupRef
 from todoapp.models import Group, TaskList
 
 
-def test_group_destroy(session: Session, create_user, create_list, create_group):
-    user = create_user(email="user@example.com", username="user")
-    group1 = create_group(user_id=user.id, title="Group 1 title")
-    group2 = create_group(user_id=user.id, title="Group 2 title")
-    task_list1 = create_list(user_id=user.id, group_id=group1.id, title="List 1")
-    task_list2 = create_list(user_id=user.id, group_id=group1.id, title="List 2")
-    task_list3 = create_list(
+async def test_group_destroy(
+    session: AsyncSession, create_user, create_list, create_group, reload
+):
+    user = await create_user(email="user@example.com", username="user")
+    group1 = await create_group(user_id=user.id, title="Group 1 title")
+    group2 = await create_group(user_id=user.id, title="Group 2 title")
+    task_list1 = await create_list(user_id=user.id, group_id=group1.id, title="List 1")
+    task_list2 = await create_list(user_id=user.id, group_id=group1.id, title="List 2")
+    task_list3 = await create_list(
         user_id=user.id, group_id=group2.id, title="Ungrouped list"
     )
 
-    group1.destroy(session)
+    await group1.destroy(session)
+    for task_list in (task_list1, task_list2, task_list3):
+        await reload(task_list)
 
     assert task_list1.group is None
     assert task_list2.group is None
     assert task_list3.group == group2
 
 
-def test_group_serializer(create_user, create_list, create_group):
-    user = create_user(email="user@example.com", username="user")
-    group_with_lists = create_group(user_id=user.id, title="Group 1")
-    group_without_lists = create_group(user_id=user.id, title="Group 2")
-    task_list1 = create_list(
+async def test_group_rendered(create_user, create_list, create_group, reload, render):
+    user = await create_user(email="user@example.com", username="user")
+    group_with_lists = await create_group(user_id=user.id, title="Group 1")
+    group_without_lists = await create_group(user_id=user.id, title="Group 2")
+    task_list1 = await create_list(
         user_id=user.id, group_id=group_with_lists.id, title="List 1"
     )
-    task_list2 = create_list(
+    task_list2 = await create_list(
         user_id=user.id, group_id=group_with_lists.id, title="List 2"
     )
+    await reload(group_with_lists)
 
-    assert group_with_lists.model_dump() == {
+    assert render(group_with_lists) == {
         "id": group_with_lists.id,
         "title": "Group 1",
         "task_lists": [
@@ -40,19 +46,21 @@ def test_group_serializer(create_user, create_list, create_group):
         ],
     }
 
-    assert group_without_lists.model_dump() == {
+    assert render(group_without_lists) == {
         "id": group_without_lists.id,
         "title": "Group 2",
         "task_lists": [],
     }
 
 
-def test_group_serializer_without_task_lists(create_user, create_list, create_group):
-    user = create_user(email="user@example.com", username="user")
-    group = create_group(user_id=user.id, title="Group 1")
-    create_list(user_id=user.id, group_id=group.id, title="List 1")
+async def test_group_rendered_as_reference(
+    create_user, create_list, create_group, render
+):
+    user = await create_user(email="user@example.com", username="user")
+    group = await create_group(user_id=user.id, title="Group 1")
+    await create_list(user_id=user.id, group_id=group.id, title="List 1")
 
-    assert group.serializer(include_task_lists=False) == {
+    assert render(group, GroupRef) == {
         "id": group.id,
         "title": "Group 1",
     }
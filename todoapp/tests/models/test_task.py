@@ -1,8 +1,14 @@
-def test_task_serializer_without_task_list(create_task, create_user):
-    user = create_user(email="user@example.com", username="user")
-    task = create_task(user_id=user.id, title="Task title", note="Task note")
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-    assert task.model_dump() == {
+from todoapp.api.models.task import ListTaskRead
+from todoapp.models import Task
+
+
+async def test_task_rendered_without_task_list(create_task, create_user, render):
+    user = await create_user(email="user@example.com", username="user")
+    task = await create_task(user_id=user.id, title="Task title", note="Task note")
+
+    assert render(task) == {
         "id": task.id,
         "task_list": None,
         "title": "Task title",
@@ -13,11 +19,11 @@ def test_task_serializer_without_task_list(create_task, create_user):
     }
 
 
-def test_task_serializer_excluding_task_list(create_task, create_user):
-    user = create_user(email="user@example.com", username="user")
-    task = create_task(user_id=user.id, title="Task title", note="Task note")
+async def test_task_rendered_within_list(create_task, create_user, render):
+    user = await create_user(email="user@example.com", username="user")
+    task = await create_task(user_id=user.id, title="Task title", note="Task note")
 
-    assert task.serializer(include_task_list=False) == {
+    assert render(task, ListTaskRead) == {
         "id": task.id,
         "title": "Task title",
         "note": "Task note",
@@ -27,14 +33,16 @@ def test_task_serializer_excluding_task_list(create_task, create_user):
     }
 
 
-def test_task_serializer_with_task_list(create_task, create_user, create_list):
-    user = create_user(email="user@example.com", username="user")
-    task_list = create_list(user_id=user.id, title="List title")
-    task = create_task(
+async def test_task_rendered_with_task_list(
+    create_task, create_user, create_list, render
+):
+    user = await create_user(email="user@example.com", username="user")
+    task_list = await create_list(user_id=user.id, title="List title")
+    task = await create_task(
         user_id=user.id, list_id=task_list.id, title="Task title", note="Task note"
     )
 
-    assert task.model_dump() == {
+    assert render(task) == {
         "id": task.id,
         "task_list": {
             "id": task_list.id,
@@ -46,3 +54,23 @@ def test_task_serializer_with_task_list(create_task, create_user, create_list):
         "created_at": str(task.created_at),
         "updated_at": str(task.updated_at),
     }
+
+
+async def test_stream_rows(session: AsyncSession, create_task, create_user):
+    user = await create_user(email="user@example.com", username="user")
+    another_user = await create_user(email="another@example.com", username="another")
+    ids = [(await create_task(user_id=user.id, title=f"Task {i}")).id for i in range(5)]
+    await create_task(user_id=another_user.id, title="Other task")
+
+    batches = [
+        [tuple(row) for row in rows]
+        async for rows in Task.stream_rows(
+            session, user.id, ["id", "title"], batch_size=2
+        )
+    ]
+
+    assert batches == [
+        [(ids[0], "Task 0"), (ids[1], "Task 1")],
+        [(ids[2], "Task 2"), (ids[3], "Task 3")],
+        [(ids[4], "Task 4")],
+    ]
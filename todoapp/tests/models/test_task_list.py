@@ -1,31 +1,37 @@
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from todoapp.models import Task, TaskList
 
 
-def test_task_list_destroy(session: Session, create_user, create_list, create_task):
-    user = create_user(email="user@example.com", username="user")
-    task_list = create_list(user_id=user.id, title="List title")
-    task1 = create_task(user_id=user.id, title="Task 1")
-    task2 = create_task(user_id=user.id, list_id=task_list.id, title="Task 2")
+async def test_task_list_destroy(
+    session: AsyncSession, create_user, create_list, create_task, reload
+):
+    user = await create_user(email="user@example.com", username="user")
+    task_list = await create_list(user_id=user.id, title="List title")
+    task1 = await create_task(user_id=user.id, title="Task 1")
+    task2 = await create_task(user_id=user.id, list_id=task_list.id, title="Task 2")
+    await reload(task_list)
 
-    task_list.destroy(session)
+    await task_list.destroy(session)
 
-    assert TaskList.find_by(session, user_id=user.id, obj_id=task_list.id) is None
-    assert Task.find_by(session, user_id=user.id, obj_id=task1.id) is not None
-    assert Task.find_by(session, user_id=user.id, obj_id=task2.id) is None
+    assert await TaskList.find_by(session, user_id=user.id, obj_id=task_list.id) is None
+    assert await Task.find_by(session, user_id=user.id, obj_id=task1.id) is not None
+    assert await Task.find_by(session, user_id=user.id, obj_id=task2.id) is None
 
 
-def test_task_list_serializer(create_user, create_list, create_task):
-    user = create_user(email="user@example.com", username="user")
-    task_list = create_list(user_id=user.id, title="List title")
-    _task1 = create_task(user_id=user.id, title="Task 1")
-    task2 = create_task(
+async def test_task_list_rendered(
+    create_user, create_list, create_task, reload, render
+):
+    user = await create_user(email="user@example.com", username="user")
+    task_list = await create_list(user_id=user.id, title="List title")
+    _task1 = await create_task(user_id=user.id, title="Task 1")
+    task2 = await create_task(
         user_id=user.id, list_id=task_list.id, title="Task 2", note="Note"
     )
-    task3 = create_task(user_id=user.id, list_id=task_list.id, title="Task 3")
+    task3 = await create_task(user_id=user.id, list_id=task_list.id, title="Task 3")
+    await reload(task_list)
 
-    assert task_list.model_dump() == {
+    assert render(task_list) == {
         "id": task_list.id,
         "group": None,
         "title": "List title",
@@ -50,26 +56,16 @@ def test_task_list_serializer(create_user, create_list, create_task):
     }
 
 
-def test_task_list_serializer_excluding_tasks(create_user, create_list, create_task):
-    user = create_user(email="user@example.com", username="user")
-    task_list = create_list(user_id=user.id, title="List title")
-    create_task(user_id=user.id, title="Task 1")
-    create_task(user_id=user.id, list_id=task_list.id, title="Task 2", note="Note")
-    create_task(user_id=user.id, list_id=task_list.id, title="Task 3")
-
-    assert task_list.serializer(include_tasks=False) == {
-        "id": task_list.id,
-        "group": None,
-        "title": "List title",
-    }
-
-
-def test_task_list_serializer_with_group(create_user, create_list, create_group):
-    user = create_user(email="user@example.com", username="user")
-    group = create_group(user_id=user.id, title="Group title")
-    task_list = create_list(user_id=user.id, group_id=group.id, title="List title")
+async def test_task_list_rendered_with_group(
+    create_user, create_list, create_group, render
+):
+    user = await create_user(email="user@example.com", username="user")
+    group = await create_group(user_id=user.id, title="Group title")
+    task_list = await create_list(
+        user_id=user.id, group_id=group.id, title="List title"
+    )
 
-    assert task_list.model_dump() == {
+    assert render(task_list) == {
         "id": task_list.id,
         "group": {
             "id": group.id,
@@ -78,17 +74,3 @@ def test_task_list_serializer_with_group(create_user, create_list, create_group)
         "title": "List title",
         "tasks": [],
     }
-
-
-def test_task_list_serializer_with_group_excluding_group(
-    create_user, create_list, create_group
-):
-    user = create_user(email="user@example.com", username="user")
-    group = create_group(user_id=user.id, title="Group title")
-    task_list = create_list(user_id=user.id, group_id=group.id, title="List title")
-
-    assert task_list.serializer(include_group=False) == {
-        "id": task_list.id,
-        "title": "List title",
-        "tasks": [],
-    }
@@ -1,16 +1,41 @@
-from sqlmodel import Session
+import pytest
+from sqlmodel import func, select, text
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from todoapp.models import Task, TaskList, User
 
 
-def test_user_destroy(session: Session, create_user, create_list, create_task):
-    user = create_user(email="user@example.com", username="user")
-    task_list = create_list(user_id=user.id, title="List title")
-    create_task(user_id=user.id, title="Task 1")
-    create_task(user_id=user.id, list_id=task_list.id, title="Task 2")
+async def test_user_destroy(
+    session: AsyncSession, create_user, create_list, create_task
+):
+    user = await create_user(email="user@example.com", username="user")
+    task_list = await create_list(user_id=user.id, title="List title")
+    await create_task(user_id=user.id, title="Task 1")
+    await create_task(user_id=user.id, list_id=task_list.id, title="Task 2")
 
-    user.destroy(session)
+    await user.destroy(session)
 
-    assert User.find_by_email(session, email=user.email) is None
-    assert len(TaskList.all(session, user_id=user.id)) == 0
-    assert len(Task.all(session, user_id=user.id)) == 0
+    assert await User.find_by_email(session, email=user.email) is None
+    assert len(await TaskList.all(session, user_id=user.id)) == 0
+    assert len(await Task.all(session, user_id=user.id)) == 0
+
+
+@pytest.mark.parametrize("login", ["User@Example.com", "USER"])
+async def test_user_find_by_email_or_username(
+    session: AsyncSession, create_user, login
+):
+    user = await create_user(email="user@example.com", username="user")
+    await create_user(email="other@example.com", username="other")
+
+    assert await User.find_by_email_or_username(session, login) == user
+    assert await User.find_by_email_or_username(session, "nobody") is None
+
+
+@pytest.mark.parametrize("column", ["email", "username"])
+async def test_user_lookup_uses_lowercase_index(session: AsyncSession, column):
+    stmt = select(User).where(func.lower(getattr(User, column)) == func.lower("x"))
+    compiled = stmt.compile(compile_kwargs={"literal_binds": True})
+
+    result = await session.exec(text(f"EXPLAIN QUERY PLAN {compiled}"))
+
+    assert f"USING INDEX ix_user_lower_{column}" in result.all()[0][-1]
@@ -0,0 +1,30 @@
+import time
+
+from todoapp.security.cache import TTLCache
+
+
+def test_ttl_cache():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    # "b" is the least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+    cache.pop("a")
+    assert cache.get("a") is None
+
+
+def test_ttl_cache_expiry():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("expired", 1, expires_at=time.time() - 1)
+    cache.set("later", 2, expires_at=time.time() + 3600)
+
+    assert cache.get("expired") is None
+    assert "expired" not in cache.entries
+    # The TTL still caps later expiry times
+    assert cache.entries["later"][0] <= time.time() + 60
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from todoapp.models.user import User
+from todoapp.security.token import decode_token, encode_token, token_payloads
+
+USER = User(id=1, email="user@example.com")
+
+
+def test_decode_token_caches_payloads():
+    token_payloads.clear()
+    token = encode_token(USER)
+    hits, misses = token_payloads.hits, token_payloads.misses
+
+    payload = decode_token(token)
+    assert payload["user_id"] == 1
+    assert (token_payloads.hits, token_payloads.misses) == (hits, misses + 1)
+
+    # Changing the returned payload does not change the cached one
+    payload["user_id"] = 2
+    assert decode_token(token)["user_id"] == 1
+    assert (token_payloads.hits, token_payloads.misses) == (hits + 1, misses + 1)
+
+    # Cached payloads expire with their token
+    expires_at, _ = next(iter(token_payloads.entries.values()))
+    assert expires_at == decode_token(token)["exp"]
+
+
+def test_decode_token_does_not_cache_invalid_tokens():
+    token_payloads.clear()
+
+    assert decode_token("invalid") == {}
+    assert decode_token(encode_token(USER, expires_delta=timedelta(-1))) == {}
+    assert token_payloads.entries == {}
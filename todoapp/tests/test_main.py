@@ -1,6 +1,16 @@
+import pytest
+from fastapi import FastAPI, HTTPException
 from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette import status
-from todoapp.main import app
+
+from todoapp import main
+from todoapp.database.base import create_sqlite_engine
+from todoapp.database.session import SessionDep
+from todoapp.main import app, unit_of_work
+from todoapp.models import User
 
 client = TestClient(app)
 
@@ -15,3 +25,64 @@ def test_health_check():
     response = client.get("/health")
     assert response.status_code == status.HTTP_200_OK
     assert response.json() == {"status": "ok"}
+
+
+def test_query_stats_headers_in_debug_mode(monkeypatch):
+    monkeypatch.setattr(app, "debug", True)
+
+    response = client.get("/health")
+
+    assert response.headers["X-DB-Query-Count"] == "0"
+    assert "X-DB-Query-Time-Ms" in response.headers
+
+
+def test_no_query_stats_headers_by_default():
+    response = client.get("/health")
+
+    assert "X-DB-Query-Count" not in response.headers
+
+
+async def test_unit_of_work(tmp_path, monkeypatch):
+    engine = create_sqlite_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    monkeypatch.setattr(
+        main, "create_session", lambda: AsyncSession(engine, expire_on_commit=False)
+    )
+
+    uow_app = FastAPI()
+    uow_app.middleware("http")(unit_of_work)
+
+    @uow_app.post("/users/{username}")
+    async def create_user(session: SessionDep, username: str, fail: str = ""):
+        await User.create_by(
+            session,
+            email=f"{username}@example.com",
+            username=username,
+            password="password",
+        )
+        if fail == "http":
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST)
+        if fail == "error":
+            raise RuntimeError("Unexpected error")
+
+        return {}
+
+    async with AsyncClient(
+        transport=ASGITransport(app=uow_app), base_url="http://test"
+    ) as client:
+        response = await client.post("/users/user1")
+        assert response.status_code == status.HTTP_200_OK
+
+        response = await client.post("/users/user2", params={"fail": "http"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        with pytest.raises(RuntimeError):
+            await client.post("/users/user3", params={"fail": "error"})
+
+    async with AsyncSession(engine) as session:
+        assert await User.find_by_username(session, "user1") is not None
+        assert await User.find_by_username(session, "user2") is None
+        assert await User.find_by_username(session, "user3") is None
+
+    await engine.dispose()